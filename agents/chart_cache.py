@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+
+class ChartCache:
+    """Rendered chart PNGs keyed by a hash of the chart type and its input data.
+
+    The memory tier is an LRU bounded by the total size of the PNGs it holds.
+    With ``disk_dir`` set, every rendered chart is also written there as
+    ``<key>.png`` and memory misses are looked up on disk before rendering, so
+    separate processes sharing the directory never rasterize the same chart
+    twice. The disk tier is pruned oldest-first once it exceeds ``max_disk_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 2**20, disk_dir: str | Path | None = None,
+                 max_disk_bytes: int = 512 * 2**20):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def disk_dir(self) -> Path | None:
+        return self._disk_dir
+
+    @disk_dir.setter
+    def disk_dir(self, value: str | Path | None) -> None:
+        self._disk_dir = Path(value) if value else None
+        self._disk_bytes = None  # measured lazily on the first write
+
+    @staticmethod
+    def key(kind: str, data) -> str:
+        """Stable key for a chart; ``data`` must be JSON-serializable and ordered as drawn."""
+        payload = json.dumps([kind, data], separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+        png = self._read_disk(key)
+        with self._lock:
+            if png is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, png)
+        return png
+
+    def put(self, key: str, png: bytes) -> None:
+        self._remember(key, png)
+        self._write_disk(key, png)
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        png = self.get(key)
+        if png is None:
+            png = render()
+            self.put(key, png)
+        return png
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def _remember(self, key: str, png: bytes) -> None:
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = png
+            self._bytes += len(png)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _read_disk(self, key: str) -> bytes | None:
+        if self._disk_dir is None:
+            return None
+        try:
+            return (self._disk_dir / f"{key}.png").read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, png: bytes) -> None:
+        if self._disk_dir is None:
+            return
+        path = self._disk_dir / f"{key}.png"
+        try:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(png)
+            os.replace(tmp, path)
+        except OSError:
+            return  # the disk tier is best-effort
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(f.stat().st_size for f in self._disk_dir.glob("*.png"))
+            else:
+                self._disk_bytes += len(png)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        files = []
+        for f in self._disk_dir.glob("*.png"):
+            try:
+                stat = f.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, f))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        # prune to 90% so a full tier isn't rescanned on every write
+        for _, size, f in files:
+            if total <= self.max_disk_bytes * 0.9:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+
+# shared by every ReportAgent in the process, so a warm render worker keeps its charts
+CHART_CACHE = ChartCache()
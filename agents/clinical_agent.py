@@ -1,42 +1,273 @@
-import json
+import threading
 from pathlib import Path
 
+from .datastore import field_values, file_fingerprint, load_records, resolve_source
+from .deltas import DeltaLog, Overlay, current_version, merge_positions, version as delta_version
+from .drug_lexicon import DrugLexicon
+from .metrics import METRICS
+from .sqlite_store import SqliteStore, is_sqlite
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower()
+
+
+class TrialIndex:
+    """Trials plus lookup tables built once at load time.
+
+    ``by_drug``/``by_phase``/``by_status`` map a normalized key to trial positions,
+    and per-drug phase/status counts and indications are precomputed so summaries
+    never rescan. Drugs are keyed by their canonical lexicon name, so salt forms
+    and brand names in the data land under the same key; the names are added to
+    the lexicon. ``apply`` updates all of it in place from a change log, under
+    a lock that the lookups also take, so a reader sees either none or all of a
+    batch.
+    """
+
+    def __init__(self, trials: list, lexicon: DrugLexicon | None = None):
+        self.trials = trials
+        self.lexicon = lexicon = lexicon if lexicon is not None else DrugLexicon()
+        self._drug_keys = drug_keys = {}
+        self._slots: dict[str, int] | None = None
+        self._lock = threading.Lock()
+        self.by_drug: dict[str, list[int]] = {}
+        self.by_phase: dict[str, list[int]] = {}
+        self.by_status: dict[str, list[int]] = {}
+        self.phase_counts: dict[str, dict[str, int]] = {}
+        self.status_counts: dict[str, dict[str, int]] = {}
+        self.indications: dict[str, dict[str, int]] = {}
+        columns = zip(field_values(trials, "drug"), field_values(trials, "phase"), field_values(trials, "status"),
+                      field_values(trials, "indication"))
+        for pos, (drug, phase, status, indication) in enumerate(columns):
+            if drug not in drug_keys:
+                lexicon.add_names([drug])
+                drug_keys[drug] = lexicon.key(drug)
+            drug = drug_keys[drug]
+            phase = phase or "unknown"
+            status = status or "unknown"
+            self.by_drug.setdefault(drug, []).append(pos)
+            self.by_phase.setdefault(_norm(phase), []).append(pos)
+            self.by_status.setdefault(_norm(status), []).append(pos)
+            phases = self.phase_counts.setdefault(drug, {})
+            phases[phase] = phases.get(phase, 0) + 1
+            statuses = self.status_counts.setdefault(drug, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            if indication:
+                indications = self.indications.setdefault(drug, {})
+                indications[indication] = indications.get(indication, 0) + 1
+
+    def lookup(self, table: dict, key: str) -> list:
+        with self._lock:
+            return [self.trials[pos] for pos in table.get(_norm(key), ())]
+
+    def apply(self, ops) -> None:
+        """Apply change-log operations (see ``agents.deltas``) to the trials and tables.
+
+        Each posting list and count table the batch touches is rebuilt once and
+        replaced, not mutated. The whole batch is installed under the index
+        lock, so ``find`` and ``summary`` never mix tables from before and after it.
+        """
+        if not isinstance(self.trials, Overlay):
+            self.trials = Overlay(self.trials)
+        if self._slots is None:
+            self._slots = {key: pos for pos, key in enumerate(field_values(self.trials.base, "id"))
+                           if key is not None}
+        records: dict[int, dict | None] = {}
+        postings: dict[tuple[str, str], dict[int, bool]] = {}
+        counts: dict[tuple[str, str], dict[str, int]] = {}
+        for op, key, record in ops:
+            pos = self._slots.get(key)
+            if pos is not None:
+                self._account(pos, records.get(pos, self.trials[pos]), -1, postings, counts)
+            if op == "delete":
+                if pos is not None:
+                    records[pos] = None
+                    del self._slots[key]
+                continue
+            if pos is None:
+                pos = self._slots[key] = self.trials.append(None)
+            records[pos] = record
+            self._account(pos, record, 1, postings, counts)
+
+        merged = {(name, key): merge_positions(getattr(self, name).get(key, []), changes)
+                  for (name, key), changes in postings.items()}
+        with self._lock:
+            for pos, record in records.items():
+                self.trials.set(pos, record)
+            for (name, key), positions in merged.items():
+                getattr(self, name)[key] = positions
+            for (name, drug), per_drug in counts.items():
+                getattr(self, name)[drug] = {value: n for value, n in per_drug.items() if n > 0}
+
+    def _account(self, pos: int, trial: dict | None, sign: int, postings: dict, counts: dict) -> None:
+        if trial is None:
+            return
+        drug = trial.get("drug")
+        if drug not in self._drug_keys:
+            self.lexicon.add_names([drug])
+            self._drug_keys[drug] = self.lexicon.key(drug)
+        drug = self._drug_keys[drug]
+        phase = trial.get("phase") or "unknown"
+        status = trial.get("status") or "unknown"
+        for name, key in (("by_drug", drug), ("by_phase", _norm(phase)), ("by_status", _norm(status))):
+            postings.setdefault((name, key), {})[pos] = sign > 0
+        for name, value in (("phase_counts", phase), ("status_counts", status),
+                            ("indications", trial.get("indication"))):
+            if not value:
+                continue
+            if (name, drug) not in counts:
+                counts[name, drug] = dict(getattr(self, name).get(drug, {}))
+            per_drug = counts[name, drug]
+            per_drug[value] = per_drug.get(value, 0) + sign
+
+    def find(self, field: str, value: str) -> list:
+        table = {"drug": self.by_drug, "phase": self.by_phase, "status": self.by_status}[field]
+        return self.lookup(table, value)
+
+    def summary(self, drug_key: str) -> dict:
+        with self._lock:
+            positions = self.by_drug.get(drug_key, ())
+            return {
+                "count": len(positions),
+                "phases": dict(self.phase_counts.get(drug_key, {})),
+                "statuses": dict(self.status_counts.get(drug_key, {})),
+                "examples": [self.trials[pos] for pos in positions[:3]],
+            }
+
+
+class SqliteTrialIndex:
+    """The ``TrialIndex`` queries answered from an imported SQLite database.
+
+    Nothing is scanned at open time beyond the distinct drug names (for the
+    lexicon) and the per-drug indication counts the market agent links against.
+    """
+
+    COLUMNS = {"drug": "drug_key", "phase": "phase_key", "status": "status_key"}
+
+    def __init__(self, store: SqliteStore, lexicon: DrugLexicon | None = None):
+        self.store = store
+        self.trials = store.rows("trials")
+        if lexicon is not None:
+            lexicon.add_names(key for (key,) in store.query("SELECT DISTINCT drug_key FROM trials"))
+        self.indications: dict[str, dict[str, int]] = {}
+        for drug, indication, n in store.query(
+                "SELECT drug_key, value, n FROM trial_stats WHERE kind = 'indication' ORDER BY rowid"):
+            self.indications.setdefault(drug, {})[indication] = n
+
+    def find(self, field: str, value: str) -> list:
+        return self.trials.where(f"WHERE {self.COLUMNS[field]} = ? ORDER BY pos", (_norm(value),))
+
+    def summary(self, drug_key: str) -> dict:
+        counts = {"phase": {}, "status": {}}
+        for kind, value, n in self.store.query(
+                "SELECT kind, value, n FROM trial_stats WHERE drug_key = ? AND kind IN ('phase', 'status') ORDER BY rowid",
+                (drug_key,)):
+            counts[kind][value] = n
+        return {
+            "count": sum(counts["phase"].values()),
+            "phases": counts["phase"],
+            "statuses": counts["status"],
+            "examples": self.trials.where("WHERE drug_key = ? ORDER BY pos LIMIT 3", (drug_key,)),
+        }
+
 
 class ClinicalAgent:
-    """Reads clinical trial mock data and provides simple search/summarize helpers."""
+    """Reads clinical trial mock data and provides simple search/summarize helpers.
+
+    ``data_path`` may also be a database built by ``agents.sqlite_store``. For
+    JSON and columnar files, changes in the dataset's change log (see
+    ``agents.deltas``) are applied on load and then incrementally by ``refresh``.
+    """
 
-    def __init__(self, data_path: str | Path | None = None):
+    def __init__(self, data_path: str | Path | None = None, lexicon: DrugLexicon | None = None):
         base = Path(__file__).parents[1]
         self.data_path = Path(data_path) if data_path else base / "data" / "clinical_trials.json"
-        self.trials = []
+        self.lexicon = lexicon if lexicon is not None else DrugLexicon.load()
+        self.deltas = None if is_sqlite(self.data_path) else DeltaLog.beside(self.data_path, "id")
+        self._index = TrialIndex([])
         self._load()
 
+    @property
+    def trials(self) -> list:
+        trials = self._index.trials
+        return trials.live() if isinstance(trials, Overlay) else trials
+
+    @property
+    def indications(self) -> dict[str, dict[str, int]]:
+        """Trial counts per indication, keyed by canonical drug name."""
+        return self._index.indications
+
+    def _read(self) -> tuple[TrialIndex | SqliteTrialIndex, tuple[str, int]]:
+        applied = ("", 0)
+        with METRICS.timer("pharma_dataset_load_seconds", dataset="clinical_trials"):
+            if is_sqlite(self.data_path):
+                index = SqliteTrialIndex(SqliteStore(self.data_path), self.lexicon)
+            else:
+                index = TrialIndex(load_records(self.data_path, "trials", []), self.lexicon)
+                generation = self.deltas.generation()
+                ops, offset = self.deltas.read()
+                applied = (generation, offset)
+                if ops:
+                    index.apply(ops)
+        METRICS.set_gauge("pharma_dataset_records", len(index.trials), dataset="clinical_trials")
+        return index, applied
+
+    def _version(self, base: str, applied: tuple[str, int]) -> str:
+        return base if self.deltas is None else delta_version(base, applied)
+
     def _load(self):
+        self._base = file_fingerprint(resolve_source(self.data_path))
         try:
-            with open(self.data_path, "r", encoding="utf-8") as fh:
-                payload = json.load(fh)
-                self.trials = payload.get("trials", [])
+            self._index, self._applied = self._read()
         except Exception:
-            self.trials = []
+            self._index, self._applied = TrialIndex([]), ("", 0)
+        self.version = self._version(self._base, self._applied)
+
+    def current_version(self) -> str:
+        """The ``version`` this agent will have once it has caught up with the files on disk."""
+        return current_version(self.data_path, self.deltas)
+
+    def reload(self):
+        """Rebuild from the data file off to the side, then swap it in with one assignment.
+
+        Readers keep whatever state they already grabbed; if the read fails the
+        exception propagates and the current data stays in place.
+        """
+        base = file_fingerprint(resolve_source(self.data_path))
+        self._index, applied = self._read()
+        self._base, self._applied = base, applied
+        self.version = self._version(base, applied)  # after the data, so a result is never cached under a newer version
+
+    def refresh(self):
+        """Apply new change-log lines in place; a changed data file or log means a full ``reload``."""
+        base = file_fingerprint(resolve_source(self.data_path))
+        if self.deltas is None or base != self._base:
+            return self.reload()
+        generation, size = self.deltas.position()
+        applied_generation, offset = self._applied
+        if generation != applied_generation or size < offset:
+            return self.reload()  # compacted: the offset belongs to the old log
+        ops, offset = self.deltas.read(offset)
+        if ops:
+            self._index.apply(ops)
+        applied = self._applied = (generation, offset)
+        self.version = self._version(base, applied)
+
+    def _drug_key(self, drug_name: str) -> str:
+        # "Glucophage", "metformin HCl" and "Metfromin" all resolve to "metformin"
+        return self.lexicon.resolve(drug_name) or self.lexicon.key(drug_name)
 
     def find_trials_for_drug(self, drug_name: str):
-        return [t for t in self.trials if t.get("drug", "").lower() == drug_name.lower()]
+        return self._index.find("drug", self._drug_key(drug_name))
+
+    def find_trials_by_phase(self, phase: str):
+        return self._index.find("phase", phase)
+
+    def find_trials_by_status(self, status: str):
+        return self._index.find("status", status)
 
     def summarize_trials(self, drug_name: str):
-        trials = self.find_trials_for_drug(drug_name)
-        summary = {
-            "drug": drug_name,
-            "count": len(trials),
-            "phases": {},
-            "statuses": {},
-            "examples": trials[:3],
-        }
-        for t in trials:
-            p = t.get("phase") or "unknown"
-            summary["phases"][p] = summary["phases"].get(p, 0) + 1
-            s = t.get("status") or "unknown"
-            summary["statuses"][s] = summary["statuses"].get(s, 0) + 1
-        return summary
+        return {"drug": drug_name, **self._index.summary(self._drug_key(drug_name))}
 
 
 if __name__ == "__main__":
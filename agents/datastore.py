@@ -0,0 +1,214 @@
+"""Columnar, memory-mapped storage for the agent datasets.
+
+``python -m agents.datastore data/*.json`` converts each JSON dataset into a
+``.cols`` file next to it. Agents open the ``.cols`` file through ``mmap`` when it
+is at least as new as the JSON, so rows are decoded lazily on access and every
+process reading the same file shares its pages through the OS page cache.
+
+File layout::
+
+    MAGIC | header length (8 bytes, little endian) | header JSON | padding
+    per column: (rows + 1) uint64 offsets | JSON-encoded cells
+
+A zero-length cell marks a key that was absent from that record.
+"""
+import json
+import mmap
+import struct
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+from .sqlite_store import is_sqlite, load_rows
+
+MAGIC = b"PHCOL1\n"
+SUFFIX = ".cols"
+_MISSING = object()
+
+
+def _pad(n: int) -> int:
+    return (8 - n % 8) % 8
+
+
+class Column(Sequence):
+    """Lazily decoded values of one column; absent keys read as ``None``."""
+
+    def __init__(self, buf: memoryview, offsets: memoryview, data_start: int):
+        self._buf = buf
+        self._offsets = offsets
+        self._data_start = data_start
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, i: int):
+        start, end = self._offsets[i], self._offsets[i + 1]
+        if start == end:
+            return _MISSING
+        return json.loads(bytes(self._buf[self._data_start + start:self._data_start + end]))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        value = self.raw(i)
+        return None if value is _MISSING else value
+
+
+class ColumnarTable(Sequence):
+    """Read-only sequence of record dicts backed by a memory-mapped ``.cols`` file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            size = fh.seek(0, 2)
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        buf = memoryview(self._mmap) if self._mmap else memoryview(b"")
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{self.path} is not a columnar data file")
+        (header_len,) = struct.unpack_from("<Q", buf, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(buf[header_start:header_start + header_len]))
+        self.key = header["key"]
+        self.shape = header["shape"]
+        self.rows = header["rows"]
+        self._columns = {}
+        for name, meta in header["columns"].items():
+            offsets = buf[meta["offsets"]:meta["offsets"] + 8 * (self.rows + 1)].cast("Q")
+            self._columns[name] = Column(buf, offsets, meta["data"])
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> Column | list:
+        col = self._columns.get(name)
+        return col if col is not None else [None] * self.rows
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.rows))]
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        row = {}
+        for name, col in self._columns.items():
+            value = col.raw(i)
+            if value is not _MISSING:
+                row[name] = value
+        return row
+
+
+def field_values(records: Sequence, name: str):
+    """Values of one field across ``records`` without decoding whole rows when columnar."""
+    if isinstance(records, ColumnarTable):
+        return records.column(name)
+    return [r.get(name) for r in records]
+
+
+def write_table(records: list, out_path: str | Path, key: str, shape: str = "list") -> Path:
+    out_path = Path(out_path)
+    names: dict[str, None] = {}
+    for r in records:
+        names.update(dict.fromkeys(r))
+    blobs = {}
+    for name in names:
+        offsets, chunks, pos = [0], [], 0
+        for r in records:
+            if name in r:
+                cell = json.dumps(r[name], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                chunks.append(cell)
+                pos += len(cell)
+            offsets.append(pos)
+        blobs[name] = (struct.pack(f"<{len(offsets)}Q", *offsets), b"".join(chunks))
+
+    # offsets are absolute, so iterate until the header (which holds them) stops changing size
+    columns = {name: {"offsets": 0, "data": 0} for name in names}
+    header = {"key": key, "shape": shape, "rows": len(records), "columns": columns}
+    header_bytes = b""
+    while len(header_bytes) != len(json.dumps(header).encode("utf-8")):
+        header_bytes = json.dumps(header).encode("utf-8")
+        pos = len(MAGIC) + 8 + len(header_bytes)
+        pos += _pad(pos)
+        for name, (offsets, data) in blobs.items():
+            columns[name] = {"offsets": pos, "data": pos + len(offsets)}
+            pos += len(offsets) + len(data)
+            pos += _pad(pos)
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        fh.write(b"\0" * _pad(fh.tell()))
+        for name, (offsets, data) in blobs.items():
+            assert fh.tell() == columns[name]["offsets"]
+            fh.write(offsets + data)
+            fh.write(b"\0" * _pad(fh.tell()))
+    tmp.replace(out_path)
+    return out_path
+
+
+def convert(json_path: str | Path, out_path: str | Path | None = None) -> Path:
+    """Convert one dataset JSON file (``{"<key>": [records...]}``) to ``.cols``."""
+    json_path = Path(json_path)
+    with open(json_path, "r", encoding="utf-8") as fh:
+        payload = json.load(fh)
+    key, records = next(iter(payload.items()))
+    shape = "dict" if isinstance(records, dict) else "list"
+    records = [records] if shape == "dict" else records
+    return write_table(records, out_path or json_path.with_suffix(SUFFIX), key, shape)
+
+
+def resolve_source(path: str | Path) -> Path:
+    """The file an agent should read: a fresh ``.cols`` sibling wins over the JSON."""
+    path = Path(path)
+    if path.suffix == SUFFIX:
+        return path
+    cols = path.with_suffix(SUFFIX)
+    try:
+        cols_mtime = cols.stat().st_mtime_ns
+    except OSError:
+        return path
+    try:
+        json_mtime = path.stat().st_mtime_ns
+    except OSError:
+        return cols
+    return cols if cols_mtime >= json_mtime else path
+
+
+def load_records(path: str | Path, key: str, default=None):
+    """Load the ``key`` collection of a dataset from its columnar file, a SQLite database or its JSON."""
+    source = resolve_source(path)
+    if is_sqlite(source):
+        return load_rows(source, key, default)
+    if source.suffix == SUFFIX:
+        table = ColumnarTable(source)
+        if table.key != key:
+            return default
+        if table.shape == "dict":
+            return table[0] if len(table) else default
+        return table
+    with open(source, "r", encoding="utf-8") as fh:
+        return json.load(fh).get(key, default)
+
+
+def file_fingerprint(path: str | Path) -> str:
+    """Cheap identity of a file's current contents (path, size, mtime)."""
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return f"{path}:missing"
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        print("Wrote:", convert(arg))
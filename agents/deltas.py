@@ -0,0 +1,269 @@
+"""Append-only change logs for the trial and patent datasets.
+
+A feed records its changes in ``<dataset>.delta.ndjson`` next to the dataset
+file (``data/clinical_trials.delta.ndjson`` for ``data/clinical_trials.json``),
+one JSON object per line::
+
+    {"op": "upsert", "record": {"id": "NCT001", "drug": "Metformin", ...}}
+    {"op": "delete", "key": "NCT002"}
+
+Records are keyed by ``id`` (trials) or ``patent_id`` (patents). The agents
+apply new lines to their loaded indexes in place, so a day's changes cost a
+few hundred index updates instead of a full reload. Both operations are
+idempotent, which lets ``python -m agents.deltas data/clinical_trials.json``
+fold the log into the dataset file (and refresh its ``.cols``) while agents
+are running: one that re-reads the new file together with the old log ends
+up with the same records.
+
+Compaction holds an exclusive ``flock`` on the log while it folds it, and
+``DeltaLog.append`` takes the same lock, so no line is lost in between. The
+log is then replaced by a new one that starts with a ``{"generation": ...}``
+line; agents track that generation with their byte offset and reload when it
+changes. Feeds should write through ``DeltaLog.append`` (or lock the file the
+same way). Without ``fcntl`` (Windows) there is no lock, so compact only while
+the feed is idle.
+"""
+import json
+import logging
+import os
+import sys
+import uuid
+from collections.abc import Sequence
+from pathlib import Path
+
+from .datastore import SUFFIX, ColumnarTable, convert, file_fingerprint, resolve_source
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DELTA_SUFFIX = ".delta.ndjson"
+KEY_FIELDS = {"trials": "id", "patents": "patent_id"}
+
+
+def version(base_fingerprint: str, applied: tuple[str, int]) -> str:
+    """Agent version for a base file plus the first bytes of one log generation.
+
+    ``applied`` is ``(generation, offset)``.
+    """
+    generation, offset = applied
+    return f"{base_fingerprint}+{generation}:{offset}"
+
+
+def _lock(fh) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+
+
+def _is_current(fh, path: Path) -> bool:
+    """Whether the open file ``fh`` is still the one at ``path`` (not compacted away)."""
+    try:
+        return os.fstat(fh.fileno()).st_ino == os.stat(path).st_ino
+    except OSError:
+        return False
+
+
+class DeltaLog:
+    """Reader and writer for one dataset's change log."""
+
+    def __init__(self, path: str | Path, key_field: str):
+        self.path = Path(path)
+        self.key_field = key_field
+
+    @classmethod
+    def beside(cls, data_path: str | Path, key_field: str) -> "DeltaLog":
+        data_path = Path(data_path)
+        return cls(data_path.with_name(data_path.stem + DELTA_SUFFIX), key_field)
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    def generation(self) -> str:
+        """Id written at the top of the log by the last compaction; "" for a log never compacted."""
+        try:
+            with open(self.path, "rb") as fh:
+                first = fh.readline()
+            return json.loads(first)["generation"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return ""
+
+    def position(self) -> tuple[str, int]:
+        """``(generation, size)``: where a reader that has applied everything would be."""
+        return self.generation(), self.size()
+
+    def _open_locked(self, mode: str):
+        # retry until the locked file is the live log, not one a compaction just replaced
+        while True:
+            fh = open(self.path, mode)
+            _lock(fh)
+            if fcntl is None or _is_current(fh, self.path):
+                return fh
+            fh.close()
+
+    def read(self, offset: int = 0) -> tuple[list[tuple[str, str, dict | None]], int]:
+        """Operations in the complete lines after byte ``offset``, and the offset after them.
+
+        Each operation is ``("upsert", key, record)`` or ``("delete", key, None)``.
+        A trailing line without its newline is still being written and is left
+        for the next read; malformed lines are logged and skipped.
+        """
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(offset)
+                data = fh.read()
+        except OSError:
+            return [], offset
+        end = data.rfind(b"\n") + 1
+        ops = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                if "generation" in entry:
+                    continue
+                if entry["op"] == "upsert":
+                    record = entry["record"]
+                    ops.append(("upsert", record[self.key_field], record))
+                elif entry["op"] == "delete":
+                    ops.append(("delete", entry["key"], None))
+                else:
+                    raise ValueError(f"unknown op {entry['op']!r}")
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning("Skipping malformed line in %s: %s", self.path, exc)
+        return ops, offset + end
+
+    def append(self, upserts=(), deletes=()) -> None:
+        lines = [json.dumps({"op": "upsert", "record": r}, ensure_ascii=False) for r in upserts]
+        lines += [json.dumps({"op": "delete", "key": k}, ensure_ascii=False) for k in deletes]
+        if not lines:
+            return
+        with self._open_locked("ab") as fh:
+            fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+
+class Overlay(Sequence):
+    """Records addressed by position: a read-only base plus replaced and appended slots.
+
+    Lets an index built over a list or a ``ColumnarTable`` take changes without
+    copying the base. Deleted slots read as ``None`` so positions stay stable;
+    ``live()`` lists the remaining records.
+    """
+
+    def __init__(self, base: Sequence):
+        self.base = base
+        self.changed: dict[int, dict | None] = {}
+        self.added: list = []
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.added)
+
+    def __getitem__(self, pos: int):
+        if pos in self.changed:
+            return self.changed[pos]
+        if pos < len(self.base):
+            return self.base[pos]
+        return self.added[pos - len(self.base)]
+
+    def set(self, pos: int, record: dict | None) -> None:
+        if pos < len(self.base):
+            self.changed[pos] = record
+        else:
+            self.added[pos - len(self.base)] = record
+
+    def append(self, record: dict) -> int:
+        self.added.append(record)
+        return len(self) - 1
+
+    def live(self) -> list:
+        return [record for record in self if record is not None]
+
+
+def merge_positions(positions: list[int], changes: dict[int, bool]) -> list[int]:
+    """A sorted copy of ``positions`` with each changed position added (True) or removed (False)."""
+    kept = [pos for pos in positions if pos not in changes]
+    return sorted(kept + [pos for pos, present in changes.items() if present])
+
+
+def fold(records: list, ops, key_field: str) -> list:
+    """``records`` with ``ops`` applied: upserts replace in place or append, deletes drop."""
+    records = list(records)
+    slots = {r.get(key_field): pos for pos, r in enumerate(records)}
+    for op, key, record in ops:
+        pos = slots.get(key)
+        if op == "delete":
+            if pos is not None:
+                records[pos] = None
+                del slots[key]
+        elif pos is None:
+            slots[key] = len(records)
+            records.append(record)
+        else:
+            records[pos] = record
+    return [r for r in records if r is not None]
+
+
+def _read_dataset(data_path: Path) -> tuple[str, list]:
+    source = resolve_source(data_path)
+    if source.suffix == SUFFIX:
+        table = ColumnarTable(source)
+        return table.key, list(table)
+    with open(source, "r", encoding="utf-8") as fh:
+        key, records = next(iter(json.load(fh).items()))
+    return key, records
+
+
+def compact(data_path: str | Path) -> int:
+    """Fold the change log into the dataset file; returns the number of operations folded.
+
+    The log stays locked against ``DeltaLog.append`` throughout. The JSON is
+    rewritten atomically (and its ``.cols`` file regenerated if it has one),
+    then the log is replaced by a new generation holding only an unfinished
+    trailing line, if there was one.
+    """
+    data_path = Path(data_path)
+    key, records = _read_dataset(data_path)
+    if key not in KEY_FIELDS:
+        raise ValueError(f"{data_path}: no change log format for dataset {key!r}")
+    log = DeltaLog.beside(data_path, KEY_FIELDS[key])
+    if not log.path.exists():
+        return 0
+    with log._open_locked("rb") as fh:
+        ops, offset = log.read()
+        if not ops:
+            return 0
+        records = fold(records, ops, log.key_field)
+
+        tmp = data_path.with_suffix(data_path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as out:
+            json.dump({key: records}, out, ensure_ascii=False, indent=2)
+        os.replace(tmp, data_path)
+        if data_path.with_suffix(SUFFIX).exists():
+            convert(data_path)
+
+        fh.seek(offset)
+        tail = fh.read()
+        tmp = log.path.with_suffix(log.path.suffix + ".tmp")
+        header = json.dumps({"generation": uuid.uuid4().hex}) + "\n"
+        tmp.write_bytes(header.encode("utf-8") + tail)
+        os.replace(tmp, log.path)
+    return len(ops)
+
+
+def current_version(data_path: str | Path, log: DeltaLog | None) -> str:
+    """What an agent's ``version`` will be once it has applied everything on disk."""
+    base = file_fingerprint(resolve_source(data_path))
+    return base if log is None else version(base, log.position())
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        print(f"{arg}: folded {compact(arg)} change(s)")
@@ -0,0 +1,174 @@
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Iterable
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_DIGITS_RE = re.compile(r"[^0-9]+")
+
+# salt and ester forms that don't change which drug is meant
+SALT_WORDS = frozenset({
+    "acetate", "besylate", "bitartrate", "bromide", "calcium", "chloride", "citrate", "dihydrate",
+    "fumarate", "hcl", "hydrobromide", "hydrochloride", "maleate", "mesylate", "monohydrate",
+    "phosphate", "potassium", "sodium", "succinate", "sulfate", "sulphate", "tartrate",
+})
+# anions that are the drug itself when paired with a salt word ("calcium carbonate", "sodium bicarbonate")
+ION_WORDS = SALT_WORDS | frozenset({
+    "bicarbonate", "carbonate", "fluoride", "gluconate", "hydroxide", "iodide", "lactate", "nitrate",
+    "oxide", "peroxide",
+})
+MEMO_SIZE = 4096
+
+
+def normalize(name: str | None) -> str:
+    """Lowercase words of a drug name with salt forms dropped: ``"Metformin HCl"`` -> ``"metformin"``.
+
+    A name made only of ions (``"Calcium carbonate"``) is kept whole.
+    """
+    words = _WORD_RE.findall((name or "").lower())
+    kept = [w for w in words if w not in SALT_WORDS]
+    if all(w in ION_WORDS for w in kept):
+        return " ".join(words)
+    return " ".join(kept)
+
+
+def _grams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within(a: str, b: str, limit: int) -> int | None:
+    """Levenshtein distance of ``a`` and ``b`` if it is at most ``limit``, else None."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+class DrugLexicon:
+    """Drug names, their synonyms and a trigram index for typo-tolerant lookups.
+
+    Every alias (brand names, salt forms, abbreviations, and the names seen in
+    the datasets) maps to the normalized canonical name, which the agents use as
+    their index key. ``resolve`` tries an exact alias hit first; otherwise it
+    ranks aliases by shared trigrams and accepts the closest one within a small
+    edit distance (1 for names up to 6 characters, 2 beyond, none under 4),
+    unless aliases of two different drugs are equally close. A fuzzy match can
+    still be another drug whose name is one or two letters away (prednisone and
+    prednisolone), so callers should show the user ``display(key)`` when
+    ``query not in lexicon``. Fuzzy results are memoized, and the index is
+    only ever appended to, so lookups need no lock while ``add_names`` runs on
+    a reload.
+    """
+
+    def __init__(self, synonyms: dict[str, Iterable[str]] | None = None, names: Iterable[str] = ()):
+        self._canonical: dict[str, str] = {}       # alias -> canonical key
+        self._aliases: dict[str, tuple] = {}       # canonical key -> aliases, key first
+        self._grams: dict[str, list] = {}          # trigram -> aliases containing it
+        self._names: dict[str, str] = {}           # canonical key -> name as first written
+        self._memo: dict[str, str | None] = {}
+        self._lock = threading.Lock()
+        for name, others in (synonyms or {}).items():
+            self.add(name, others)
+        self.add_names(names)
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "DrugLexicon":
+        """Read ``{"synonyms": {name: [alias, ...]}}``; a missing or bad file gives an empty lexicon."""
+        path = Path(path) if path else Path(__file__).parents[1] / "data" / "drug_synonyms.json"
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return cls(json.load(fh).get("synonyms", {}))
+        except (OSError, ValueError, AttributeError):
+            return cls()
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize(name) in self._canonical
+
+    def add(self, name: str, synonyms: Iterable[str] = ()) -> str:
+        """Register ``name`` and its synonyms; returns the canonical key."""
+        with self._lock:
+            key = self._canonical.get(normalize(name)) or normalize(name)
+            if not key:
+                return key
+            self._names.setdefault(key, name.strip())
+            for alias in (key, *map(normalize, synonyms)):
+                if not alias or alias in self._canonical:
+                    continue
+                self._aliases[key] = self._aliases.get(key, ()) + (alias,)
+                for gram in _grams(alias):
+                    self._grams.setdefault(gram, []).append(alias)
+                self._canonical[alias] = key
+            self._memo = {}  # a misspelling may now be closer to the new alias
+            return key
+
+    def add_names(self, names: Iterable[str]) -> None:
+        for name in names:
+            if name and normalize(name) not in self._canonical:
+                self.add(name)
+
+    def key(self, name: str) -> str:
+        """Index key for a name as written in the data: its canonical key, never a fuzzy guess."""
+        norm = normalize(name)
+        return self._canonical.get(norm, norm)
+
+    def names(self) -> list[str]:
+        """One display name per drug, as it was first registered (e.g. ``"Metformin"``)."""
+        return list(self._names.values())
+
+    def aliases(self, key: str) -> tuple:
+        return self._aliases.get(key, ())
+
+    def display(self, key: str) -> str:
+        """Name of the drug with canonical ``key`` as first registered."""
+        return self._names.get(key, key)
+
+    def resolve(self, query: str) -> str | None:
+        """Canonical key for a user query, allowing a typo or two; None if nothing is close."""
+        norm = normalize(query)
+        key = self._canonical.get(norm)
+        if key is not None or len(norm) < 4:
+            return key
+        memo = self._memo
+        if norm in memo:
+            return memo[norm]
+        key = self._fuzzy(norm)
+        if len(memo) >= MEMO_SIZE:
+            memo.clear()
+        memo[norm] = key
+        return key
+
+    def _fuzzy(self, norm: str) -> str | None:
+        limit = 1 if len(norm) <= 6 else 2
+        shared: dict[str, int] = {}
+        for gram in _grams(norm):
+            for alias in self._grams.get(gram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+        digits = _DIGITS_RE.sub("", norm)
+        best, best_distance, tied = None, limit + 1, False
+        # an edit touches at most 3 trigrams, so a close alias shares most of them
+        floor = len(norm) + 1 - 3 * limit
+        for alias, count in sorted(shared.items(), key=lambda item: -item[1]):
+            if count < floor:
+                break
+            if _DIGITS_RE.sub("", alias) != digits:
+                continue  # "drug 2" is never a typo of "drug 3"
+            distance = _within(norm, alias, min(limit, best_distance))
+            if distance is None:
+                continue
+            if distance < best_distance:
+                best, best_distance, tied = alias, distance, False
+            elif self._canonical[alias] != self._canonical[best]:
+                tied = True  # as close to two drugs: guessing either could be wrong
+        return self._canonical[best] if best is not None and not tied else None
@@ -0,0 +1,115 @@
+"""Cross-drug repurposing leaderboard.
+
+Every known drug (see ``agents.precompute.known_drugs``) becomes one row of a
+NumPy feature matrix:
+
+* ``trials`` and one column per trial phase and status (``phase_3``,
+  ``status_completed``, ...) with the drug's trial counts;
+* ``patent_opportunity``: 1 for High, 0.5 for Medium, 0 for Low;
+* ``market_gap``: gap score of the drug's top linked market segment;
+* ``literature_hits``: number of matching articles.
+
+Each column is scaled to [0, 1] by its maximum once, so a ranking is one
+matrix-vector product followed by ``argpartition`` for the top k.
+"""
+import math
+import re
+
+import numpy as np
+
+from .precompute import known_drugs
+
+OPPORTUNITY = {"High": 1.0, "Medium": 0.5, "Low": 0.0}
+BASE_FEATURES = ("trials", "patent_opportunity", "market_gap", "literature_hits")
+# weights of the features a request leaves out; columns absent from the data are skipped
+DEFAULT_WEIGHTS = {
+    "patent_opportunity": 3.0,
+    "market_gap": 2.0,
+    "literature_hits": 1.0,
+    "trials": 0.5,
+    "phase_3": 1.0,
+    "phase_4": 1.0,
+    "status_completed": 0.5,
+    "status_terminated": -1.0,
+    "status_withdrawn": -1.0,
+}
+MAX_K = 1000
+
+
+def _slug(prefix: str, value: str) -> str:
+    # "Phase 2/3" -> "phase_2_3", "Active, recruiting" -> "status_active_recruiting"
+    words = re.findall(r"[a-z0-9]+", value.lower())
+    if words and words[0] == prefix:
+        words = words[1:]
+    return "_".join([prefix, *words])
+
+
+def drug_features(master, drug: str) -> dict[str, float]:
+    """Raw feature values of one drug, from each of the master's agents."""
+    summary = master.clinical.summarize_trials(drug)
+    insight = master.market.insight_for_drug(drug) or {}
+    row = {
+        "trials": summary["count"],
+        "patent_opportunity": OPPORTUNITY.get(master.patent.assess_opportunity(drug)["opportunity"], 0.0),
+        "market_gap": insight.get("gap_score") or 0.0,
+        "literature_hits": master.web.summarize_for_drug(drug, limit=1)["count"],
+    }
+    for prefix, counts in (("phase", summary["phases"]), ("status", summary["statuses"])):
+        for value, n in counts.items():
+            name = _slug(prefix, value)
+            row[name] = row.get(name, 0) + n
+    return row
+
+
+class Leaderboard:
+    """Per-drug feature matrix ranked by a weighted sum of its scaled columns."""
+
+    def __init__(self, drugs: list[str], features: list[str], matrix: np.ndarray, version=None):
+        self.drugs = drugs
+        self.features = features
+        self.matrix = matrix
+        self.version = version
+        self._columns = {name: i for i, name in enumerate(features)}
+        peak = matrix.max(axis=0) if len(drugs) else np.zeros(len(features))
+        self._scaled = matrix / np.where(peak > 0, peak, 1.0)
+
+    @classmethod
+    def build(cls, master) -> "Leaderboard":
+        version = master.data_version()  # read first, so data changing mid-build forces a rebuild
+        drugs = known_drugs(master)
+        rows = [drug_features(master, drug) for drug in drugs]
+        extra = sorted({name for row in rows for name in row} - set(BASE_FEATURES))
+        features = [*BASE_FEATURES, *extra]
+        columns = {name: i for i, name in enumerate(features)}
+        matrix = np.zeros((len(drugs), len(features)))
+        for i, row in enumerate(rows):
+            for name, value in row.items():
+                matrix[i, columns[name]] = value
+        return cls(drugs, features, matrix, version)
+
+    def weights(self, overrides: dict[str, float] | None = None) -> dict[str, float]:
+        """Effective weight of every feature; raises ValueError for an unknown feature or a non-finite weight."""
+        unknown = sorted(set(overrides or ()) - set(self._columns))
+        if unknown:
+            raise ValueError(f"Unknown feature(s): {', '.join(unknown)}; expected one of {', '.join(self.features)}")
+        invalid = sorted(name for name, value in (overrides or {}).items() if not math.isfinite(value))
+        if invalid:
+            raise ValueError(f"Weight(s) must be finite numbers: {', '.join(invalid)}")  # NaN/inf are not valid JSON
+        merged = {**DEFAULT_WEIGHTS, **(overrides or {})}
+        return {name: float(merged.get(name, 0.0)) for name in self.features}
+
+    def top(self, k: int = 10, weights: dict[str, float] | None = None) -> list[dict]:
+        """The ``k`` best-scoring drugs, best first; equal scores keep name order."""
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+        vector = np.fromiter(self.weights(weights).values(), dtype=float, count=len(self.features))
+        scores = self._scaled @ vector
+        k = min(k, len(scores))
+        if not k:
+            return []
+        cutoff = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        best = np.flatnonzero(scores >= cutoff)  # every drug tied at the cutoff, so ties break by name
+        best = best[np.lexsort((best, -scores[best]))][:k]
+        return [{"rank": rank, "drug": self.drugs[i], "score": round(float(scores[i]), 4),
+                 "features": dict(zip(self.features, self.matrix[i].tolist()))}
+                for rank, i in enumerate(best, 1)]
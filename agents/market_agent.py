@@ -1,46 +1,153 @@
-import json
+import re
 from pathlib import Path
+from typing import Iterable
+
+from .datastore import field_values, file_fingerprint, load_records, resolve_source
+from .drug_lexicon import DrugLexicon
+from .metrics import METRICS
+
+_WORD_RE = re.compile(r"[a-z]+")
+# words that say nothing about the therapeutic area
+GENERIC_WORDS = frozenset({"adjunct", "and", "care", "disease", "diseases", "for", "in", "induced", "of",
+                           "prevention", "syndrome", "the", "therapy", "treatment", "with"})
+# indication words -> the segment words of their therapeutic area
+AREA_TERMS = {
+    "cancer": ("oncology",), "tumor": ("oncology",), "carcinoma": ("oncology",), "glioblastoma": ("oncology",),
+    "leukemia": ("oncology",), "lymphoma": ("oncology",), "myeloma": ("oncology",), "melanoma": ("oncology",),
+    "chemotherapy": ("oncology", "supportive"), "nausea": ("supportive",), "cachexia": ("supportive",),
+    "arthritis": ("autoimmune",), "lupus": ("autoimmune",), "sclerosis": ("autoimmune",),
+    "psoriasis": ("autoimmune", "dermatology"), "alopecia": ("dermatology",), "acne": ("dermatology",),
+    "leprosum": ("dermatology",), "dermatitis": ("dermatology",),
+    "heart": ("cardiovascular",), "cardiac": ("cardiovascular",), "coronary": ("cardiovascular",),
+    "stroke": ("cardiovascular",), "diabetes": ("metabolic",), "obesity": ("metabolic",), "pcos": ("metabolic",),
+}
+RELATED_SEGMENTS = 3
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower()
+
+
+def _terms(text: str) -> set[str]:
+    return {w for w in _WORD_RE.findall(_norm(text)) if w not in GENERIC_WORDS}
+
+
+class MarketIndex:
+    """Market insights with segment lookups built once at load time.
+
+    ``by_segment`` maps a segment name to its insight, ``by_term`` maps segment
+    words to insight positions, and ``by_drug`` (filled by ``link``) holds the
+    finished per-drug answer, so a lookup never scans the catalog.
+    """
+
+    def __init__(self, insights: list):
+        self.insights = insights
+        self.by_segment: dict[str, int] = {}
+        self.by_term: dict[str, list[int]] = {}
+        self.gap: list[float] = []
+        for pos, (segment, gap) in enumerate(zip(field_values(insights, "segment"), field_values(insights, "gap_score"))):
+            self.by_segment.setdefault(_norm(segment), pos)
+            for term in _terms(segment):
+                self.by_term.setdefault(term, []).append(pos)
+            self.gap.append(gap if isinstance(gap, (int, float)) else 0.0)
+        self.by_drug: dict[str, dict] = {}
+
+    def segments_for(self, indication: str) -> set[int]:
+        terms = _terms(indication)
+        for term in list(terms):
+            terms.update(AREA_TERMS.get(term, ()))
+        return {pos for term in terms for pos in self.by_term.get(term, ())}
+
+    def link(self, indications: dict[str, Iterable[str]]) -> None:
+        """Precompute the insight for every drug from the indications of its trials."""
+        per_indication: dict[str, set[int]] = {}
+        by_drug = {}
+        for drug, names in indications.items():
+            positions = set()
+            for name in names:
+                if name not in per_indication:
+                    per_indication[name] = self.segments_for(name)
+                positions |= per_indication[name]
+            if not positions:
+                continue
+            ranked = sorted(positions, key=lambda pos: (-self.gap[pos], pos))
+            insight = dict(self.insights[ranked[0]])
+            insight["related_segments"] = [
+                {"segment": self.insights[pos].get("segment"), "gap_score": self.insights[pos].get("gap_score")}
+                for pos in ranked[1:1 + RELATED_SEGMENTS]]
+            by_drug[drug] = insight
+        self.by_drug = by_drug
 
 
 class MarketAgent:
-    """Reads market_data.json and returns simple market insights."""
+    """Reads market_data.json and returns simple market insights.
+
+    Linked to the trial indications of each drug (``link``), it answers a drug
+    query with the highest-gap segment among that drug's therapeutic areas.
+    """
 
-    def __init__(self, data_path: str | Path | None = None):
+    def __init__(self, data_path: str | Path | None = None, lexicon: DrugLexicon | None = None):
         base = Path(__file__).parents[1]
         self.data_path = Path(data_path) if data_path else base / "data" / "market_data.json"
+        self.lexicon = lexicon if lexicon is not None else DrugLexicon.load()
         self.data = {}
+        self._index = MarketIndex([])
+        self._indications: dict = {}
         self._load()
 
+    def _read(self) -> tuple[dict, MarketIndex]:
+        with METRICS.timer("pharma_dataset_load_seconds", dataset="market"):
+            insights = load_records(self.data_path, "market_insights", [])
+            # Handle both old format (single dict) and new format (array)
+            index = MarketIndex([insights] if isinstance(insights, dict) else insights)
+            index.link(self._indications)
+        METRICS.set_gauge("pharma_dataset_records", len(insights) if isinstance(insights, list) else 1, dataset="market")
+        return {"market_insights": insights}, index
+
     def _load(self):
+        self.version = file_fingerprint(resolve_source(self.data_path))
         try:
-            with open(self.data_path, "r", encoding="utf-8") as fh:
-                self.data = json.load(fh)
+            self.data, self._index = self._read()
         except Exception:
-            self.data = {}
-
-    def get_market_insight(self, segment: str | None = None):
-        insights = self.data.get("market_insights", [])
-        
-        # Handle both old format (single dict) and new format (array)
-        if isinstance(insights, dict):
-            insights = [insights]
-        
-        if not segment:
-            # Return first insight if no segment specified
-            return insights[0] if insights else {}
-        
-        # Search for matching segment
-        for insight in insights:
-            if insight.get("segment", "").lower() == segment.lower():
+            self.data, self._index = {}, MarketIndex([])
+
+    def reload(self):
+        """Replace ``data`` with a fresh read of the file; raises (leaving ``data`` alone) on failure."""
+        version = file_fingerprint(resolve_source(self.data_path))
+        self.data, self._index = self._read()
+        self.version = version
+
+    def link(self, indications: dict[str, Iterable[str]]) -> None:
+        """Map drugs to segments; ``indications`` is keyed like ``ClinicalAgent.indications``."""
+        self._indications = indications
+        self._index.link(indications)
+
+    def insight_for_drug(self, drug: str) -> dict | None:
+        """Top segment linked to ``drug`` through its trial indications, or None."""
+        return self._index.by_drug.get(self.lexicon.resolve(drug) or self.lexicon.key(drug))
+
+    def get_market_insight(self, segment: str | None = None, drug: str | None = None):
+        index = self._index
+        insights = index.insights
+
+        if segment:
+            pos = index.by_segment.get(_norm(segment))
+            if pos is not None:
+                return insights[pos]
+            # If no match found, return first with a note
+            if insights:
+                mi = insights[0].copy()
+                mi["note"] = f"Requested segment '{segment}' not found; returning '{mi.get('segment', 'default')}'."
+                return mi
+            return {}
+
+        if drug:
+            insight = self.insight_for_drug(drug)
+            if insight is not None:
                 return insight
-        
-        # If no match found, return first with a note
-        if insights:
-            mi = insights[0].copy()
-            mi["note"] = f"Requested segment '{segment}' not found; returning '{mi.get('segment', 'default')}'."
-            return mi
-        
-        return {}
+
+        # Return first insight if no segment matched
+        return insights[0] if insights else {}
 
 
 if __name__ == "__main__":
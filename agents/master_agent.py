@@ -1,42 +1,469 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait as wait_futures
+from pathlib import Path
+import logging
+import threading
+import time
+
 from .clinical_agent import ClinicalAgent
+from .drug_lexicon import DrugLexicon
 from .patent_agent import PatentAgent
+from .precompute import AnalysisStore
 from .market_agent import MarketAgent
 from .webintel_agent import WebIntelAgent
+from .metrics import METRICS
 from .report_agent import ReportAgent
+from .report_jobs import ReportJobQueue
+from .reloader import DatasetWatcher
+from .result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = Path(__file__).parents[1] / "outputs" / "index"
 
 
 class MasterAgent:
-    """Orchestrates sub-agents to create a combined analysis and report."""
-
-    def __init__(self):
-        self.clinical = ClinicalAgent()
-        self.patent = PatentAgent()
-        self.market = MarketAgent()
-        self.web = WebIntelAgent()
-        self.reporter = ReportAgent()
-
-    def analyze(self, drug_name: str) -> dict:
-        clinical_summary = self.clinical.summarize_trials(drug_name)
-        patent_assess = self.patent.assess_opportunity(drug_name)
-        market_insight = self.market.get_market_insight()
-        literature = self.web.summarize_for_drug(drug_name)
-
-        conclusion = (
+    """Orchestrates sub-agents to create a combined analysis and report.
+
+    With ``concurrent=True`` the four data agents run in parallel on a shared
+    thread pool, so latency tracks the slowest agent instead of the sum. Each
+    agent gets its own deadline (``agent_timeout`` seconds, or a per-agent dict);
+    an agent that times out or raises contributes an empty section and is
+    listed under ``"errors"`` in the result instead of failing the request.
+    Deadlines start when the agents are submitted, so the pool holds
+    ``request_threads`` (the server's request threads) times four threads:
+    concurrent requests never leave an agent queued behind another request's.
+
+    Complete results are cached (LRU with a TTL) under the normalized drug name
+    and the versions of the loaded datasets, so repeat analyses skip the agents
+    and the PDF render until a data file changes or the entry expires. On a
+    miss, sections written by ``agents.precompute`` for the current data are
+    used before falling back to the agents.
+
+    ``data_dir`` points all four agents at another set of data files (same
+    names as ``data/``), ``db_path`` at one database imported with
+    ``agents.sqlite_store``, ``report_dir`` redirects the PDFs and
+    ``analyses_path`` the precomputed analyses (``<index dir>/analyses.db``).
+    """
+
+    AGENTS = ("clinical", "patent", "market", "literature")
+    SECTIONS = {"clinical": "Clinical Trials Summary", "patent": "Patent Landscape",
+                "market": "Market Insight", "literature": "Literature Synthesis"}
+
+    def __init__(self, concurrent: bool = False, agent_timeout: float | dict | None = 10.0,
+                 cache_size: int = 256, cache_ttl: float | None = 3600.0, report_workers: int = 2,
+                 data_dir: str | Path | None = None, report_dir: str | Path | None = None,
+                 db_path: str | Path | None = None, analyses_path: str | Path | None = None,
+                 request_threads: int = 1):
+        data = Path(data_dir) if data_dir else None
+        index_dir = data / "index" if data else INDEX_DIR
+
+        def source(filename: str) -> Path | None:
+            if db_path:
+                return Path(db_path)
+            return data / filename if data else None
+
+        # one lexicon, so drug names seen in the trials also resolve for patents and literature
+        self.lexicon = DrugLexicon.load(data / "drug_synonyms.json" if data else None)
+        self.clinical = ClinicalAgent(source("clinical_trials.json"), lexicon=self.lexicon)
+        self.patent = PatentAgent(source("patents.json"), lexicon=self.lexicon)
+        self.market = MarketAgent(source("market_data.json"), lexicon=self.lexicon)
+        self.market.link(self.clinical.indications)
+        self.web = WebIntelAgent(source("literature_samples.json"),
+                                 index_path=index_dir / "literature.bm25.json", lexicon=self.lexicon)
+        self.analyses = AnalysisStore(analyses_path or index_dir / "analyses.db")
+        self.reporter = ReportAgent(report_dir)
+        self.concurrent = concurrent
+        self.agent_timeout = agent_timeout
+        self.request_threads = request_threads
+        self._executor = None
+        self.cache = ResultCache(maxsize=cache_size, ttl=cache_ttl)
+        self._leaderboard = None
+        self._leaderboard_lock = threading.Lock()
+        self.report_jobs = ReportJobQueue(self.reporter.out_dir, max_workers=report_workers)
+        self.watcher = DatasetWatcher({"clinical": self.clinical, "patent": self.patent,
+                                       "market": self.market, "literature": self.web},
+                                      on_reload=self._on_reload)
+
+    def _on_reload(self, names: list) -> None:
+        # the market agent re-links itself on its own reload, not on new trials
+        if "clinical" in names:
+            self.market.link(self.clinical.indications)
+        if self._leaderboard is not None:  # only once someone has asked for one
+            self._rebuild_leaderboard()
+
+    def reload(self) -> list[str]:
+        """Reload any dataset whose file changed since it was loaded; returns their names."""
+        return self.watcher.check()
+
+    def start_watching(self, interval: float = 5.0) -> None:
+        """Poll the data files in the background and hot-swap changed datasets."""
+        self.watcher.interval = interval
+        self.watcher.start()
+
+    def after_fork(self, watch_interval: float | None = None) -> None:
+        """Reset per-process state in a freshly forked worker.
+
+        Pools and the watcher thread do not survive ``fork``; dropping them lets
+        the worker create its own on first use while it keeps sharing the
+        preloaded datasets with its parent. Pass ``watch_interval`` to start
+        this worker's dataset watcher.
+        """
+        self._executor = None
+        self.report_jobs._executor = None
+        if watch_interval:
+            self.start_watching(watch_interval)
+
+    def data_version(self) -> tuple:
+        return (self.clinical.version, self.patent.version, self.market.version, self.web.version)
+
+    def leaderboard(self):
+        """The cross-drug ``Leaderboard``.
+
+        Only the first call builds it on the caller's thread. After a dataset
+        change the watcher rebuilds it in ``on_reload``; a caller that still
+        finds it out of date (data reloaded outside the watcher) starts a
+        background rebuild. Either way the previous board is served until the
+        new one is ready.
+        """
+        board = self._leaderboard
+        if board is None:
+            return self._build_leaderboard()
+        if board.version != self.data_version() and not self._leaderboard_lock.locked():
+            threading.Thread(target=self._rebuild_leaderboard, name="leaderboard", daemon=True).start()
+        return board
+
+    def _build_leaderboard(self):
+        from .leaderboard import Leaderboard  # numpy stays out of the import path until it is needed
+        with self._leaderboard_lock:  # one build at a time; a caller that waited reuses its result
+            board = self._leaderboard
+            if board is None or board.version != self.data_version():
+                board = self._leaderboard = Leaderboard.build(self)
+            return board
+
+    def _rebuild_leaderboard(self) -> None:
+        try:
+            self._build_leaderboard()
+        except Exception:
+            logger.exception("Rebuilding the leaderboard failed; serving the previous one")
+
+    def _cache_key(self, drug_name: str) -> tuple:
+        return (drug_name.strip().lower(), self.data_version())
+
+    def _precomputed(self, drug_name: str) -> dict | None:
+        if drug_name not in self.lexicon:  # every precomputed drug is; a typo is never matched to one here
+            return None
+        entry = self.analyses.get(self.lexicon.key(drug_name), self.data_version())
+        if entry is None:
+            return None
+        name, sections = entry
+        return sections if name == drug_name else self._renamed(sections, name, drug_name)
+
+    @classmethod
+    def _renamed(cls, sections: dict, name: str, drug_name: str) -> dict:
+        """Sections computed for ``name``, with ``drug_name`` wherever a live analysis echoes the query."""
+        for agent in ("clinical", "patent"):
+            section = sections.get(cls.SECTIONS[agent])
+            if isinstance(section, dict) and "drug" in section:
+                sections[cls.SECTIONS[agent]] = {**section, "drug": drug_name}
+        literature = sections.get(cls.SECTIONS["literature"])
+        if isinstance(literature, str):
+            sections[cls.SECTIONS["literature"]] = literature.replace(name, drug_name)
+        sections["Conclusion"] = cls._conclusion(drug_name, sections[cls.SECTIONS["patent"]] or {},
+                                                 sections[cls.SECTIONS["market"]] or {})
+        return sections
+
+    def _resolved_as(self, drug_name: str) -> dict:
+        """``{"resolved_as": name}`` when ``drug_name`` was only fuzzily matched to a known drug."""
+        if drug_name in self.lexicon:
+            return {}
+        key = self.lexicon.resolve(drug_name)
+        return {} if key is None else {"resolved_as": self.lexicon.display(key)}
+
+    def compute_sections(self, drug_name: str) -> dict:
+        """Run every agent in turn and build the report sections; exceptions propagate."""
+        calls = self._calls(drug_name)
+        return self._build_sections(drug_name, {name: call()[0] for name, call in calls.items()})
+
+    def _calls(self, drug_name: str) -> dict:
+        calls = {
+            "clinical": lambda: self.clinical.summarize_trials(drug_name),
+            "patent": lambda: self.patent.assess_opportunity(drug_name),
+            "market": lambda: self.market.get_market_insight(drug=drug_name),
+            "literature": lambda: self.web.summarize_for_drug(drug_name),
+        }
+        return {name: self._timed(name, call) for name, call in calls.items()}
+
+    @staticmethod
+    def _timed(name: str, call):
+        """Wrap an agent call so it returns ``(value, elapsed_ms)`` and feeds the metrics."""
+        def run():
+            timing = {}
+            with METRICS.timer("pharma_agent_call_seconds", sink=timing, sink_key=name, agent=name):
+                value = call()
+            return value, timing[name]
+        return run
+
+    def _timeout_for(self, name: str) -> float | None:
+        if isinstance(self.agent_timeout, dict):
+            return self.agent_timeout.get(name)
+        return self.agent_timeout
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # created lazily so a MasterAgent built before a fork never shares threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.AGENTS) * self.request_threads,
+                                                thread_name_prefix="agent")
+        return self._executor
+
+    def _run_sequential(self, drug_name: str) -> tuple[dict, dict, dict]:
+        results, timings = {}, {}
+        for name, call in self._calls(drug_name).items():
+            results[name], timings[name] = call()
+        return results, {}, timings
+
+    def _run_concurrent(self, drug_name: str) -> tuple[dict, dict, dict]:
+        pool = self._pool()
+        started = time.monotonic()
+        futures = {name: pool.submit(call) for name, call in self._calls(drug_name).items()}
+        results, errors, timings = {}, {}, {}
+        for name, fut in futures.items():
+            timeout = self._timeout_for(name)
+            remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+            try:
+                results[name], timings[name] = fut.result(timeout=remaining)
+            except FutureTimeout:
+                fut.cancel()
+                results[name] = {}
+                errors[name] = f"timed out after {timeout}s"
+            except Exception as exc:
+                results[name] = {}
+                errors[name] = f"{type(exc).__name__}: {exc}"
+        return results, errors, timings
+
+    def _iter_results(self, drug_name: str):
+        """Yield ``(agent, value, elapsed_ms, error)`` in the order the agents finish.
+
+        Same deadlines as ``_run_concurrent``; a failed or timed-out agent yields
+        ``{}`` with its error. Without ``concurrent`` the agents run in turn.
+        """
+        calls = self._calls(drug_name)
+        if not self.concurrent:
+            for name, call in calls.items():
+                try:
+                    value, ms = call()
+                    yield name, value, ms, None
+                except Exception as exc:
+                    yield name, {}, None, f"{type(exc).__name__}: {exc}"
+            return
+        pool = self._pool()
+        started = time.monotonic()
+        futures = {pool.submit(call): name for name, call in calls.items()}
+        deadlines = {fut: None if self._timeout_for(name) is None else started + self._timeout_for(name)
+                     for fut, name in futures.items()}
+        pending = set(futures)
+        while pending:
+            upcoming = [deadlines[fut] for fut in pending if deadlines[fut] is not None]
+            timeout = max(0.0, min(upcoming) - time.monotonic()) if upcoming else None
+            done, pending = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    value, ms = fut.result()
+                    yield futures[fut], value, ms, None
+                except Exception as exc:
+                    yield futures[fut], {}, None, f"{type(exc).__name__}: {exc}"
+            now = time.monotonic()
+            for fut in [f for f in pending if deadlines[f] is not None and deadlines[f] <= now]:
+                fut.cancel()
+                pending.discard(fut)
+                yield futures[fut], {}, None, f"timed out after {self._timeout_for(futures[fut])}s"
+
+    def _render(self, drug_name: str, sections: dict, async_report: bool, timings: dict | None = None) -> dict:
+        title = f"{drug_name} — Oncology Repurposing Potential"
+        if async_report:
+            return {"report_path": None, "report_job": self.report_jobs.submit(title, sections)}
+        stages = {}
+        path = self.reporter.generate_pdf(title, sections, timings=stages)
+        METRICS.observe_ms("pharma_report_stage_seconds", stages, "stage")
+        if timings is not None:
+            timings["report"] = stages
+        return {"report_path": str(path)}
+
+    def _cached_report(self, cached: dict, async_report: bool) -> dict | None:
+        """Report fields for a cache hit, or None when the report must be rendered again."""
+        path = cached.get("report_path")
+        if path and Path(path).exists():
+            return {"report_path": path}
+        job_id = cached.get("report_job")
+        job = self.report_jobs.status(job_id) if job_id else None
+        if job and job["status"] in ("pending", "running"):
+            if async_report:
+                return {"report_path": None, "report_job": job_id}
+            job = self.report_jobs.wait(job_id)
+        if job and job["status"] == "done" and Path(job["report_path"]).exists():
+            return {"report_path": job["report_path"]}
+        return None
+
+    def analyze(self, drug_name: str, async_report: bool = False, timings: bool = False) -> dict:
+        """Run every agent for ``drug_name`` and render its report.
+
+        With ``async_report=True`` the PDF is queued on ``report_jobs`` and the
+        result carries ``report_job`` (poll ``report_jobs.status``) instead of a path.
+        With ``timings=True`` the result includes a per-stage breakdown in ms.
+        A misspelled name also gets ``resolved_as``: the drug it was matched to.
+        """
+        started = time.perf_counter()
+        result = {**self._analyze(drug_name, async_report, timings), **self._resolved_as(drug_name)}
+        METRICS.observe("pharma_analysis_seconds", time.perf_counter() - started,
+                        cached=str(bool(result.get("cached"))).lower())
+        if timings:
+            result["timings"]["total"] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    def _analyze(self, drug_name: str, async_report: bool, timings: bool) -> dict:
+        key = self._cache_key(drug_name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**self._from_cache(key, cached, async_report), "cached": True,
+                    **({"timings": {}} if timings else {})}
+
+        sections = self._precomputed(drug_name)
+        if sections is not None:
+            errors, agent_timings = {}, {}
+        else:
+            run = self._run_concurrent if self.concurrent else self._run_sequential
+            results, errors, agent_timings = run(drug_name)
+            sections = self._build_sections(drug_name, results)
+
+        result = {"drug": drug_name, "sections": sections,
+                  **self._render(drug_name, sections, async_report, agent_timings)}
+        if errors:
+            result["errors"] = errors
+        else:
+            self.cache.put(key, dict(result))
+        if timings:
+            result["timings"] = agent_timings
+        return result
+
+    def _from_cache(self, key: tuple, cached: dict, async_report: bool) -> dict:
+        report = self._cached_report(cached, async_report)
+        if report is None:
+            report = self._render(cached["drug"], cached["sections"], async_report)
+        entry = {"drug": cached["drug"], "sections": cached["sections"], **report}
+        if report.keys() != {"report_path"} or report["report_path"] != cached.get("report_path"):
+            self.cache.put(key, entry)
+        return entry
+
+    def analyze_stream(self, drug_name: str, async_report: bool = True):
+        """Yield the analysis of ``drug_name`` as a sequence of events.
+
+        Each agent's section is yielded as soon as that agent finishes
+        (``{"event": "section", "agent", "title", "data"}``, or ``"error"``),
+        followed by the conclusion, the report fields and a final ``done``
+        event. A cached or precomputed analysis replays its sections straight away.
+        """
+        started = time.perf_counter()
+        key = self._cache_key(drug_name)
+        cached = self.cache.get(key)
+        entry = None
+        if cached is not None:
+            entry = self._from_cache(key, cached, async_report)
+        elif (sections := self._precomputed(drug_name)) is not None:
+            entry = {"drug": drug_name, "sections": sections, **self._render(drug_name, sections, async_report)}
+            self.cache.put(key, entry)
+        if entry is not None:
+            for agent, title in self.SECTIONS.items():
+                yield {"event": "section", "agent": agent, "title": title, "data": entry["sections"][title]}
+            yield {"event": "conclusion", "title": "Conclusion", "data": entry["sections"]["Conclusion"]}
+            yield {"event": "report", "report_path": entry["report_path"], "report_job": entry.get("report_job")}
+            hit = str(cached is not None).lower()
+            METRICS.observe("pharma_analysis_seconds", time.perf_counter() - started, cached=hit)
+            yield {"event": "done", "drug": entry["drug"], "cached": cached is not None,
+                   **self._resolved_as(drug_name)}
+            return
+
+        results, errors, timings = {}, {}, {}
+        for agent, value, ms, error in self._iter_results(drug_name):
+            results[agent] = value
+            if error:
+                errors[agent] = error
+                yield {"event": "error", "agent": agent, "error": error}
+            else:
+                timings[agent] = ms
+                yield {"event": "section", "agent": agent, "title": self.SECTIONS[agent],
+                       "data": self._section(agent, value)}
+        sections = self._build_sections(drug_name, results)
+        yield {"event": "conclusion", "title": "Conclusion", "data": sections["Conclusion"]}
+
+        report = self._render(drug_name, sections, async_report, timings)
+        yield {"event": "report", "report_job": None, **report}
+        if not errors:
+            self.cache.put(key, {"drug": drug_name, "sections": sections, **report})
+        METRICS.observe("pharma_analysis_seconds", time.perf_counter() - started, cached="false")
+        done = {"event": "done", "drug": drug_name, "cached": False, "timings": timings,
+                **self._resolved_as(drug_name)}
+        if errors:
+            done["errors"] = errors
+        yield done
+
+    @staticmethod
+    def _section(agent: str, value: dict):
+        # the literature section is just the synthesized summary text
+        return value.get("summary") if agent == "literature" else value
+
+    @staticmethod
+    def _conclusion(drug_name: str, patent_assess: dict, market_insight: dict) -> str:
+        return (
             f"{drug_name} shows signals from preclinical and epidemiology; clinical trials exist in oncology-related indications. "
             f"Patent coverage appears {patent_assess.get('opportunity')}. Market gap score: {market_insight.get('gap_score')}"
         )
 
-        sections = {
-            "Clinical Trials Summary": clinical_summary,
-            "Patent Landscape": patent_assess,
-            "Market Insight": market_insight,
-            "Literature Synthesis": literature.get("summary"),
-            "Conclusion": conclusion,
-        }
+    @classmethod
+    def _build_sections(cls, drug_name: str, results: dict) -> dict:
+        sections = {cls.SECTIONS[agent]: cls._section(agent, results[agent]) for agent in cls.AGENTS}
+        sections["Conclusion"] = cls._conclusion(drug_name, results["patent"], results["market"])
+        return sections
+
+    def analyze_many(self, drugs, reports: bool = False, async_report: bool = True):
+        """Yield one analysis per drug, in input order, as each is computed.
+
+        Names sharing a cache key are looked up once, and each lookup goes
+        through the result cache and the precomputed store like ``analyze``,
+        with the agents run in parallel when ``concurrent`` is set. PDFs are
+        only produced with ``reports=True``. A drug whose lookup raises yields
+        ``{"drug": ..., "error": ...}`` and the batch carries on; with
+        ``concurrent`` a failing agent is reported under ``errors`` instead.
+        """
+        entries: dict[tuple, dict] = {}
+        for drug_name in drugs:
+            try:
+                key = self._cache_key(drug_name)
+                if key not in entries:
+                    entries[key] = self._batch_entry(key, drug_name, reports, async_report)
+                result = {**entries[key], "drug": drug_name, **self._resolved_as(drug_name)}
+            except Exception as exc:
+                result = {"drug": drug_name, "error": f"{type(exc).__name__}: {exc}"}
+            yield result
 
-        report_path = self.reporter.generate_pdf(f"{drug_name} — Oncology Repurposing Potential", sections)
+    def _batch_entry(self, key: tuple, drug_name: str, reports: bool, async_report: bool) -> dict:
+        cached = self.cache.get(key)
+        if cached is not None:
+            if reports:
+                return self._from_cache(key, cached, async_report)
+            return {"drug": cached["drug"], "sections": cached["sections"]}
 
-        return {"drug": drug_name, "sections": sections, "report_path": str(report_path)}
+        errors = {}
+        sections = self._precomputed(drug_name)
+        if sections is None:
+            run = self._run_concurrent if self.concurrent else self._run_sequential
+            results, errors, _ = run(drug_name)
+            sections = self._build_sections(drug_name, results)
+        entry = {"drug": drug_name, "sections": sections}
+        if reports:
+            entry.update(self._render(drug_name, sections, async_report))
+        if errors:
+            return {**entry, "errors": errors}
+        self.cache.put(key, dict(entry))
+        return entry
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Process-local histograms, counters and gauges in the Prometheus text format.
+
+    ``timer`` is the usual entry point: it observes the duration of its block into
+    a histogram and can also copy it (in milliseconds) into a per-request dict.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: dict[str, dict[tuple, list]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._gauges: dict[str, dict[tuple, float]] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe_ms(self, name: str, timings: dict, label: str) -> None:
+        """Observe a ``{label value: milliseconds}`` breakdown, one series per key."""
+        for key, ms in timings.items():
+            self.observe(name, ms / 1000, **{label: key})
+
+    @contextmanager
+    def timer(self, name: str, sink: dict | None = None, sink_key: str | None = None, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(name, elapsed, **labels)
+            if sink is not None:
+                sink[sink_key or name] = round(elapsed * 1000, 3)
+
+    def summary(self, name: str, **labels) -> dict | None:
+        """``{"count", "sum"}`` of one histogram series, or None if never observed."""
+        with self._lock:
+            hist = self._histograms.get(name, {}).get(_label_key(labels))
+            return None if hist is None else {"count": hist[-1], "sum": hist[-2]}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(families.items()):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    for bound, count in zip(self.buckets, hist):
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {hist[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist[-2]}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("pharma_analysis_seconds", "End-to-end MasterAgent.analyze latency.")
+METRICS.describe("pharma_agent_call_seconds", "Time spent in each sub-agent call of an analysis.")
+METRICS.describe("pharma_report_stage_seconds", "Time spent in each PDF report stage.")
+METRICS.describe("pharma_dataset_load_seconds", "Time to load and index a dataset.")
+METRICS.describe("pharma_dataset_records", "Records in the currently loaded dataset.")
+METRICS.describe("pharma_http_request_seconds", "Flask request latency by endpoint.")
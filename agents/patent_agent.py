@@ -1,32 +1,218 @@
-import json
+import re
 from pathlib import Path
 
+from .datastore import field_values, file_fingerprint, load_records, resolve_source
+from .deltas import DeltaLog, Overlay, current_version, merge_positions, version as delta_version
+from .drug_lexicon import DrugLexicon
+from .metrics import METRICS
+from .sqlite_store import SqliteStore, fts_phrase, is_sqlite
+
+NGRAM = 3
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _text(title: str | None, claims: str | None) -> str:
+    return ((title or "") + " " + (claims or "")).lower()
+
+
+def _name_pattern(words: list[str]) -> re.Pattern:
+    # whole words, separated by any run of punctuation or spaces
+    return re.compile(r"(?<![a-z0-9])" + r"[^a-z0-9]+".join(map(re.escape, words)) + r"(?![a-z0-9])")
+
+
+class PatentIndex:
+    """Lowercased search text per patent plus a trigram -> positions index.
+
+    A query of at least ``NGRAM`` characters only verifies the patents listed
+    under its rarest trigram, which gives the same matches as a substring scan
+    over ``title + " " + claims_summary`` without touching the rest of the corpus.
+    """
+
+    def __init__(self, patents: list):
+        self.patents = patents
+        columns = zip(field_values(patents, "title"), field_values(patents, "claims_summary"))
+        self.texts = [_text(title, claims) for title, claims in columns]
+        self.grams: dict[str, list[int]] = {}
+        self._slots: dict[str, int] | None = None
+        for pos, text in enumerate(self.texts):
+            for gram in _ngrams(text):
+                self.grams.setdefault(gram, []).append(pos)
+
+    def apply(self, ops) -> None:
+        """Apply change-log operations (see ``agents.deltas``) to the patents and trigram index.
+
+        A deleted patent keeps its slot with empty text. Postings are never
+        pruned, since a stale entry only costs one failed text check. New slots
+        go at the end of their (sorted) postings in place; grams an edit adds to
+        an existing slot are merged into copies once per batch.
+        """
+        if not isinstance(self.patents, Overlay):
+            self.patents = Overlay(self.patents)
+        if self._slots is None:
+            self._slots = {key: pos for pos, key in enumerate(field_values(self.patents.base, "patent_id"))
+                           if key is not None}
+        edits: dict[str, dict[int, bool]] = {}
+        for op, key, record in ops:
+            pos = self._slots.get(key)
+            if op == "delete":
+                if pos is not None:
+                    self.texts[pos] = ""
+                    self.patents.set(pos, None)
+                    del self._slots[key]
+                continue
+            text = _text(record.get("title"), record.get("claims_summary"))
+            if pos is None:
+                # record first: a short query scans range(len(self.texts))
+                pos = self._slots[key] = self.patents.append(record)
+                self.texts.append(text)
+                for gram in _ngrams(text):
+                    self.grams.setdefault(gram, []).append(pos)
+                continue
+            for gram in _ngrams(text) - _ngrams(self.texts[pos]):
+                edits.setdefault(gram, {})[pos] = True
+            self.texts[pos] = text
+            self.patents.set(pos, record)
+        for gram, changes in edits.items():
+            self.grams[gram] = merge_positions(self.grams.get(gram, []), changes)
+
+    def candidates(self, query: str):
+        if len(query) < NGRAM:
+            return range(len(self.texts))
+        postings = [self.grams.get(gram) for gram in _ngrams(query)]
+        if not all(postings):
+            return ()
+        return min(postings, key=len)
+
+    def search(self, query: str) -> list:
+        query = query.lower()
+        hits = (self.patents[pos] for pos in self.candidates(query) if query in self.texts[pos])
+        return [patent for patent in hits if patent is not None]
+
+    def search_names(self, names) -> list:
+        """Patents mentioning any of ``names`` (normalized drug names) as whole words.
+
+        Word boundaries keep a short alias such as "asa" from matching inside
+        other words, and any run of punctuation may separate the words of a name.
+        """
+        hits = set()
+        for name in names:
+            words = name.split()
+            pattern = _name_pattern(words)
+            postings = [range(len(self.texts)) if len(word) < NGRAM else self.candidates(word) for word in words]
+            hits.update(pos for pos in min(postings, key=len) if pattern.search(self.texts[pos]))
+        return [self.patents[pos] for pos in sorted(hits)]
+
+
+class SqlitePatentIndex:
+    """``PatentIndex`` searches answered by the FTS5 trigram index of a SQLite database.
+
+    The trigram index narrows a query to the patents containing it, and the
+    stored lowercased text confirms each match exactly as the in-memory scan would.
+    """
+
+    def __init__(self, store: SqliteStore):
+        self.store = store
+        self.patents = store.rows("patents")
+
+    def _texts(self, term: str) -> list[tuple[int, str]]:
+        if len(term) < NGRAM:
+            return self.store.query("SELECT rowid, text FROM patents_fts ORDER BY rowid")
+        return self.store.query("SELECT rowid, text FROM patents_fts WHERE patents_fts MATCH ? ORDER BY rowid",
+                                (fts_phrase(term),))
+
+    def search(self, query: str) -> list:
+        query = query.lower()
+        return self.patents.many(pos for pos, text in self._texts(query) if query in text)
+
+    def search_names(self, names) -> list:
+        hits = set()
+        for name in names:
+            words = name.split()
+            pattern = _name_pattern(words)
+            hits.update(pos for pos, text in self._texts(max(words, key=len)) if pattern.search(text))
+        return self.patents.many(sorted(hits))
+
 
 class PatentAgent:
-    """Simple patent landscape agent that inspects mock patents.json."""
+    """Simple patent landscape agent that inspects mock patents.json (or a SQLite import of it).
+
+    Changes in ``patents.delta.ndjson`` are applied on load and by ``refresh``.
+    """
 
-    def __init__(self, data_path: str | Path | None = None):
+    def __init__(self, data_path: str | Path | None = None, lexicon: DrugLexicon | None = None):
         base = Path(__file__).parents[1]
         self.data_path = Path(data_path) if data_path else base / "data" / "patents.json"
-        self.patents = []
+        self.lexicon = lexicon if lexicon is not None else DrugLexicon.load()
+        self.deltas = None if is_sqlite(self.data_path) else DeltaLog.beside(self.data_path, "patent_id")
+        self._index = PatentIndex([])
         self._load()
 
+    @property
+    def patents(self) -> list:
+        patents = self._index.patents
+        return patents.live() if isinstance(patents, Overlay) else patents
+
+    def _read(self) -> tuple[PatentIndex | SqlitePatentIndex, tuple[str, int]]:
+        applied = ("", 0)
+        with METRICS.timer("pharma_dataset_load_seconds", dataset="patents"):
+            if is_sqlite(self.data_path):
+                index = SqlitePatentIndex(SqliteStore(self.data_path))
+            else:
+                index = PatentIndex(load_records(self.data_path, "patents", []))
+                generation = self.deltas.generation()
+                ops, offset = self.deltas.read()
+                applied = (generation, offset)
+                if ops:
+                    index.apply(ops)
+        METRICS.set_gauge("pharma_dataset_records", len(index.patents), dataset="patents")
+        return index, applied
+
+    def _version(self, base: str, applied: tuple[str, int]) -> str:
+        return base if self.deltas is None else delta_version(base, applied)
+
     def _load(self):
+        self._base = file_fingerprint(resolve_source(self.data_path))
         try:
-            with open(self.data_path, "r", encoding="utf-8") as fh:
-                payload = json.load(fh)
-                self.patents = payload.get("patents", [])
+            self._index, self._applied = self._read()
         except Exception:
-            self.patents = []
+            self._index, self._applied = PatentIndex([]), ("", 0)
+        self.version = self._version(self._base, self._applied)
+
+    def current_version(self) -> str:
+        return current_version(self.data_path, self.deltas)
+
+    def reload(self):
+        """Re-read patents.json and swap in a new PatentIndex; raises (keeping the old one) on failure."""
+        base = file_fingerprint(resolve_source(self.data_path))
+        self._index, applied = self._read()
+        self._base, self._applied = base, applied
+        self.version = self._version(base, applied)
+
+    def refresh(self):
+        """Apply new lines of the change log in place, or ``reload`` if patents.json itself changed."""
+        base = file_fingerprint(resolve_source(self.data_path))
+        if self.deltas is None or base != self._base:
+            return self.reload()
+        generation, size = self.deltas.position()
+        applied_generation, offset = self._applied
+        if generation != applied_generation or size < offset:
+            return self.reload()  # compacted: the offset belongs to the old log
+        ops, offset = self.deltas.read(offset)
+        if ops:
+            self._index.apply(ops)
+        applied = self._applied = (generation, offset)
+        self.version = self._version(base, applied)
 
     def search_patents_for_drug(self, drug_name: str):
-        # naive string match against title and claims
-        matches = []
-        for p in self.patents:
-            text = (p.get("title", "") + " " + p.get("claims_summary", "")).lower()
-            if drug_name.lower() in text:
-                matches.append(p)
-        return matches
+        # a drug the lexicon knows is matched by all of its names as whole words;
+        # anything else is a substring match against title and claims
+        key = self.lexicon.resolve(drug_name)
+        if key is not None:
+            return self._index.search_names(self.lexicon.aliases(key))
+        return self._index.search(drug_name)
 
     def assess_opportunity(self, drug_name: str):
         matches = self.search_patents_for_drug(drug_name)
@@ -0,0 +1,193 @@
+"""Materialized analyses for every drug the datasets know about.
+
+``python -m agents.precompute`` lists the drugs in the trials, plus those from
+the synonyms file that appear in the patents or literature, computes each
+one's report sections on a process pool and writes them to
+``outputs/index/analyses.db``. ``MasterAgent`` looks a drug up there before
+running its agents, so a precomputed drug costs one indexed read; drugs that
+are not in the store, or whose datasets have changed since the job ran, are
+computed live as before.
+
+Entries are keyed by the drug's lexicon key and the agents' data version, so
+every synonym of a drug finds the same entry, and the sections are stored as
+zlib-compressed JSON together with the name they were computed for. The
+master only looks up names the lexicon holds exactly (never a fuzzy match)
+and puts the queried name back into the sections, as a live analysis would. Each run writes a fresh database and swaps it in with a
+rename, dropping entries for older data; running workers pick it up on their
+next lookup.
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .datastore import field_values, file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE analyses (
+    drug TEXT NOT NULL, version TEXT NOT NULL, name TEXT NOT NULL, sections BLOB NOT NULL,
+    PRIMARY KEY (drug, version)) WITHOUT ROWID;
+"""
+CHUNK = 16  # drugs per pool task
+
+_MASTER = None  # the MasterAgent of a pool worker
+
+
+def _version_key(version: tuple) -> str:
+    return json.dumps(list(version))
+
+
+class AnalysisStore:
+    """Read-only lookups in a database written by ``write_store``.
+
+    A missing file simply has no entries. Connections are per thread and per
+    process, and reopened when the file is replaced.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection | None:
+        local = self._local
+        stamp = (os.getpid(), file_fingerprint(self.path))
+        if getattr(local, "stamp", None) != stamp:
+            try:
+                local.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            except sqlite3.Error:
+                local.conn = None
+            local.stamp = stamp
+        return local.conn
+
+    def get(self, key: str, version: tuple) -> tuple[str, dict] | None:
+        """``(name, sections)`` precomputed for lexicon ``key`` at data ``version``, or None."""
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT name, sections FROM analyses WHERE drug = ? AND version = ?",
+                               (key, _version_key(version))).fetchone()
+        except sqlite3.Error:
+            return None
+        return None if row is None else (row[0], json.loads(zlib.decompress(row[1])))
+
+    def __len__(self) -> int:
+        conn = self._connection()
+        if conn is None:
+            return 0
+        try:
+            return conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+def write_store(path: str | Path, version: tuple, entries, lexicon) -> Path:
+    """Write ``(name, sections)`` pairs for data ``version`` to a new database at ``path``.
+
+    Each entry is stored under ``lexicon.key(name)``.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        version_key = _version_key(version)
+        conn.executemany("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)",
+                         ((lexicon.key(name), version_key, name, _pack(sections)) for name, sections in entries))
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp, path)
+    return path
+
+
+def _pack(sections: dict) -> bytes:
+    return zlib.compress(json.dumps(sections, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def known_drugs(master) -> list[str]:
+    """Names of the drugs in the trials, plus lexicon drugs found in the patents or literature.
+
+    Patents and articles carry no drug field, so a drug mentioned there is only
+    found if the lexicon (the synonyms file) knows its name.
+    """
+    lexicon = master.lexicon
+    in_trials = {lexicon.key(drug) for drug in field_values(master.clinical.trials, "drug") if drug}
+    names = []
+    for name in lexicon.names():
+        if (lexicon.key(name) in in_trials or master.patent.search_patents_for_drug(name)
+                or master.web.summarize_for_drug(name, limit=1)["count"]):
+            names.append(name)
+    return sorted(names, key=str.lower)
+
+
+def _init_worker(data_dir, db_path) -> None:
+    global _MASTER
+    if _MASTER is None:  # forked workers inherit the parent's loaded agents
+        from .master_agent import MasterAgent
+        _MASTER = MasterAgent(data_dir=data_dir, db_path=db_path)
+
+
+def _compute(names: list[str]) -> tuple[tuple, list[tuple[str, dict]]]:
+    entries = []
+    for name in names:
+        try:
+            entries.append((name, _MASTER.compute_sections(name)))
+        except Exception:
+            logger.exception("Precomputing %s failed; it will be analyzed live", name)
+    return _MASTER.data_version(), entries
+
+
+def precompute(out_path: str | Path | None = None, data_dir: str | Path | None = None,
+               db_path: str | Path | None = None, workers: int | None = None) -> tuple[Path, int]:
+    """Compute and store the sections of every known drug; returns the store path and entry count."""
+    global _MASTER
+    from .master_agent import MasterAgent
+    master = _MASTER = MasterAgent(data_dir=data_dir, db_path=db_path)
+    out_path = Path(out_path) if out_path else master.analyses.path
+    version = master.data_version()
+    names = known_drugs(master)
+    chunks = [names[i:i + CHUNK] for i in range(0, len(names), CHUNK)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        results = [_compute(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir, db_path)) as pool:
+            results = list(pool.map(_compute, chunks))
+    entries = []
+    for chunk_version, chunk in results:
+        if chunk_version != version:
+            logger.warning("Data changed during the run; skipping %d drug(s) computed on other data", len(chunk))
+            continue
+        entries.extend(chunk)
+    write_store(out_path, version, entries, master.lexicon)
+    return out_path, len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the analysis sections of every known drug.")
+    parser.add_argument("--out", help="store to write (default: outputs/index/analyses.db)")
+    parser.add_argument("--data-dir", help="directory with the dataset files (default: data/)")
+    parser.add_argument("--db", help="SQLite database built by agents.sqlite_store")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    path, count = precompute(args.out, args.data_dir, args.db, args.workers)
+    print(f"Wrote {count} analyses to {path} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
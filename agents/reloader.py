@@ -0,0 +1,73 @@
+import logging
+import threading
+from typing import Callable
+
+from .datastore import file_fingerprint, resolve_source
+
+logger = logging.getLogger(__name__)
+
+
+def _current_version(agent) -> str:
+    if hasattr(agent, "current_version"):
+        return agent.current_version()
+    return file_fingerprint(resolve_source(agent.data_path))
+
+
+class DatasetWatcher:
+    """Polls the agents' data files and hot-swaps any dataset whose file changed.
+
+    ``agents`` maps a name to an agent with ``data_path``, ``version`` and
+    ``reload()``. The rebuild runs on the watcher thread while requests keep
+    using the old data; the agent swaps the new state in with a single
+    assignment. A failed reload (e.g. a file caught mid-write) is logged and
+    retried on the next poll. Agents that follow a change log (see
+    ``agents.deltas``) report their target version with ``current_version()``
+    and catch up with ``refresh()``, which only applies the new log lines.
+    """
+
+    def __init__(self, agents: dict, interval: float = 5.0, on_reload: Callable[[list], None] | None = None):
+        self.agents = agents
+        self.interval = interval
+        self.on_reload = on_reload
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def stale(self) -> list[str]:
+        return [name for name, agent in self.agents.items() if _current_version(agent) != agent.version]
+
+    def check(self) -> list[str]:
+        """Reload every stale dataset now; returns the names that were swapped in."""
+        reloaded = []
+        with self._lock:
+            for name in self.stale():
+                try:
+                    agent = self.agents[name]
+                    getattr(agent, "refresh", agent.reload)()
+                    reloaded.append(name)
+                except Exception:
+                    logger.exception("Reloading %s dataset failed; keeping the current data", name)
+        if reloaded and self.on_reload:
+            self.on_reload(reloaded)
+        return reloaded
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dataset-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,89 @@
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .chart_cache import CHART_CACHE
+from .report_agent import ReportAgent
+
+# the warm agent of a pool worker process; None everywhere else
+_worker_agent: ReportAgent | None = None
+
+
+def _init_worker(out_dir: str, chart_dir: str | None = None) -> None:
+    global _worker_agent
+    CHART_CACHE.disk_dir = chart_dir
+    _worker_agent = ReportAgent(out_dir)
+    # one throwaway chart loads the Agg backend and the font cache up front
+    _worker_agent._render_chart(lambda ax: ax.bar(["warm-up"], [1]))
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def render_report(out_dir: str, title: str, sections: dict, filename: str | None = None,
+                  as_bytes: bool = False) -> tuple[str | bytes, dict]:
+    """Render one report; returns ``(path or PDF bytes, stage timings in ms)``.
+
+    Module-level so it pickles by reference. Inside a ``RenderPool`` worker it
+    reuses that worker's warm ``ReportAgent``; anywhere else it builds one.
+    """
+    if _worker_agent is not None and _worker_agent.out_dir == Path(out_dir):
+        agent = _worker_agent
+    else:
+        agent = ReportAgent(out_dir=out_dir)
+    timings = {}
+    if as_bytes:
+        return agent.render_pdf(title, sections, timings=timings), timings
+    return str(agent.generate_pdf(title, sections, filename, timings=timings)), timings
+
+
+class RenderPool(Executor):
+    """A process pool of warm PDF renderers.
+
+    reportlab and matplotlib are pure-Python-heavy and hold the GIL, so reports
+    only render in parallel across processes. Each worker builds its
+    ``ReportAgent`` (stylesheets, figure, backend) once when it starts rather
+    than per report; ``warm()`` starts them all ahead of the first request.
+    A crashed worker breaks the pool, which is then replaced on the next submit.
+    With ``chart_dir`` the workers share their rendered charts through it.
+    """
+
+    def __init__(self, out_dir: str | Path, workers: int | None = None, chart_dir: str | Path | None = None):
+        self.out_dir = str(out_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.chart_dir = str(chart_dir) if chart_dir else None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self, broken: ProcessPoolExecutor | None = None) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor is broken:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                     initargs=(self.out_dir, self.chart_dir))
+            return self._executor
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        pool = self._pool()
+        try:
+            return pool.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            return self._pool(broken=pool).submit(fn, *args, **kwargs)
+
+    def render(self, title: str, sections: dict, filename: str | None = None, as_bytes: bool = False) -> Future:
+        """Queue a report; the future resolves to ``(path or PDF bytes, timings)``."""
+        return self.submit(render_report, self.out_dir, title, sections, filename, as_bytes)
+
+    def warm(self, timeout: float | None = None) -> set[int]:
+        """Start and initialize the workers now; returns the pids that answered."""
+        futures = [self.submit(_worker_pid) for _ in range(self.workers)]
+        done, _ = wait_futures(futures, timeout=timeout)
+        return {fut.result() for fut in done}
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
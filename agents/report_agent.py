@@ -1,73 +1,185 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from pathlib import Path
 from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+import copy
+import io
 import json
+import os
+import threading
+import time
+
+from .chart_cache import CHART_CACHE, ChartCache
+from .report_store import ReportStore, report_key
+
+# reportlab and matplotlib take most of a second to import, so they are only
+# imported inside the functions that render; pick the headless backend now so
+# nothing that imports pyplot later tries to open a display
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+SECTION_HEADERS = {
+    'Clinical Trials Summary': "📊 Clinical Trials Summary",
+    'Patent Landscape': "⚖️ Patent Landscape",
+    'Market Insight': "💰 Market Insights",
+    'Literature Synthesis': "📚 Literature Synthesis",
+    'Conclusion': "🎯 Conclusion",
+}
+
+INCH = 72.0  # reportlab.lib.units.inch, in points
+TRIALS_TABLE_COLUMNS = [['Trial ID', 'Indication', 'Phase', 'Status']]
+TRIALS_TABLE_WIDTHS = [1.2*INCH, 2.5*INCH, 1*INCH, 1.3*INCH]
+
+
+@lru_cache(maxsize=1)
+def _trials_table_style():
+    # Table.setStyle only reads the commands, so one TableStyle serves every table
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+@lru_cache(maxsize=1)
+def _stylesheet():
+    """The sample stylesheet plus the report's custom styles, built once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.darkblue,
+        spaceAfter=30,
+        alignment=1  # Center
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.darkblue,
+        spaceAfter=12,
+        spaceBefore=20
+    ))
+    return styles
+
+
+@lru_cache(maxsize=None)
+def _section_header(section: str):
+    # parsed once; callers get a shallow copy because wrap() stores layout state on it
+    from reportlab.platypus import Paragraph
+
+    return Paragraph(SECTION_HEADERS[section], _stylesheet()['SectionHeader'])
+
+
+def preload() -> None:
+    """Import the rendering libraries and build the shared styles now.
+
+    For servers that fork: doing this once in the parent lets every child
+    share the loaded modules instead of importing them on its first report.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    from reportlab.platypus import SimpleDocTemplate  # noqa: F401
+
+    _stylesheet()
+    _trials_table_style()
+    for section in SECTION_HEADERS:
+        _section_header(section)
+
+
+@contextmanager
+def _stage(timings: dict | None, name: str):
+    """Add the block's duration in ms to ``timings[name]`` (stages can repeat)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + (time.perf_counter() - started) * 1000, 3)
 
 
 class ReportAgent:
     """Enhanced PDF report generator with tables, charts, and improved formatting."""
 
-    def __init__(self, out_dir: str | Path | None = None):
+    def __init__(self, out_dir: str | Path | None = None, chart_cache: ChartCache | None = None,
+                 store: ReportStore | None = None):
         base = Path(__file__).parents[1] 
         self.out_dir = Path(out_dir) if out_dir else base / "outputs" / "reports"
         self.out_dir.mkdir(parents=True, exist_ok=True)
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles for the report."""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            textColor=colors.darkblue,
-            spaceAfter=30,
-            alignment=1  # Center
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            textColor=colors.darkblue,
-            spaceAfter=12,
-            spaceBefore=20
-        ))
-
-    def _create_phase_distribution_chart(self, phases_data: dict) -> str:
+        # one reusable figure per agent; charts are rendered into memory, never to disk
+        self._figure = None
+        self._figure_lock = threading.Lock()
+        self.chart_cache = chart_cache if chart_cache is not None else CHART_CACHE
+        self.store = store if store is not None else ReportStore(self.out_dir)
+
+    @property
+    def styles(self):
+        return _stylesheet()
+
+    @staticmethod
+    def _header(section: str):
+        return copy.copy(_section_header(section))
+
+    def _render_chart(self, draw, key: str | None = None) -> io.BytesIO:
+        """Draw onto the reused figure and return the PNG as an in-memory buffer.
+
+        With a ``key`` (see ``ChartCache.key``) an identical chart is served
+        from the chart cache instead of being drawn again.
+        """
+        def rasterize() -> bytes:
+            if self._figure is None:
+                from matplotlib.figure import Figure
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+                self._figure = Figure(figsize=(6, 4))
+                FigureCanvasAgg(self._figure)
+            fig = self._figure
+            fig.clear()
+            draw(fig.add_subplot())
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
+            return buf.getvalue()
+
+        # the lock also keeps two threads from drawing the same uncached chart
+        with self._figure_lock:
+            png = rasterize() if key is None else self.chart_cache.get_or_render(key, rasterize)
+        return io.BytesIO(png)
+
+    def _create_phase_distribution_chart(self, phases_data: dict) -> io.BytesIO | None:
         """Create a pie chart for clinical trial phases."""
         if not phases_data:
             return None
             
-        fig, ax = plt.subplots(figsize=(6, 4))
         phases = list(phases_data.keys())
         counts = list(phases_data.values())
         
         colors_list = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
         
-        ax.pie(counts, labels=phases, autopct='%1.1f%%', colors=colors_list)
-        ax.set_title('Clinical Trial Phase Distribution')
-        
-        temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-        plt.savefig(temp_file.name, dpi=150, bbox_inches='tight')
-        plt.close()
+        def draw(ax):
+            ax.pie(counts, labels=phases, autopct='%1.1f%%', colors=colors_list)
+            ax.set_title('Clinical Trial Phase Distribution')
         
-        return temp_file.name
+        return self._render_chart(draw, ChartCache.key('phase_pie', list(phases_data.items())))
 
-    def _create_trials_table(self, trials_data: list) -> Table:
+    def _create_trials_table(self, trials_data: list):
         """Create a formatted table of clinical trials."""
         if not trials_data:
             return None
+        from reportlab.platypus import Table
             
-        headers = [['Trial ID', 'Indication', 'Phase', 'Status']]
         rows = []
         
         for trial in trials_data[:5]:  # Limit to first 5 trials
@@ -78,25 +190,12 @@ class ReportAgent:
                 trial.get('status', 'N/A')
             ])
         
-        table_data = headers + rows
-        table = Table(table_data, colWidths=[1.2*inch, 2.5*inch, 1*inch, 1.3*inch])
-        
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = Table(TRIALS_TABLE_COLUMNS + rows, colWidths=TRIALS_TABLE_WIDTHS)
+        table.setStyle(_trials_table_style())
         
         return table
 
-    def _create_patent_status_chart(self, patent_matches: list) -> str:
+    def _create_patent_status_chart(self, patent_matches: list) -> io.BytesIO | None:
         """Create a bar chart showing patent status distribution."""
         if not patent_matches:
             return None
@@ -106,35 +205,66 @@ class ReportAgent:
             status = patent.get('status', 'Unknown')
             status_counts[status] = status_counts.get(status, 0) + 1
         
-        fig, ax = plt.subplots(figsize=(6, 4))
         statuses = list(status_counts.keys())
         counts = list(status_counts.values())
         
         colors_list = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4']
-        bars = ax.bar(statuses, counts, color=colors_list[:len(statuses)])
         
-        ax.set_title('Patent Status Distribution')
-        ax.set_xlabel('Patent Status')
-        ax.set_ylabel('Count')
-        
-        # Add value labels on bars
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{int(height)}', ha='center', va='bottom')
-        
-        temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-        plt.savefig(temp_file.name, dpi=150, bbox_inches='tight')
-        plt.close()
+        def draw(ax):
+            bars = ax.bar(statuses, counts, color=colors_list[:len(statuses)])
+            
+            ax.set_title('Patent Status Distribution')
+            ax.set_xlabel('Patent Status')
+            ax.set_ylabel('Count')
+            
+            # Add value labels on bars
+            for bar in bars:
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2., height,
+                       f'{int(height)}', ha='center', va='bottom')
         
-        return temp_file.name
+        return self._render_chart(draw, ChartCache.key('patent_status_bar', list(status_counts.items())))
+
+    def generate_pdf(self, title: str, sections: dict, filename: str | None = None,
+                     timings: dict | None = None) -> Path:
+        """Generate an enhanced PDF report with tables and charts.
 
-    def generate_pdf(self, title: str, sections: dict, filename: str | None = None) -> Path:
-        """Generate an enhanced PDF report with tables and charts."""
-        filename = filename or f"report_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.pdf"
+        Without a ``filename`` the report is named after a hash of its title and
+        sections, and an identical report already in the store is returned
+        as is. Pass a dict as ``timings`` to get per-stage durations in ms
+        (``charts``, ``table``, ``build`` and ``total``).
+        """
+        if filename is None:
+            key = report_key(title, sections)
+            filename = self.store.filename(key)
+            existing = self.store.get(key)
+            if existing is not None:
+                if timings is not None:
+                    timings['total'] = 0.0
+                return existing
         out_path = self.out_dir / filename
-        
-        doc = SimpleDocTemplate(str(out_path), pagesize=letter,
+        # build beside the target and rename, so readers never see a partial PDF
+        tmp_path = out_path.with_name(f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self._build_pdf(str(tmp_path), title, sections, timings)
+            os.replace(tmp_path, out_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self.store.add(out_path)
+        return out_path
+
+    def render_pdf(self, title: str, sections: dict, timings: dict | None = None) -> bytes:
+        """Render the same report as ``generate_pdf`` in memory and return its bytes."""
+        buffer = io.BytesIO()
+        self._build_pdf(buffer, title, sections, timings)
+        return buffer.getvalue()
+
+    def _build_pdf(self, target, title: str, sections: dict, timings: dict | None) -> None:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+
+        started = time.perf_counter()
+        doc = SimpleDocTemplate(target, pagesize=letter,
                               rightMargin=72, leftMargin=72,
                               topMargin=72, bottomMargin=18)
         
@@ -149,7 +279,7 @@ class ReportAgent:
         # Clinical Trials Section
         if 'Clinical Trials Summary' in sections:
             clinical_data = sections['Clinical Trials Summary']
-            story.append(Paragraph("📊 Clinical Trials Summary", self.styles['SectionHeader']))
+            story.append(self._header('Clinical Trials Summary'))
             
             summary_text = f"Total Trials: {clinical_data.get('count', 0)}<br/>"
             summary_text += f"Phase Distribution: {json.dumps(clinical_data.get('phases', {}))}<br/>"
@@ -159,14 +289,16 @@ class ReportAgent:
             
             # Add phase distribution chart
             if clinical_data.get('phases'):
-                chart_path = self._create_phase_distribution_chart(clinical_data['phases'])
-                if chart_path:
-                    story.append(Image(chart_path, width=4*inch, height=2.7*inch))
+                with _stage(timings, 'charts'):
+                    chart = self._create_phase_distribution_chart(clinical_data['phases'])
+                if chart:
+                    story.append(Image(chart, width=4*INCH, height=2.7*INCH))
                     story.append(Spacer(1, 12))
             
             # Add trials table
             if clinical_data.get('examples'):
-                trials_table = self._create_trials_table(clinical_data['examples'])
+                with _stage(timings, 'table'):
+                    trials_table = self._create_trials_table(clinical_data['examples'])
                 if trials_table:
                     story.append(trials_table)
                     story.append(Spacer(1, 12))
@@ -174,7 +306,7 @@ class ReportAgent:
         # Patent Landscape Section
         if 'Patent Landscape' in sections:
             patent_data = sections['Patent Landscape']
-            story.append(Paragraph("⚖️ Patent Landscape", self.styles['SectionHeader']))
+            story.append(self._header('Patent Landscape'))
             
             patent_text = f"Opportunity Level: <b>{patent_data.get('opportunity', 'Unknown')}</b><br/>"
             patent_text += f"Patent Coverage: {json.dumps(patent_data.get('patent_coverage', {}))}"
@@ -183,48 +315,47 @@ class ReportAgent:
             
             # Add patent status chart
             if patent_data.get('matches'):
-                chart_path = self._create_patent_status_chart(patent_data['matches'])
-                if chart_path:
-                    story.append(Image(chart_path, width=4*inch, height=2.7*inch))
+                with _stage(timings, 'charts'):
+                    chart = self._create_patent_status_chart(patent_data['matches'])
+                if chart:
+                    story.append(Image(chart, width=4*INCH, height=2.7*INCH))
                     story.append(Spacer(1, 12))
         
         # Market Insights Section
         if 'Market Insight' in sections:
             market_data = sections['Market Insight']
-            story.append(Paragraph("💰 Market Insights", self.styles['SectionHeader']))
+            story.append(self._header('Market Insight'))
             
             market_text = f"Segment: {market_data.get('segment', 'N/A')}<br/>"
             market_text += f"Gap Score: <b>{market_data.get('gap_score', 'N/A')}/10</b><br/>"
             market_text += f"Market Size: ${market_data.get('estimated_addressable_market_usd_m', 'N/A')}M<br/>"
             market_text += f"Strategy: {market_data.get('recommended_strategy', 'N/A')}<br/><br/>"
             market_text += f"Rationale: {market_data.get('rationale', 'N/A')}"
+            related = market_data.get('related_segments')
+            if related:
+                market_text += "<br/><br/>Related segments: " + ", ".join(
+                    f"{r.get('segment')} ({r.get('gap_score')}/10)" for r in related)
             story.append(Paragraph(market_text, self.styles['Normal']))
             story.append(Spacer(1, 12))
         
         # Literature Synthesis Section
         if 'Literature Synthesis' in sections:
-            story.append(Paragraph("📚 Literature Synthesis", self.styles['SectionHeader']))
+            story.append(self._header('Literature Synthesis'))
             lit_text = str(sections['Literature Synthesis'])
             story.append(Paragraph(lit_text, self.styles['Normal']))
             story.append(Spacer(1, 12))
         
         # Conclusion Section
         if 'Conclusion' in sections:
-            story.append(Paragraph("🎯 Conclusion", self.styles['SectionHeader']))
+            story.append(self._header('Conclusion'))
             conclusion_text = str(sections['Conclusion'])
             story.append(Paragraph(conclusion_text, self.styles['Normal']))
         
         # Build PDF
-        doc.build(story)
-        
-        # Clean up temporary chart files
-        try:
-            for temp_file in [f for f in Path(tempfile.gettempdir()).glob('tmp*.png')]:
-                temp_file.unlink(missing_ok=True)
-        except:
-            pass  # Ignore cleanup errors
-        
-        return out_path
+        with _stage(timings, 'build'):
+            doc.build(story)
+        if timings is not None:
+            timings['total'] = round((time.perf_counter() - started) * 1000, 3)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable
+
+from .metrics import METRICS
+from .render_pool import RenderPool, render_report
+from .report_store import ReportStore, report_key
+
+
+class ReportJobQueue:
+    """Renders PDF reports in the background and tracks them by job id.
+
+    Jobs run on a ``RenderPool`` of warm worker processes (created on first
+    use) so rendering never holds up the request that asked for it.
+    ``status`` reports ``pending``, ``running``, ``done`` (with
+    ``report_path``) or ``failed`` (with ``error``). Only the most recent
+    ``max_jobs`` jobs are remembered.
+
+    Each job's state is also mirrored to ``<out_dir>/.jobs/<job_id>.json`` so
+    that any worker process sharing ``out_dir`` can answer ``status`` for it,
+    not just the one that queued it. A report already in the store is
+    returned as a finished job without rendering it again.
+    """
+
+    def __init__(self, out_dir: str | Path, max_workers: int = 2, max_jobs: int = 1000,
+                 executor_factory: Callable[[], Executor] | None = None):
+        self.out_dir = out_dir
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._executor_factory = executor_factory or self._render_pool
+        self._executor = None
+        self.store = ReportStore(out_dir)
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _render_pool(self) -> RenderPool:
+        # the workers share rendered charts through the reports directory
+        return RenderPool(self.out_dir, workers=self.max_workers, chart_dir=Path(self.out_dir) / ".charts")
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    def _state_path(self, job_id: str) -> Path:
+        return Path(self.out_dir) / ".jobs" / f"{job_id}.json"
+
+    def _publish(self, job: dict) -> None:
+        path = self._state_path(job["job_id"])
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(job), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass  # other workers just won't see this job
+
+    def _read_state(self, job_id: str) -> dict | None:
+        if not job_id.isalnum():
+            return None
+        try:
+            return json.loads(self._state_path(job_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def submit(self, title: str, sections: dict, filename: str | None = None) -> str:
+        job_id = uuid.uuid4().hex
+        job = {"job_id": job_id, "status": "pending", "report_path": None, "error": None,
+               "submitted_at": time.time(), "finished_at": None, "timings": None}
+        existing = self.store.get(report_key(title, sections)) if filename is None else None
+        if existing is not None:
+            job.update(status="done", report_path=str(existing), finished_at=job["submitted_at"], timings={})
+        evicted = []
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                old_id, _ = self._jobs.popitem(last=False)
+                self._futures.pop(old_id, None)
+                evicted.append(old_id)
+        self._publish(job)
+        for old_id in evicted:
+            self._state_path(old_id).unlink(missing_ok=True)
+        if existing is not None:
+            return job_id
+        # the stage timings travel back with the path because worker metrics are process-local
+        try:
+            future = self._pool().submit(render_report, str(self.out_dir), title, sections, filename)
+        except BrokenProcessPool:
+            self._executor = None
+            future = self._pool().submit(render_report, str(self.out_dir), title, sections, filename)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda fut: self._finish(job_id, fut))
+        return job_id
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._futures.pop(job_id, None)
+            if job is None or job["status"] != "pending":
+                return  # wait() and the done-callback can both deliver the result
+            job["finished_at"] = time.time()
+            try:
+                job["report_path"], job["timings"] = future.result()
+                if not Path(job["report_path"]).exists():
+                    # another process's retention pass can delete it before we get here
+                    raise FileNotFoundError(f"{job['report_path']} was removed before the job finished")
+                job["status"] = "done"
+            except Exception as exc:
+                job["status"] = "failed"
+                job["error"] = f"{type(exc).__name__}: {exc}"
+            finished = dict(job)
+        self._publish(finished)
+        if finished["status"] == "done":
+            self.store.add(finished["report_path"])
+            METRICS.observe_ms("pharma_report_stage_seconds", finished["timings"], "stage")
+
+    def status(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return self._read_state(job_id)
+            job = dict(job)
+            future = self._futures.get(job_id)
+        if job["status"] == "pending" and future is not None and future.running():
+            job["status"] = "running"
+        return job
+
+    def wait(self, job_id: str, timeout: float | None = None) -> dict | None:
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            wait_futures([future], timeout=timeout)
+            if future.done():
+                self._finish(job_id, future)
+        return self.status(job_id)
+
+    def warm(self) -> None:
+        """Start the render workers now so the first report doesn't pay for it."""
+        pool = self._pool()
+        if isinstance(pool, RenderPool):
+            pool.warm()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+
+def report_key(title: str, sections: dict) -> str:
+    """Content hash of a report's inputs; identical analyses share one file."""
+    payload = json.dumps({"title": title, "sections": sections}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ReportStore:
+    """Index and retention policy for the PDFs in a reports directory.
+
+    Reports are named ``report_<content hash>.pdf``, so a repeated analysis maps
+    to the file that already exists instead of adding a duplicate. The index is
+    built from one directory listing and then kept in memory, so ``lookup``
+    only stats names it has not seen (another worker's store may have written
+    them). Reusing a report through ``get`` confirms the file on disk and
+    touches it, so a report pruned elsewhere is rendered again rather than
+    handed out, and ages count from a report's last reuse. At most every
+    ``prune_interval`` seconds, reports not used for ``max_age`` seconds are
+    deleted, then the least recently used until the total is under
+    ``max_bytes``; each candidate is re-checked on disk first, since another
+    store may have reused it meanwhile.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int | None = 2**30, max_age: float | None = 7 * 86400,
+                 prune_interval: float = 60.0, clock: Callable[[], float] = time.time):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._clock = clock
+        self._index: dict[str, tuple[int, float]] | None = None
+        self._last_prune = clock()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def filename(key: str) -> str:
+        return f"report_{key}.pdf"
+
+    @staticmethod
+    def _valid(filename: str) -> bool:
+        return Path(filename).name == filename and filename.endswith(".pdf") and not filename.startswith(".")
+
+    def _entries(self) -> dict[str, tuple[int, float]]:
+        # caller holds the lock
+        if self._index is None:
+            self._index = {}
+            try:
+                for path in self.root.glob("*.pdf"):
+                    stat = path.stat()
+                    self._index[path.name] = (stat.st_size, stat.st_mtime)
+            except OSError:
+                pass
+        return self._index
+
+    def lookup(self, filename: str) -> Path | None:
+        """Path of a stored report, or None; never resolves outside ``root``.
+
+        Indexed names are answered without touching the disk; a caller that
+        then finds the file gone should ``discard`` it.
+        """
+        if not self._valid(filename):
+            return None
+        path = self.root / filename
+        with self._lock:
+            if filename in self._entries():
+                return path
+        return path if self._record(path) else None
+
+    def get(self, key: str) -> Path | None:
+        """The stored report for ``key`` to hand out again, or None if it is not on disk.
+
+        Its modification time is bumped, so pruning counts from this reuse.
+        """
+        path = self.root / self.filename(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.discard(path.name)
+            return None
+        return path if self._record(path) else None
+
+    def _record(self, path: Path) -> bool:
+        try:
+            stat = path.stat()
+        except OSError:
+            self.discard(path.name)
+            return False
+        with self._lock:
+            self._entries()[path.name] = (stat.st_size, stat.st_mtime)
+        return True
+
+    def add(self, path: str | Path) -> None:
+        """Record a report just written into ``root``; may trigger a prune."""
+        if not self._record(Path(path)):
+            return
+        with self._lock:
+            due = self._clock() - self._last_prune >= self.prune_interval
+        if due:
+            self.prune()
+
+    def discard(self, filename: str) -> None:
+        with self._lock:
+            self._entries().pop(filename, None)
+
+    def prune(self) -> list[str]:
+        """Apply the age and size limits now; returns the deleted file names."""
+        now = self._clock()
+        with self._lock:
+            self._last_prune = now
+            entries = self._entries()
+            oldest_first = sorted(entries.items(), key=lambda item: item[1][1])
+            total = sum(size for size, _ in entries.values())
+            removed = []
+            for name, (size, mtime) in oldest_first:
+                expired = self.max_age is not None and now - mtime > self.max_age
+                oversized = self.max_bytes is not None and total > self.max_bytes
+                if not (expired or oversized):
+                    continue
+                try:
+                    stat = (self.root / name).stat()
+                except OSError:
+                    stat = None
+                if stat is not None and stat.st_mtime > mtime:  # reused since it was indexed
+                    entries[name] = (stat.st_size, stat.st_mtime)
+                    total += stat.st_size - size
+                    continue
+                del entries[name]
+                total -= size
+                if stat is not None:
+                    removed.append(name)
+        for name in removed:
+            (self.root / name).unlink(missing_ok=True)
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries()
+            return {"reports": len(entries), "bytes": sum(size for size, _ in entries.values()),
+                    "max_bytes": self.max_bytes, "max_age": self.max_age}
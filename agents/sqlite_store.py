@@ -0,0 +1,266 @@
+"""SQLite storage for the agent datasets.
+
+``python -m agents.sqlite_store data/pharma.db data/*.json`` imports the JSON
+datasets into one database file. An agent whose ``data_path`` is the database
+queries its B-tree and FTS5 indexes instead of loading the records, so opening
+a dataset reads no rows and the data can be larger than memory:
+
+* trials are indexed by canonical drug name, phase and status, with the
+  per-drug phase/status/indication counts precomputed in ``trial_stats``;
+* patents have an FTS5 trigram index over ``title + claims_summary``, which
+  answers the same substring queries as the in-memory trigram index;
+* articles have an FTS5 index over ``title + abstract`` ranked with BM25;
+* market insights are stored as rows and read through ``load_records``.
+
+Every table is keyed by ``pos``, the record's position in the source file.
+Re-importing a dataset rebuilds the database in a temporary file and swaps it
+in with a rename, carrying over the datasets that were not re-imported, so
+readers never see a half-written file and the agents hot-reload it.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+
+from .drug_lexicon import DrugLexicon
+
+SUFFIXES = (".db", ".sqlite", ".sqlite3")
+_IN_CHUNK = 500  # stays well under SQLite's bound-parameter limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (dataset TEXT PRIMARY KEY, shape TEXT NOT NULL, rows INTEGER NOT NULL, source TEXT);
+CREATE TABLE IF NOT EXISTS trials (
+    pos INTEGER PRIMARY KEY, drug_key TEXT, phase_key TEXT, status_key TEXT, indication TEXT, body TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS trials_drug ON trials (drug_key);
+CREATE INDEX IF NOT EXISTS trials_phase ON trials (phase_key);
+CREATE INDEX IF NOT EXISTS trials_status ON trials (status_key);
+CREATE TABLE IF NOT EXISTS trial_stats (drug_key TEXT NOT NULL, kind TEXT NOT NULL, value TEXT, n INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS trial_stats_drug ON trial_stats (drug_key, kind);
+CREATE TABLE IF NOT EXISTS patents (pos INTEGER PRIMARY KEY, body TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS patents_fts USING fts5 (text, tokenize = 'trigram');
+CREATE TABLE IF NOT EXISTS articles (pos INTEGER PRIMARY KEY, body TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (text);
+CREATE TABLE IF NOT EXISTS market_insights (pos INTEGER PRIMARY KEY, body TEXT NOT NULL);
+"""
+# the tables holding each dataset, in the order they are copied
+DATASET_TABLES = {
+    "trials": ("trials", "trial_stats"),
+    "patents": ("patents", "patents_fts"),
+    "articles": ("articles", "articles_fts"),
+    "market_insights": ("market_insights",),
+}
+
+
+def is_sqlite(path: str | Path) -> bool:
+    return Path(path).suffix.lower() in SUFFIXES
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower()
+
+
+def _body(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def fts_phrase(text: str) -> str:
+    """``text`` as one FTS5 phrase, safe to pass to ``MATCH``."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class Rows(Sequence):
+    """Read-only sequence of the record dicts in one table, decoded on access."""
+
+    def __init__(self, store: "SqliteStore", table: str, rows: int):
+        self.store = store
+        self.table = table
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.rows))]
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        (body,), = self.store.query(f"SELECT body FROM {self.table} WHERE pos = ?", (i,))
+        return json.loads(body)
+
+    def __iter__(self):
+        for (body,) in self.store.query(f"SELECT body FROM {self.table} ORDER BY pos"):
+            yield json.loads(body)
+
+    def where(self, clause: str, params: tuple = ()) -> list:
+        """Records matching a SQL ``WHERE ...`` clause (plus any ORDER BY / LIMIT)."""
+        return [json.loads(body) for (body,) in self.store.query(f"SELECT body FROM {self.table} {clause}", params)]
+
+    def many(self, positions) -> list:
+        """The records at ``positions``, in that order."""
+        positions = list(positions)
+        found = {}
+        for start in range(0, len(positions), _IN_CHUNK):
+            chunk = positions[start:start + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(self.store.query(f"SELECT pos, body FROM {self.table} WHERE pos IN ({marks})", chunk))
+        return [json.loads(found[pos]) for pos in positions]
+
+
+class SqliteStore:
+    """Read-only access to an imported database.
+
+    Each thread gets its own connection, and a forked process opens fresh ones
+    rather than reusing its parent's, which SQLite does not allow.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.datasets = {name: (shape, rows) for name, shape, rows in
+                         self.query("SELECT dataset, shape, rows FROM meta")}
+
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            local.pid = os.getpid()
+        return local.conn
+
+    def query(self, sql: str, params=()) -> list:
+        return self.connection().execute(sql, params).fetchall()
+
+    def rows(self, dataset: str) -> Rows:
+        """Records of an imported dataset; raises KeyError if it was never imported."""
+        _, rows = self.datasets[dataset]
+        return Rows(self, dataset, rows)
+
+
+def load_rows(path: str | Path, key: str, default=None):
+    """``load_records`` for a database: the ``key`` dataset as rows (or one dict)."""
+    store = SqliteStore(path)
+    if key not in store.datasets:
+        return default
+    rows = store.rows(key)
+    if store.datasets[key][0] == "dict":
+        return rows[0] if len(rows) else default
+    return rows
+
+
+def _import_trials(conn: sqlite3.Connection, trials: list, lexicon: DrugLexicon) -> None:
+    stats: dict[str, dict[str, dict]] = {}
+    drug_keys: dict[str, str] = {}
+
+    def rows():
+        for pos, trial in enumerate(trials):
+            drug = trial.get("drug")
+            if drug not in drug_keys:
+                drug_keys[drug] = lexicon.key(drug)
+            key = drug_keys[drug]
+            phase = trial.get("phase") or "unknown"
+            status = trial.get("status") or "unknown"
+            indication = trial.get("indication")
+            counts = stats.setdefault(key, {"phase": {}, "status": {}, "indication": {}})
+            for kind, value in (("phase", phase), ("status", status), ("indication", indication)):
+                if value:
+                    counts[kind][value] = counts[kind].get(value, 0) + 1
+            yield pos, key, _norm(phase), _norm(status), indication, _body(trial)
+
+    conn.executemany("INSERT INTO trials VALUES (?, ?, ?, ?, ?, ?)", rows())
+    # first-seen order, so summaries list phases the way the in-memory index does
+    conn.executemany("INSERT INTO trial_stats VALUES (?, ?, ?, ?)",
+                     ((key, kind, value, n) for key, kinds in stats.items()
+                      for kind, values in kinds.items() for value, n in values.items()))
+
+
+def _import_patents(conn: sqlite3.Connection, patents: list, lexicon: DrugLexicon) -> None:
+    conn.executemany("INSERT INTO patents VALUES (?, ?)", ((pos, _body(p)) for pos, p in enumerate(patents)))
+    conn.executemany("INSERT INTO patents_fts (rowid, text) VALUES (?, ?)",
+                     ((pos, ((p.get("title") or "") + " " + (p.get("claims_summary") or "")).lower())
+                      for pos, p in enumerate(patents)))
+
+
+def _import_articles(conn: sqlite3.Connection, articles: list, lexicon: DrugLexicon) -> None:
+    conn.executemany("INSERT INTO articles VALUES (?, ?)", ((pos, _body(a)) for pos, a in enumerate(articles)))
+    conn.executemany("INSERT INTO articles_fts (rowid, text) VALUES (?, ?)",
+                     ((pos, (a.get("title") or "") + " " + (a.get("abstract") or "")) for pos, a in enumerate(articles)))
+
+
+def _import_market(conn: sqlite3.Connection, insights: list, lexicon: DrugLexicon) -> None:
+    conn.executemany("INSERT INTO market_insights VALUES (?, ?)", ((pos, _body(m)) for pos, m in enumerate(insights)))
+
+
+IMPORTERS = {"trials": _import_trials, "patents": _import_patents,
+             "articles": _import_articles, "market_insights": _import_market}
+
+
+def import_json(db_path: str | Path, json_paths, lexicon: DrugLexicon | None = None) -> Path:
+    """Import dataset JSON files (``{"<key>": [records...]}``) into ``db_path``.
+
+    Drug names are keyed with ``lexicon`` (the bundled synonyms by default), which
+    should be the one the agents reading the database use.
+    """
+    db_path = Path(db_path)
+    lexicon = lexicon if lexicon is not None else DrugLexicon.load()
+    tmp = db_path.with_name(f".{db_path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        imported = set()
+        for json_path in json_paths:
+            with open(json_path, "r", encoding="utf-8") as fh:
+                payload = json.load(fh)
+            key, records = next(iter(payload.items()))
+            if key not in IMPORTERS:
+                raise ValueError(f"{json_path}: unknown dataset {key!r}")
+            shape = "dict" if isinstance(records, dict) else "list"
+            records = [records] if shape == "dict" else records
+            IMPORTERS[key](conn, records, lexicon)
+            conn.execute("INSERT INTO meta VALUES (?, ?, ?, ?)", (key, shape, len(records), str(json_path)))
+            imported.add(key)
+        if db_path.exists():
+            _carry_over(conn, db_path, [key for key in DATASET_TABLES if key not in imported])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp, db_path)
+    return db_path
+
+
+def _carry_over(conn: sqlite3.Connection, old_path: Path, datasets: list) -> None:
+    conn.execute("ATTACH DATABASE ? AS old", (f"{old_path.resolve().as_uri()}?mode=ro",))
+    try:
+        present = {name for (name,) in conn.execute("SELECT dataset FROM old.meta")}
+        for dataset in datasets:
+            if dataset not in present:
+                continue
+            for table in DATASET_TABLES[dataset]:
+                if table.endswith("_fts"):
+                    conn.execute(f"INSERT INTO main.{table} (rowid, text) SELECT rowid, text FROM old.{table}")
+                else:
+                    conn.execute(f"INSERT INTO main.{table} SELECT * FROM old.{table}")
+            conn.execute("INSERT INTO main.meta SELECT * FROM old.meta WHERE dataset = ?", (dataset,))
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE old")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import the JSON datasets into a SQLite database.")
+    parser.add_argument("db", help="database file to create or update, e.g. data/pharma.db")
+    parser.add_argument("json", nargs="+", help="dataset JSON files")
+    parser.add_argument("--synonyms", help="drug synonyms JSON (default: data/drug_synonyms.json)")
+    args = parser.parse_args(argv)
+    print("Wrote:", import_json(args.db, args.json, DrugLexicon.load(args.synonyms)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import heapq
+import json
+import math
+import re
+from pathlib import Path
+from typing import Iterable
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class BM25Index:
+    """Inverted index over a list of documents with Okapi BM25 ranking.
+
+    Documents are addressed by their position in the source list. A query matches
+    the documents containing every query term; matches are ranked by BM25 score
+    (ties keep source order) and returned a page at a time. The index can be saved
+    to and loaded from a JSON file so a process does not re-tokenize the corpus.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, postings: dict, doc_lengths: list, source: str = "", k1: float = 1.5, b: float = 0.75):
+        self.postings = postings  # term -> [[doc, term_frequency], ...]
+        self.doc_lengths = doc_lengths
+        self.source = source
+        self.k1 = k1
+        self.b = b
+        self.avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, docs: Iterable[str], source: str = "") -> "BM25Index":
+        postings: dict[str, list] = {}
+        doc_lengths = []
+        for pos, text in enumerate(docs):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            counts: dict[str, int] = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                postings.setdefault(tok, []).append([pos, tf])
+        return cls(postings, doc_lengths, source)
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": self.FORMAT_VERSION, "source": self.source,
+                       "doc_lengths": self.doc_lengths, "postings": self.postings}, fh)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        if payload.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported index version in {path}")
+        return cls(payload["postings"], payload["doc_lengths"], payload.get("source", ""))
+
+    def _idf(self, posting: list) -> float:
+        n = len(self.doc_lengths)
+        df = len(posting)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _scores(self, query: str) -> dict[int, float]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        postings = [self.postings.get(t) for t in terms]
+        if not terms or not all(postings):
+            return {}
+        postings.sort(key=len)
+        scores = {doc: 0.0 for doc, _ in postings[0]}
+        for posting in postings:
+            idf = self._idf(posting)
+            seen = {}
+            for doc, tf in posting:
+                if doc in scores:
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / (self.avg_length or 1))
+                    seen[doc] = scores[doc] + idf * tf * (self.k1 + 1) / (tf + norm)
+            scores = seen
+        return scores
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        """Return ``(total_matches, [(doc, score), ...])`` for one page of results."""
+        return self._page(self._scores(query), limit, offset)
+
+    def search_any(self, queries: Iterable[str], limit: int = 10, offset: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        """Like ``search`` for documents matching any of ``queries``, each scored by its best query."""
+        scores: dict[int, float] = {}
+        for query in queries:
+            for doc, score in self._scores(query).items():
+                if score > scores.get(doc, -math.inf):
+                    scores[doc] = score
+        return self._page(scores, limit, offset)
+
+    @staticmethod
+    def _page(scores: dict, limit: int, offset: int) -> tuple[int, list[tuple[int, float]]]:
+        ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return len(scores), ranked[offset:offset + limit]
@@ -1,40 +1,149 @@
-import json
 from pathlib import Path
 from typing import List
 
+from .datastore import field_values, file_fingerprint, load_records, resolve_source
+from .drug_lexicon import DrugLexicon
+from .metrics import METRICS
+from .sqlite_store import SqliteStore, fts_phrase, is_sqlite
+from .text_index import BM25Index, tokenize
+
+MAX_COMBINED_CHARS = 4000
+
+
+class LiteratureIndex:
+    """Articles together with the BM25 index over their title + abstract."""
+
+    def __init__(self, articles: List[dict], bm25: "BM25Index | SqliteArticleSearch | None" = None):
+        self.articles = articles
+        self.bm25 = bm25 if bm25 is not None else BM25Index.build(self.texts(articles))
+
+    @staticmethod
+    def texts(articles: List[dict]):
+        columns = zip(field_values(articles, "title"), field_values(articles, "abstract"))
+        return ((title or "") + " " + (abstract or "") for title, abstract in columns)
+
+
+class SqliteArticleSearch:
+    """``BM25Index``-compatible search over the FTS5 article index of a SQLite database.
+
+    Matching is the same (every query term must occur); scores come from FTS5's
+    own ``bm25()``, so they rank alike but are not equal to ``BM25Index`` scores.
+    """
+
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        return self.search_any([query], limit, offset)
+
+    def search_any(self, queries, limit: int = 10, offset: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        groups = []
+        for query in queries:
+            terms = list(dict.fromkeys(tokenize(query)))
+            if terms:
+                groups.append("(" + " ".join(map(fts_phrase, terms)) + ")")
+        if not groups:
+            return 0, []
+        match = " OR ".join(groups)
+        (total,), = self.store.query("SELECT count(*) FROM articles_fts WHERE articles_fts MATCH ?", (match,))
+        hits = self.store.query("SELECT rowid, -bm25(articles_fts) FROM articles_fts WHERE articles_fts MATCH ? "
+                                "ORDER BY bm25(articles_fts), rowid LIMIT ? OFFSET ?", (match, limit, offset))
+        return total, [(pos, score) for pos, score in hits]
+
 
 class WebIntelAgent:
     """Summarizes literature samples from a local JSON file.
 
     This is a mock of a web intelligence agent that would call an LLM in a real system.
+    Articles are retrieved through a BM25 index; pass ``index_path`` to persist it on
+    disk so later processes load it instead of re-tokenizing every abstract. A drug
+    the lexicon knows is searched under all of its names (brand, salt, abbreviation).
+    With ``data_path`` pointing at a database from ``agents.sqlite_store`` the
+    search runs on its FTS5 index instead.
     """
 
-    def __init__(self, data_path: str | Path | None = None):
+    def __init__(self, data_path: str | Path | None = None, index_path: str | Path | None = None,
+                 lexicon: DrugLexicon | None = None):
         base = Path(__file__).parents[1]
         self.data_path = Path(data_path) if data_path else base / "data" / "literature_samples.json"
-        self.articles: List[dict] = []
+        self.lexicon = lexicon if lexicon is not None else DrugLexicon.load()
+        self.index_path = Path(index_path) if index_path else None
+        self._index = LiteratureIndex([])
         self._load()
 
+    @property
+    def articles(self) -> List[dict]:
+        return self._index.articles
+
+    def _read(self, version: str) -> LiteratureIndex:
+        with METRICS.timer("pharma_dataset_load_seconds", dataset="literature"):
+            if is_sqlite(self.data_path):
+                store = SqliteStore(self.data_path)
+                articles = store.rows("articles")
+                index = LiteratureIndex(articles, SqliteArticleSearch(store))
+            else:
+                articles = load_records(self.data_path, "articles", [])
+                index = LiteratureIndex(articles, self._open_bm25(articles, version))
+        METRICS.set_gauge("pharma_dataset_records", len(articles), dataset="literature")
+        return index
+
     def _load(self):
+        self.version = file_fingerprint(resolve_source(self.data_path))
+        try:
+            self._index = self._read(self.version)
+        except Exception:
+            self._index = LiteratureIndex([])
+
+    def reload(self):
+        """Re-read the articles and BM25 index, then swap them in together; raises on failure."""
+        version = file_fingerprint(resolve_source(self.data_path))
+        self._index = self._read(version)
+        self.version = version
+
+    def _open_bm25(self, articles: List[dict], source: str) -> BM25Index | None:
+        if not self.index_path:
+            return None
         try:
-            with open(self.data_path, "r", encoding="utf-8") as fh:
-                payload = json.load(fh)
-                self.articles = payload.get("articles", [])
+            bm25 = BM25Index.load(self.index_path)
+            if bm25.source == source:
+                return bm25
         except Exception:
-            self.articles = []
+            pass
+        bm25 = BM25Index.build(LiteratureIndex.texts(articles), source)
+        try:
+            bm25.save(self.index_path)
+        except OSError:
+            pass  # a read-only index location only costs the rebuild
+        return bm25
 
-    def summarize_for_drug(self, drug_name: str) -> dict:
-        # naive: return combined abstracts and a short synthesized summary
-        relevant = [a for a in self.articles if drug_name.lower() in (a.get("title", "") + " " + a.get("abstract", "")).lower()]
+    def summarize_for_drug(self, drug_name: str, limit: int = 5, offset: int = 0) -> dict:
+        # top-k articles by BM25; "count" is the total number of matching articles
+        index = self._index
+        key = self.lexicon.resolve(drug_name)
+        if key is not None:
+            total, hits = index.bm25.search_any(self.lexicon.aliases(key), limit=limit, offset=offset)
+        else:
+            total, hits = index.bm25.search(drug_name, limit=limit, offset=offset)
+        relevant = [index.articles[pos] for pos, _ in hits]
         combined = "\n\n".join([f"{a.get('title')} ({a.get('year')}): {a.get('abstract')}" for a in relevant])
+        combined = combined[:MAX_COMBINED_CHARS]
         # produce a short mock summary
-        if not relevant:
+        if not total:
             summary = f"No literature matches found for {drug_name}."
         else:
             summary = (
-                f"Found {len(relevant)} article(s). Preclinical and epidemiological signals suggest {drug_name} modulates metabolic pathways (AMPK/mTOR)"
+                f"Found {total} article(s). Preclinical and epidemiological signals suggest {drug_name} modulates metabolic pathways (AMPK/mTOR)"
             )
-        return {"drug": drug_name, "count": len(relevant), "summary": summary, "combined": combined, "matches": relevant}
+        return {
+            "drug": drug_name,
+            "count": total,
+            "summary": summary,
+            "combined": combined,
+            "matches": relevant,
+            "scores": [round(score, 4) for _, score in hits],
+            "limit": limit,
+            "offset": offset,
+        }
 
 
 if __name__ == "__main__":
@@ -1,13 +1,37 @@
 # empty
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 from agents.master_agent import MasterAgent
+from agents.metrics import METRICS
 from pathlib import Path
+import json
+import os
+import time
 
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React development
-master = MasterAgent()
+master = MasterAgent(concurrent=True, report_workers=int(os.environ.get("PHARMA_REPORT_WORKERS", "2")),
+                     db_path=os.environ.get("PHARMA_DB") or None,
+                     request_threads=int(os.environ.get("PHARMA_THREADS", "4")))  # gunicorn's threads per worker
+RELOAD_INTERVAL = float(os.environ.get("PHARMA_RELOAD_INTERVAL", "5"))
+if RELOAD_INTERVAL > 0:
+	master.start_watching(RELOAD_INTERVAL)
+MAX_BATCH_SIZE = 10000
+
+
+@app.before_request
+def start_timer():
+	g.started = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response):
+	if "started" in g:
+		METRICS.observe("pharma_http_request_seconds", time.perf_counter() - g.started,
+						endpoint=request.endpoint or "unknown", method=request.method, status=response.status_code)
+	return response
 
 
 @app.route("/", methods=["GET"])
@@ -21,16 +45,97 @@ def analyze():
 	drug = payload.get("drug") if payload else None
 	if not drug:
 		return jsonify({"error": "Please provide 'drug' in JSON body"}), 400
-	result = master.analyze(drug)
+	stream = payload.get("stream") or request.args.get("stream")
+	if not stream and request.accept_mimetypes.best == "text/event-stream":
+		stream = "sse"
+	if stream:
+		return stream_analysis(drug, sse=stream == "sse", async_report=not payload.get("wait_for_report"))
+	# the PDF renders in the background unless the caller asks to wait for it
+	result = master.analyze(drug, async_report=not payload.get("wait_for_report"),
+							timings=bool(payload.get("timings") or request.args.get("timings")))
+	if result.get("report_job"):
+		result["report_status_url"] = f"/reports/status/{result['report_job']}"
 	return jsonify(result)
 
 
+def stream_analysis(drug, sse=False, async_report=True):
+	"""Stream the analysis as NDJSON (or Server-Sent Events), one event per section."""
+	def events():
+		for event in master.analyze_stream(drug, async_report=async_report):
+			if event["event"] == "report" and event.get("report_job"):
+				event["report_status_url"] = f"/reports/status/{event['report_job']}"
+			if sse:
+				yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+			else:
+				yield json.dumps(event) + "\n"
+
+	mimetype = "text/event-stream" if sse else "application/x-ndjson"
+	# tell reverse proxies not to buffer, or the sections would arrive all at once
+	return Response(stream_with_context(events()), mimetype=mimetype,
+					headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/analyze/batch", methods=["POST"])
+def analyze_batch():
+	payload = request.get_json(force=True) or {}
+	drugs = payload.get("drugs")
+	if not isinstance(drugs, list) or not drugs or not all(isinstance(d, str) and d.strip() for d in drugs):
+		return jsonify({"error": "Please provide 'drugs' as a non-empty list of names in JSON body"}), 400
+	if len(drugs) > MAX_BATCH_SIZE:
+		return jsonify({"error": f"At most {MAX_BATCH_SIZE} drugs per batch"}), 400
+	results = master.analyze_many(drugs, reports=bool(payload.get("reports")))
+	lines = (json.dumps(result) + "\n" for result in results)
+	return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
+@app.route("/leaderboard", methods=["GET"])
+def leaderboard():
+	"""Top ``k`` drugs by repurposing score; every other query parameter sets a feature weight."""
+	try:
+		k = int(request.args.get("k", 10))
+		overrides = {name: float(value) for name, value in request.args.items() if name != "k"}
+		board = master.leaderboard()
+		top = board.top(k, overrides)
+	except ValueError as exc:
+		return jsonify({"error": str(exc)}), 400
+	return jsonify({"drugs": len(board.drugs), "weights": board.weights(overrides), "leaderboard": top})
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+	return jsonify(master.cache.stats())
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+	stats = master.cache.stats()
+	METRICS.set_gauge("pharma_analysis_cache_hits", stats["hits"])
+	METRICS.set_gauge("pharma_analysis_cache_misses", stats["misses"])
+	METRICS.set_gauge("pharma_analysis_cache_entries", stats["size"])
+	return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/reports/status/<job_id>", methods=["GET"])
+def report_status(job_id):
+	job = master.report_jobs.status(job_id)
+	if job is None:
+		return jsonify({"error": "Unknown report job"}), 404
+	if job["status"] == "done":
+		job["download_url"] = f"/reports/{Path(job['report_path']).name}"
+	return jsonify(job)
+
+
 @app.route("/reports/<path:filename>", methods=["GET"])
 def get_report(filename):
-	reports_dir = Path(__file__).parent / "outputs" / "reports"
-	if not (reports_dir / filename).exists():
-		return jsonify({"error": "File not found"}), 404
-	return send_from_directory(directory=str(reports_dir), path=filename, as_attachment=True)
+	# answered from the report store's index; only unseen names cost a stat
+	store = master.report_jobs.store
+	path = store.lookup(filename)
+	if path is not None:
+		try:
+			return send_from_directory(directory=str(path.parent), path=path.name, as_attachment=True)
+		except NotFound:
+			store.discard(filename)  # pruned by another worker since it was indexed
+	return jsonify({"error": "File not found"}), 404
 
 
 if __name__ == "__main__":
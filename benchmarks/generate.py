@@ -0,0 +1,145 @@
+"""Synthetic dataset generator for the benchmarks.
+
+Writes ``clinical_trials.json``, ``patents.json``, ``literature_samples.json`` and
+``market_data.json`` in the same shape as ``data/``, streaming records so even
+10M-record corpora never sit in memory at once::
+
+    python -m benchmarks.generate --scale 100000 --out bench_data
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+PREFIXES = ["met", "asp", "sil", "thal", "hydro", "minox", "ator", "losar", "prednis", "tamox",
+            "imat", "rapa", "dox", "clop", "warf", "lisin", "simv", "omep", "fluox", "sert"]
+SUFFIXES = ["formin", "irin", "denafil", "idomide", "xychloroquine", "idil", "vastatin", "tan",
+            "olone", "ifen", "inib", "mycin", "orubicin", "idogrel", "arin", "opril", "azole", "etine"]
+INDICATIONS = ["Breast Cancer", "Colorectal Cancer Prevention", "Type 2 Diabetes", "Heart Failure",
+               "Pulmonary Arterial Hypertension", "Rheumatoid Arthritis", "Systemic Lupus Erythematosus",
+               "Multiple Myeloma", "Alopecia Areata", "Cardiovascular Disease Prevention", "Glioblastoma",
+               "Polycystic Ovary Syndrome (PCOS)", "Chemotherapy-induced Nausea", "Psoriasis"]
+PHASES = ["Phase 1", "Phase 2", "Phase 3", "Phase 4"]
+TRIAL_STATUSES = ["Completed", "Recruiting", "Active, not recruiting", "Terminated", "Withdrawn"]
+PATENT_STATUSES = ["Active", "Granted", "Expired", "Abandoned", "Pending"]
+SEGMENTS = ["Metabolic oncology", "Cardiovascular prevention", "Pulmonary arterial hypertension",
+            "Autoimmune diseases", "Dermatology/aesthetics", "Oncology supportive care"]
+WORDS = ("pathway signaling activation inhibition cohort randomized placebo efficacy safety tumor "
+         "metabolic immune receptor kinase dose response outcome biomarker survival mechanism").split()
+
+
+def drug_names(count: int, seed: int = 0) -> list[str]:
+    """``count`` distinct, pronounceable synthetic drug names."""
+    rng = random.Random(seed)
+    stems = [(p + s).capitalize() for p in PREFIXES for s in SUFFIXES]
+    rng.shuffle(stems)
+    # once the stems run out, number them: Metformin, ..., Metformin-2, ...
+    return [stems[i % len(stems)] + (f"-{i // len(stems) + 1}" if i >= len(stems) else "")
+            for i in range(count)]
+
+
+def _pick_drug(rng: random.Random, drugs: list[str]) -> str:
+    # skewed so a few drugs dominate, like real registries
+    return drugs[min(int(rng.paretovariate(1.2)) - 1, len(drugs) - 1)]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _stream(path: Path, key: str, records) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write('{"%s": [' % key)
+        for record in records:
+            fh.write(("," if count else "") + "\n" + json.dumps(record))
+            count += 1
+        fh.write("\n]}\n")
+    return count
+
+
+def trials(scale: int, drugs: list[str], seed: int = 1):
+    rng = random.Random(seed)
+    for i in range(scale):
+        drug = _pick_drug(rng, drugs)
+        yield {
+            "id": f"NCT{i:08d}",
+            "drug": drug,
+            "indication": rng.choice(INDICATIONS),
+            "phase": rng.choice(PHASES),
+            "status": rng.choice(TRIAL_STATUSES),
+            "summary": f"{drug} evaluated for {_sentence(rng, 8)}.",
+            "results": _sentence(rng, 10),
+            "start_date": f"{rng.randint(2000, 2023)}-{rng.randint(1, 12):02d}-01",
+            "end_date": None,
+        }
+
+
+def patents(scale: int, drugs: list[str], seed: int = 2):
+    rng = random.Random(seed)
+    for i in range(scale):
+        drug = _pick_drug(rng, drugs)
+        yield {
+            "patent_id": f"US{i:010d}A1",
+            "title": f"{drug} {rng.choice(['compositions', 'formulations', 'derivatives', 'methods'])} for {rng.choice(INDICATIONS).lower()}",
+            "assignee": f"Company {rng.randint(1, 500)}",
+            "status": rng.choice(PATENT_STATUSES),
+            "claims_summary": _sentence(rng, 12),
+            "relevance": _sentence(rng, 6),
+        }
+
+
+def articles(scale: int, drugs: list[str], seed: int = 3):
+    rng = random.Random(seed)
+    for i in range(scale):
+        drug = _pick_drug(rng, drugs)
+        yield {
+            "pmid": str(30000000 + i),
+            "title": f"{drug} {_sentence(rng, 5)}",
+            "abstract": f"{_sentence(rng, 20)} {drug} {_sentence(rng, 20)}.",
+            "year": rng.randint(1995, 2024),
+        }
+
+
+def market_insights(scale: int, seed: int = 4):
+    rng = random.Random(seed)
+    for i in range(scale):
+        yield {
+            "segment": SEGMENTS[i] if i < len(SEGMENTS) else f"{rng.choice(SEGMENTS)} {i}",
+            "gap_score": round(rng.uniform(3, 9.5), 1),
+            "rationale": _sentence(rng, 12),
+            "estimated_addressable_market_usd_m": rng.randint(50, 5000),
+            "key_competitors": [f"Company {rng.randint(1, 500)}" for _ in range(3)],
+            "payer_pressure": rng.choice(["Low", "Moderate", "High"]),
+            "recommended_strategy": _sentence(rng, 10),
+        }
+
+
+def generate(out_dir: str | Path, scale: int, drug_count: int | None = None, seed: int = 0) -> dict:
+    """Write all four datasets with ``scale`` records each (market: ``scale // 100``)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    drugs = drug_names(drug_count or max(20, scale // 50), seed)
+    return {
+        "drugs": drugs,
+        "trials": _stream(out_dir / "clinical_trials.json", "trials", trials(scale, drugs, seed + 1)),
+        "patents": _stream(out_dir / "patents.json", "patents", patents(scale, drugs, seed + 2)),
+        "articles": _stream(out_dir / "literature_samples.json", "articles", articles(scale, drugs, seed + 3)),
+        "market_insights": _stream(out_dir / "market_data.json", "market_insights",
+                                   market_insights(max(len(SEGMENTS), scale // 100), seed + 4)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1000, help="records per dataset (1k to 10M)")
+    parser.add_argument("--drugs", type=int, default=None, help="distinct drug names (default scale/50)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args(argv)
+    counts = generate(args.out, args.scale, args.drugs, args.seed)
+    print(json.dumps({k: (len(v) if k == "drugs" else v) for k, v in counts.items()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Benchmark the agents, the ``/analyze`` endpoint and PDF rendering.
+
+Generates (or reuses) a synthetic corpus and prints one JSON document with load
+times, per-query latency percentiles, memory deltas, request throughput and
+report render times, so runs can be diffed or stored to spot regressions::
+
+    python -m benchmarks.run --scale 100000 --out results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from agents.clinical_agent import ClinicalAgent
+from agents.market_agent import MarketAgent
+from agents.patent_agent import PatentAgent
+from agents.report_agent import ReportAgent
+from agents.webintel_agent import WebIntelAgent
+
+from . import generate
+
+AGENT_FILES = {
+    "clinical": (ClinicalAgent, "clinical_trials.json"),
+    "patent": (PatentAgent, "patents.json"),
+    "market": (MarketAgent, "market_data.json"),
+    "literature": (WebIntelAgent, "literature_samples.json"),
+}
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 3)
+
+    return {"n": len(ordered), "mean_ms": round(statistics.fmean(ordered), 3),
+            "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(ordered[-1], 3)}
+
+
+def _time_calls(call, args) -> dict:
+    samples = []
+    for arg in args:
+        started = time.perf_counter()
+        call(arg)
+        samples.append((time.perf_counter() - started) * 1000)
+    return _percentiles(samples)
+
+
+def bench_load(data_dir: Path, work_dir: Path) -> tuple[dict, dict]:
+    """Load every agent from ``data_dir``; returns the agents and their load stats."""
+    agents, stats = {}, {}
+    for name, (cls, filename) in AGENT_FILES.items():
+        gc.collect()
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        if cls is WebIntelAgent:
+            agent = cls(data_dir / filename, index_path=work_dir / "literature.bm25.json")
+        else:
+            agent = cls(data_dir / filename)
+        elapsed = time.perf_counter() - started
+        rss_after = _rss_bytes()
+        agents[name] = agent
+        stats[name] = {
+            "load_seconds": round(elapsed, 4),
+            "rss_delta_mb": None if rss_before is None else round((rss_after - rss_before) / 2**20, 2),
+        }
+    agents["market"].link(agents["clinical"].indications)
+    # a second literature load picks up the persisted BM25 index instead of rebuilding it
+    started = time.perf_counter()
+    WebIntelAgent(data_dir / AGENT_FILES["literature"][1], index_path=work_dir / "literature.bm25.json")
+    stats["literature"]["warm_load_seconds"] = round(time.perf_counter() - started, 4)
+    return agents, stats
+
+
+def bench_queries(agents: dict, drugs: list[str]) -> dict:
+    return {
+        "clinical.summarize_trials": _time_calls(agents["clinical"].summarize_trials, drugs),
+        "clinical.find_trials_by_phase": _time_calls(agents["clinical"].find_trials_by_phase,
+                                                     generate.PHASES * max(1, len(drugs) // 4)),
+        "patent.assess_opportunity": _time_calls(agents["patent"].assess_opportunity, drugs),
+        "literature.summarize_for_drug": _time_calls(agents["literature"].summarize_for_drug, drugs),
+        "market.get_market_insight": _time_calls(lambda drug: agents["market"].get_market_insight(drug=drug), drugs),
+    }
+
+
+def bench_analyze(data_dir: Path, work_dir: Path, drugs: list[str], requests: int) -> dict:
+    """Drive ``POST /analyze`` through the Flask test client, cold then cached."""
+    os.environ.setdefault("PHARMA_RELOAD_INTERVAL", "0")
+    import app as app_module
+    from agents.master_agent import MasterAgent
+
+    master = MasterAgent(concurrent=True, data_dir=data_dir, report_dir=work_dir / "reports")
+    previous, app_module.master = app_module.master, master
+    client = app_module.app.test_client()
+    try:
+        results = {}
+        for phase in ("cold", "cached"):
+            samples = []
+            started = time.perf_counter()
+            for drug in drugs[:requests]:
+                t0 = time.perf_counter()
+                response = client.post("/analyze", json={"drug": drug})
+                samples.append((time.perf_counter() - t0) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f"/analyze returned {response.status_code} for {drug!r}")
+            elapsed = time.perf_counter() - started
+            results[phase] = {"requests_per_second": round(len(samples) / elapsed, 2), **_percentiles(samples)}
+    finally:
+        app_module.master = previous
+        master.report_jobs.shutdown(wait=True)
+    return results
+
+
+def bench_reports(agents: dict, work_dir: Path, drugs: list[str], renders: int) -> dict:
+    from agents.master_agent import MasterAgent
+
+    reporter = ReportAgent(work_dir / "reports")
+    totals, stages = [], {}
+    for drug in drugs[:renders]:
+        sections = MasterAgent._build_sections(drug, {
+            "clinical": agents["clinical"].summarize_trials(drug),
+            "patent": agents["patent"].assess_opportunity(drug),
+            "market": agents["market"].get_market_insight(drug=drug),
+            "literature": agents["literature"].summarize_for_drug(drug),
+        })
+        timings = {}
+        started = time.perf_counter()
+        reporter.generate_pdf(f"{drug} — Benchmark", sections, timings=timings)
+        totals.append((time.perf_counter() - started) * 1000)
+        for stage, ms in timings.items():
+            stages.setdefault(stage, []).append(ms)
+    return {"total": _percentiles(totals),
+            "stages_mean_ms": {stage: round(statistics.fmean(ms), 3) for stage, ms in stages.items()}}
+
+
+def run(scale: int, data_dir: str | Path | None = None, queries: int = 200, requests: int = 50,
+        renders: int = 5, seed: int = 0, skip: tuple = ()) -> dict:
+    """Run the whole suite; ``skip`` may name ``"analyze"`` and/or ``"reports"``."""
+    with tempfile.TemporaryDirectory(prefix="pharma-bench-") as tmp:
+        work_dir = Path(tmp)
+        if data_dir is None:
+            data_dir = work_dir / "data"
+            started = time.perf_counter()
+            drugs = generate.generate(data_dir, scale, seed=seed)["drugs"]
+            generate_seconds = round(time.perf_counter() - started, 3)
+        else:
+            data_dir, generate_seconds = Path(data_dir), None
+            drugs = sorted({t["drug"] for t in ClinicalAgent(data_dir / "clinical_trials.json").trials})
+
+        rng = random.Random(seed)
+        sample = [rng.choice(drugs) for _ in range(queries)]
+        agents, load = bench_load(data_dir, work_dir)
+        results = {
+            "meta": {
+                "scale": scale, "drugs": len(drugs), "seed": seed, "generate_seconds": generate_seconds,
+                "python": platform.python_version(), "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            "load": load,
+            "queries": bench_queries(agents, sample),
+            "rss_mb": None if _rss_bytes() is None else round(_rss_bytes() / 2**20, 2),
+        }
+        if "analyze" not in skip:
+            results["analyze"] = bench_analyze(data_dir, work_dir, list(dict.fromkeys(sample)), requests)
+        if "reports" not in skip:
+            results["reports"] = bench_reports(agents, work_dir, sample, renders)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1000, help="records per dataset (1k to 10M)")
+    parser.add_argument("--data-dir", help="benchmark an existing corpus instead of generating one")
+    parser.add_argument("--queries", type=int, default=200, help="queries per agent method")
+    parser.add_argument("--requests", type=int, default=50, help="/analyze requests per phase")
+    parser.add_argument("--renders", type=int, default=5, help="PDF reports to render")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip", action="append", default=[], choices=["analyze", "reports"])
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+    results = run(args.scale, args.data_dir, args.queries, args.requests, args.renders, args.seed, tuple(args.skip))
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
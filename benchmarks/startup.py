@@ -0,0 +1,60 @@
+"""Cold-start benchmark: import time of the agents and the Flask app.
+
+Each measurement runs in a fresh interpreter, so nothing is already imported,
+and reports whether matplotlib / reportlab were pulled in at import::
+
+    python -m benchmarks.startup --repeat 5 --out startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MODULES = ["agents.clinical_agent", "agents.report_agent", "agents.master_agent", "app"]
+HEAVY = ["matplotlib", "reportlab"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int = 5) -> dict:
+    env = {**os.environ, "PHARMA_RELOAD_INTERVAL": "0"}
+    samples, loaded = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+                             cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        probe = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(probe["seconds"] * 1000)
+        loaded = probe["loaded"]
+    return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1),
+            "max_ms": round(max(samples), 1), "heavy_imports": loaded}
+
+
+def run(modules=MODULES, repeat: int = 5) -> dict:
+    return {module: measure(module, repeat) for module in modules}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+    text = json.dumps(run(args.modules, args.repeat), indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
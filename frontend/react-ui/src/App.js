@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import './index.css';
 
 function App() {
@@ -7,6 +7,45 @@ function App() {
   const [loading, setLoading] = useState(false);
   const [results, setResults] = useState(null);
   const [error, setError] = useState('');
+  const [report, setReport] = useState(null);
+
+  // Reports render in the background; poll the job until the PDF is ready.
+  useEffect(() => {
+    const jobId = results?.report_job;
+    if (!jobId) return undefined;
+    let cancelled = false;
+    const poll = async () => {
+      try {
+        const response = await axios.get(`/reports/status/${jobId}`);
+        if (cancelled) return;
+        setReport(response.data);
+        if (response.data.status === 'pending' || response.data.status === 'running') {
+          setTimeout(poll, 1000);
+        }
+      } catch (err) {
+        if (!cancelled) setReport({ status: 'failed', error: err.response?.data?.error });
+      }
+    };
+    poll();
+    return () => { cancelled = true; };
+  }, [results?.report_job]);
+
+  // Sections stream in as NDJSON events, one per agent as it finishes.
+  const applyEvent = (event) => {
+    setResults((prev) => {
+      switch (event.event) {
+        case 'section':
+        case 'conclusion':
+          return { ...prev, sections: { ...prev.sections, [event.title]: event.data } };
+        case 'error':
+          return { ...prev, errors: { ...prev.errors, [event.agent]: event.error } };
+        case 'report':
+          return { ...prev, report_path: event.report_path, report_job: event.report_job };
+        default:
+          return prev;
+      }
+    });
+  };
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -15,20 +54,43 @@ function App() {
     setLoading(true);
     setError('');
     setResults(null);
+    setReport(null);
 
     try {
-      const response = await axios.post('/analyze', { drug: drug.trim() });
-      setResults(response.data);
+      const response = await fetch('/analyze?stream=ndjson', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ drug: drug.trim() }),
+      });
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.error || 'An error occurred during analysis');
+      }
+      setResults({ drug: drug.trim(), sections: {} });
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(Boolean).forEach((line) => applyEvent(JSON.parse(line)));
+      }
     } catch (err) {
-      setError(err.response?.data?.error || 'An error occurred during analysis');
+      setError(err.message || 'An error occurred during analysis');
     } finally {
       setLoading(false);
     }
   };
 
+  const reportPath = results?.report_path || report?.report_path;
+  const reportReady = Boolean(reportPath);
+
   const handleDownload = () => {
-    if (results?.report_path) {
-      const filename = results.report_path.split('/').pop();
+    if (reportPath) {
+      const filename = reportPath.split(/[\\/]/).pop();
       window.open(`/reports/${filename}`, '_blank');
     }
   };
@@ -63,7 +125,7 @@ function App() {
         </div>
       )}
 
-      {loading && (
+      {loading && !results && (
         <div className="loading">
           <p>🔬 Running multi-agent analysis...</p>
           <p>This may take a few moments as we analyze clinical trials, patents, market data, and literature.</p>
@@ -73,62 +135,89 @@ function App() {
       {results && (
         <div className="results">
           <h2>Analysis Results for {results.drug}</h2>
+          {results.errors && (
+            <div className="error">
+              <strong>Unavailable:</strong> {Object.keys(results.errors).join(', ')}
+            </div>
+          )}
           
-          <div className="section">
-            <h3>📊 Clinical Trials Summary</h3>
-            <p><strong>Total Trials:</strong> {results.sections['Clinical Trials Summary'].count}</p>
-            <p><strong>Phase Distribution:</strong> {JSON.stringify(results.sections['Clinical Trials Summary'].phases)}</p>
-            <p><strong>Status Distribution:</strong> {JSON.stringify(results.sections['Clinical Trials Summary'].statuses)}</p>
-            
-            <div className="trials-grid">
-              {results.sections['Clinical Trials Summary'].examples.map((trial, idx) => (
-                <div key={idx} className="trial-card">
-                  <h4>{trial.indication}</h4>
-                  <p><strong>Phase:</strong> {trial.phase}</p>
-                  <p><strong>Status:</strong> {trial.status}</p>
-                  <p>{trial.summary}</p>
-                </div>
-              ))}
+          {'Clinical Trials Summary' in results.sections && (
+            <div className="section">
+              <h3>📊 Clinical Trials Summary</h3>
+              <p><strong>Total Trials:</strong> {results.sections['Clinical Trials Summary'].count}</p>
+              <p><strong>Phase Distribution:</strong> {JSON.stringify(results.sections['Clinical Trials Summary'].phases)}</p>
+              <p><strong>Status Distribution:</strong> {JSON.stringify(results.sections['Clinical Trials Summary'].statuses)}</p>
+              
+              <div className="trials-grid">
+                {results.sections['Clinical Trials Summary'].examples.map((trial, idx) => (
+                  <div key={idx} className="trial-card">
+                    <h4>{trial.indication}</h4>
+                    <p><strong>Phase:</strong> {trial.phase}</p>
+                    <p><strong>Status:</strong> {trial.status}</p>
+                    <p>{trial.summary}</p>
+                  </div>
+                ))}
+              </div>
             </div>
-          </div>
-
-          <div className="section">
-            <h3>⚖️ Patent Landscape</h3>
-            <p><strong>Opportunity Level:</strong> {results.sections['Patent Landscape'].opportunity}</p>
-            <ul className="patent-list">
-              {results.sections['Patent Landscape'].matches.map((patent, idx) => (
-                <li key={idx} className="patent-item">
-                  <strong>{patent.title}</strong> ({patent.status})<br/>
-                  <em>{patent.assignee}</em><br/>
-                  {patent.relevance}
-                </li>
-              ))}
-            </ul>
-          </div>
-
-          <div className="section">
-            <h3>💰 Market Insights</h3>
-            <p><strong>Segment:</strong> {results.sections['Market Insight'].segment}</p>
-            <p><strong>Gap Score:</strong> {results.sections['Market Insight'].gap_score}/10</p>
-            <p><strong>Market Size:</strong> ${results.sections['Market Insight'].estimated_addressable_market_usd_m}M</p>
-            <p><strong>Strategy:</strong> {results.sections['Market Insight'].recommended_strategy}</p>
-            <p>{results.sections['Market Insight'].rationale}</p>
-          </div>
+          )}
+
+          {'Patent Landscape' in results.sections && (
+            <div className="section">
+              <h3>⚖️ Patent Landscape</h3>
+              <p><strong>Opportunity Level:</strong> {results.sections['Patent Landscape'].opportunity}</p>
+              <ul className="patent-list">
+                {results.sections['Patent Landscape'].matches.map((patent, idx) => (
+                  <li key={idx} className="patent-item">
+                    <strong>{patent.title}</strong> ({patent.status})<br/>
+                    <em>{patent.assignee}</em><br/>
+                    {patent.relevance}
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+
+          {'Market Insight' in results.sections && (
+            <div className="section">
+              <h3>💰 Market Insights</h3>
+              <p><strong>Segment:</strong> {results.sections['Market Insight'].segment}</p>
+              <p><strong>Gap Score:</strong> {results.sections['Market Insight'].gap_score}/10</p>
+              <p><strong>Market Size:</strong> ${results.sections['Market Insight'].estimated_addressable_market_usd_m}M</p>
+              <p><strong>Strategy:</strong> {results.sections['Market Insight'].recommended_strategy}</p>
+              <p>{results.sections['Market Insight'].rationale}</p>
+              {results.sections['Market Insight'].related_segments?.length > 0 && (
+                <p><strong>Related segments:</strong> {results.sections['Market Insight'].related_segments
+                  .map(r => `${r.segment} (${r.gap_score}/10)`).join(', ')}</p>
+              )}
+            </div>
+          )}
 
-          <div className="section">
-            <h3>📚 Literature Synthesis</h3>
-            <p>{results.sections['Literature Synthesis']}</p>
-          </div>
+          {'Literature Synthesis' in results.sections && (
+            <div className="section">
+              <h3>📚 Literature Synthesis</h3>
+              <p>{results.sections['Literature Synthesis']}</p>
+            </div>
+          )}
 
-          <div className="section">
-            <h3>🎯 Conclusion</h3>
-            <p>{results.sections.Conclusion}</p>
-          </div>
+          {'Conclusion' in results.sections && (
+            <div className="section">
+              <h3>🎯 Conclusion</h3>
+              <p>{results.sections.Conclusion}</p>
+            </div>
+          )}
 
           <div className="download-section">
             <h3>📄 Full Report</h3>
-            <p>A detailed PDF report has been generated with all findings.</p>
-            <button onClick={handleDownload} className="btn">
+            {loading ? (
+              <p>Waiting for the remaining agents...</p>
+            ) : reportReady ? (
+              <p>A detailed PDF report has been generated with all findings.</p>
+            ) : report?.status === 'failed' ? (
+              <p>Report generation failed{report.error ? `: ${report.error}` : '.'}</p>
+            ) : (
+              <p>Generating the PDF report...</p>
+            )}
+            <button onClick={handleDownload} className="btn" disabled={!reportReady}>
               Download PDF Report
             </button>
           </div>
@@ -0,0 +1,41 @@
+"""Gunicorn settings for serving ``app:app`` in production.
+
+    gunicorn -c gunicorn.conf.py app:app      # or: python serve.py
+
+The app (and with it every dataset and search index) is imported once in the
+master process and then forked, so workers share that memory copy-on-write.
+Tune with PHARMA_BIND, PHARMA_WORKERS, PHARMA_THREADS and PHARMA_TIMEOUT; each
+worker also starts PHARMA_REPORT_WORKERS warm PDF render processes.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("PHARMA_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("PHARMA_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("PHARMA_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.environ.get("PHARMA_TIMEOUT", "120"))
+keepalive = 5
+preload_app = True
+accesslog = "-"
+
+
+def when_ready(server):
+    # runs in the master after the app is preloaded and before any worker forks
+    import app
+    from agents import report_agent
+
+    app.master.watcher.stop()  # workers run their own; never fork mid-reload
+    report_agent.preload()  # imported lazily otherwise; load once to share with workers
+    # move everything loaded so far out of the collector's reach so a collection
+    # in a worker doesn't write to (and so un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+
+    app.master.after_fork(watch_interval=app.RELOAD_INTERVAL)
+    app.master.report_jobs.warm()
@@ -0,0 +1,34 @@
+"""Production launcher: gunicorn where available, a threaded server otherwise.
+
+    python serve.py
+
+Gunicorn (see gunicorn.conf.py) is not available on Windows; there the app is
+served by Werkzeug with one thread per request and the debugger off.
+"""
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+
+def main():
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+    if gunicorn is not None and sys.platform != "win32":
+        os.chdir(ROOT)
+        argv = [sys.executable, "-m", "gunicorn", "-c", str(ROOT / "gunicorn.conf.py"), "app:app", *sys.argv[1:]]
+        os.execv(sys.executable, argv)
+
+    print("gunicorn unavailable; serving with the threaded Werkzeug server", file=sys.stderr)
+    sys.path.insert(0, str(ROOT))
+    from app import app
+
+    host, _, port = os.environ.get("PHARMA_BIND", "0.0.0.0:5000").rpartition(":")
+    app.run(host=host or "0.0.0.0", port=int(port), threaded=True, debug=False)
+
+
+if __name__ == "__main__":
+    main()
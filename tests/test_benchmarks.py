@@ -0,0 +1,47 @@
+import json
+
+from benchmarks import generate, run
+
+
+class TestGenerate:
+    def test_writes_all_datasets(self, tmp_path):
+        counts = generate.generate(tmp_path, 50, drug_count=5)
+        assert counts["trials"] == counts["patents"] == counts["articles"] == 50
+        trials = json.loads((tmp_path / "clinical_trials.json").read_text())["trials"]
+        assert len(trials) == 50
+        assert {t["drug"] for t in trials} <= set(counts["drugs"])
+        market = json.loads((tmp_path / "market_data.json").read_text())["market_insights"]
+        assert len(market) == counts["market_insights"] >= len(generate.SEGMENTS)
+
+    def test_deterministic_for_seed(self, tmp_path):
+        generate.generate(tmp_path / "a", 20, seed=7)
+        generate.generate(tmp_path / "b", 20, seed=7)
+        assert (tmp_path / "a" / "patents.json").read_bytes() == (tmp_path / "b" / "patents.json").read_bytes()
+
+    def test_drug_names_distinct(self):
+        names = generate.drug_names(1000)
+        assert len(set(names)) == 1000
+
+
+class TestRun:
+    def test_small_run_reports_every_agent(self):
+        results = run.run(100, queries=10, skip=("analyze", "reports"))
+        assert set(results["load"]) == {"clinical", "patent", "market", "literature"}
+        assert results["queries"]["clinical.summarize_trials"]["n"] == 10
+        assert "analyze" not in results
+        json.dumps(results)
+
+    def test_existing_corpus(self, tmp_path):
+        generate.generate(tmp_path, 30, drug_count=3)
+        results = run.run(30, data_dir=tmp_path, queries=5, skip=("analyze", "reports"))
+        assert results["meta"]["drugs"] == 3
+        assert results["meta"]["generate_seconds"] is None
+
+
+class TestStartup:
+    def test_agents_import_without_render_libraries(self):
+        from benchmarks import startup
+
+        result = startup.run(["agents.master_agent"], repeat=1)["agents.master_agent"]
+        assert result["heavy_imports"] == []
+        assert result["median_ms"] > 0
@@ -0,0 +1,69 @@
+import tempfile
+
+from agents.chart_cache import ChartCache
+from agents.report_agent import ReportAgent
+
+
+class TestChartCache:
+
+    def test_key_depends_on_kind_and_order(self):
+        assert ChartCache.key("pie", [["A", 1]]) == ChartCache.key("pie", [("A", 1)])
+        assert ChartCache.key("pie", [["A", 1]]) != ChartCache.key("bar", [["A", 1]])
+        assert ChartCache.key("pie", [["A", 1], ["B", 2]]) != ChartCache.key("pie", [["B", 2], ["A", 1]])
+
+    def test_get_or_render_renders_once(self):
+        cache = ChartCache()
+        calls = []
+        render = lambda: calls.append(1) or b"png"
+        assert cache.get_or_render("k", render) == b"png"
+        assert cache.get_or_render("k", render) == b"png"
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used_by_size(self):
+        cache = ChartCache(max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1234"
+        assert cache.stats()["bytes"] == 8
+
+    def test_oversized_chart_not_kept_in_memory(self):
+        cache = ChartCache(max_bytes=3)
+        cache.put("big", b"1234")
+        assert len(cache) == 0
+
+    def test_disk_tier_shared_between_caches(self, tmp_path):
+        ChartCache(disk_dir=tmp_path).put("k", b"png")
+        other = ChartCache(disk_dir=tmp_path)
+
+        assert other.get_or_render("k", lambda: b"never") == b"png"
+        assert other.stats()["disk_hits"] == 1
+        assert other.get("k") == b"png" and other.stats()["hits"] == 1
+
+    def test_disk_tier_pruned(self, tmp_path):
+        cache = ChartCache(disk_dir=tmp_path, max_disk_bytes=10)
+        for key in "abcd":
+            cache.put(key, b"1234")
+        assert sum(f.stat().st_size for f in tmp_path.glob("*.png")) <= 10
+        assert (tmp_path / "d.png").exists()
+
+
+class TestReportAgentChartCache:
+
+    def test_identical_charts_rasterized_once(self):
+        cache = ChartCache()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = ReportAgent(out_dir=temp_dir, chart_cache=cache)
+            second = ReportAgent(out_dir=temp_dir, chart_cache=cache)
+            a = first._create_phase_distribution_chart({"Phase 2": 2, "Phase 3": 1})
+            b = second._create_phase_distribution_chart({"Phase 2": 2, "Phase 3": 1})
+            second._create_phase_distribution_chart({"Phase 2": 1})
+            first._create_patent_status_chart([{"status": "Active"}])
+
+        assert a.getvalue() == b.getvalue()
+        assert cache.stats()["misses"] == 3
+        assert cache.stats()["hits"] == 1
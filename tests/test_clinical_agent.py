@@ -3,6 +3,7 @@ import json
 import tempfile
 from pathlib import Path
 from agents.clinical_agent import ClinicalAgent
+from agents.drug_lexicon import DrugLexicon
 
 
 @pytest.fixture
@@ -102,4 +103,46 @@ class TestClinicalAgent:
         assert summary["count"] == 0
         assert summary["phases"] == {}
         assert summary["statuses"] == {}
-        assert summary["examples"] == []
\ No newline at end of file
+        assert summary["examples"] == []
+
+    def test_find_trials_for_drug_ignores_whitespace(self, temp_clinical_file):
+        agent = ClinicalAgent(data_path=temp_clinical_file)
+        trials = agent.find_trials_for_drug("  TESTDRUG ")
+        assert [t["id"] for t in trials] == ["TEST001", "TEST002"]
+
+    def test_find_trials_by_phase(self, temp_clinical_file):
+        agent = ClinicalAgent(data_path=temp_clinical_file)
+        assert [t["id"] for t in agent.find_trials_by_phase("phase 3")] == ["TEST002"]
+        assert agent.find_trials_by_phase("Phase 4") == []
+
+    def test_find_trials_by_status(self, temp_clinical_file):
+        agent = ClinicalAgent(data_path=temp_clinical_file)
+        assert [t["id"] for t in agent.find_trials_by_status("Terminated")] == ["TEST003"]
+
+    def test_summarize_trials_counts_are_copies(self, temp_clinical_file):
+        agent = ClinicalAgent(data_path=temp_clinical_file)
+        summary = agent.summarize_trials("TestDrug")
+        summary["phases"]["Phase 2"] = 99
+
+        assert agent.summarize_trials("TestDrug")["phases"]["Phase 2"] == 1
+
+    def test_summarize_trials_missing_phase_is_unknown(self, mock_clinical_data, tmp_path):
+        del mock_clinical_data["trials"][0]["phase"]
+        path = tmp_path / "trials.json"
+        path.write_text(json.dumps(mock_clinical_data))
+        agent = ClinicalAgent(data_path=path)
+
+        assert agent.summarize_trials("TestDrug")["phases"] == {"unknown": 1, "Phase 3": 1}
+
+    def test_find_trials_resolves_synonyms_and_typos(self, temp_clinical_file):
+        lexicon = DrugLexicon({"TestDrug": ["Testabrand", "testdrug hydrochloride"]})
+        agent = ClinicalAgent(data_path=temp_clinical_file, lexicon=lexicon)
+        assert len(agent.find_trials_for_drug("Testabrand")) == 2
+        assert len(agent.find_trials_for_drug("TestDrug HCl")) == 2
+        assert len(agent.find_trials_for_drug("Otherdrg")) == 1
+        assert agent.summarize_trials("testabrand")["count"] == 2
+
+    def test_indications_per_drug(self, temp_clinical_file):
+        agent = ClinicalAgent(data_path=temp_clinical_file)
+        assert agent.indications["testdrug"] == {"Test Indication": 1, "Another Indication": 1}
+        assert agent.indications["otherdrug"] == {"Other Indication": 1}
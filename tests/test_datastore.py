@@ -0,0 +1,120 @@
+import json
+import os
+import pytest
+from pathlib import Path
+from agents.datastore import ColumnarTable, convert, file_fingerprint, load_records, resolve_source
+from agents.clinical_agent import ClinicalAgent
+from agents.market_agent import MarketAgent
+from agents.patent_agent import PatentAgent
+from agents.webintel_agent import WebIntelAgent
+
+
+@pytest.fixture
+def trials_file(tmp_path):
+    payload = {
+        "trials": [
+            {"id": "T1", "drug": "TestDrug", "phase": "Phase 2", "status": "Completed", "end_date": None},
+            {"id": "T2", "drug": "TestDrug", "phase": "Phase 3", "tags": ["a", "ü"]},
+            {"id": "T3", "drug": "OtherDrug", "status": "Active", "enrollment": 120},
+        ]
+    }
+    path = tmp_path / "clinical_trials.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    return path
+
+
+class TestColumnarTable:
+
+    def test_roundtrip_preserves_records(self, trials_file):
+        table = ColumnarTable(convert(trials_file))
+        original = json.loads(trials_file.read_text(encoding="utf-8"))["trials"]
+
+        assert len(table) == 3
+        assert table.key == "trials"
+        assert list(table) == original
+        assert table[-1] == original[-1]
+        assert table[:2] == original[:2]
+
+    def test_missing_keys_are_omitted_not_null(self, trials_file):
+        table = ColumnarTable(convert(trials_file))
+        assert "status" not in table[1]
+        assert table[0]["end_date"] is None
+
+    def test_column_access(self, trials_file):
+        table = ColumnarTable(convert(trials_file))
+        assert list(table.column("drug")) == ["TestDrug", "TestDrug", "OtherDrug"]
+        assert list(table.column("status")) == ["Completed", None, "Active"]
+        assert table.column("nonexistent") == [None, None, None]
+
+    def test_index_out_of_range(self, trials_file):
+        table = ColumnarTable(convert(trials_file))
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_empty_collection(self, tmp_path):
+        path = tmp_path / "patents.json"
+        path.write_text(json.dumps({"patents": []}))
+        table = ColumnarTable(convert(path))
+        assert len(table) == 0
+        assert list(table) == []
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "bad.cols"
+        path.write_bytes(b"not columnar data")
+        with pytest.raises(ValueError):
+            ColumnarTable(path)
+
+
+class TestLoadRecords:
+
+    def test_prefers_fresh_columnar_file(self, trials_file):
+        cols = convert(trials_file)
+        assert resolve_source(trials_file) == cols
+        assert isinstance(load_records(trials_file, "trials"), ColumnarTable)
+
+    def test_stale_columnar_file_is_ignored(self, trials_file):
+        cols = convert(trials_file)
+        stat = cols.stat()
+        os.utime(trials_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert resolve_source(trials_file) == trials_file
+        assert isinstance(load_records(trials_file, "trials"), list)
+
+    def test_columnar_file_without_json(self, trials_file):
+        cols = convert(trials_file)
+        trials_file.unlink()
+        assert resolve_source(trials_file) == cols
+
+    def test_wrong_key_returns_default(self, trials_file):
+        convert(trials_file)
+        assert load_records(trials_file, "patents", []) == []
+
+    def test_dict_shaped_payload(self, tmp_path):
+        path = tmp_path / "market_data.json"
+        path.write_text(json.dumps({"market_insights": {"segment": "Test area", "gap_score": 7.5}}))
+        convert(path)
+        assert load_records(path, "market_insights") == {"segment": "Test area", "gap_score": 7.5}
+
+    def test_fingerprint_changes_with_content(self, trials_file):
+        before = file_fingerprint(trials_file)
+        trials_file.write_text(json.dumps({"trials": []}))
+        assert file_fingerprint(trials_file) != before
+        assert file_fingerprint(Path("nonexistent.json")).endswith(":missing")
+
+
+class TestAgentsOnColumnarData:
+
+    @pytest.mark.parametrize("agent_class,name,method,query", [
+        (ClinicalAgent, "clinical_trials", "summarize_trials", "Metformin"),
+        (PatentAgent, "patents", "assess_opportunity", "Aspirin"),
+        (WebIntelAgent, "literature_samples", "summarize_for_drug", "metformin"),
+        (MarketAgent, "market_data", "get_market_insight", "Cardiovascular prevention"),
+    ])
+    def test_agent_matches_json_results(self, tmp_path, agent_class, name, method, query):
+        source = Path(__file__).parents[1] / "data" / f"{name}.json"
+        json_path = tmp_path / source.name
+        json_path.write_bytes(source.read_bytes())
+        expected = getattr(agent_class(data_path=json_path), method)(query)
+
+        cols = convert(json_path)
+        assert getattr(agent_class(data_path=cols), method)(query) == expected
+        assert getattr(agent_class(data_path=json_path), method)(query) == expected
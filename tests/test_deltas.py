@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+
+import pytest
+
+from agents.clinical_agent import ClinicalAgent
+from agents.datastore import convert
+from agents import deltas
+from agents.deltas import DeltaLog, compact, fold, merge_positions
+from agents.patent_agent import PatentAgent
+from agents.reloader import DatasetWatcher
+
+
+def trial(i, drug, phase="Phase 2", status="Recruiting", indication="Diabetes"):
+    return {"id": f"T{i}", "drug": drug, "phase": phase, "status": status, "indication": indication}
+
+
+@pytest.fixture
+def trials_path(tmp_path):
+    path = tmp_path / "clinical_trials.json"
+    path.write_text(json.dumps({"trials": [trial(0, "TestDrug"), trial(1, "TestDrug", "Phase 3"),
+                                           trial(2, "OtherDrug")]}))
+    return path
+
+
+@pytest.fixture
+def patents_path(tmp_path):
+    path = tmp_path / "patents.json"
+    path.write_text(json.dumps({"patents": [
+        {"patent_id": "P1", "title": "TestDrug formulation", "claims_summary": "", "status": "Active"},
+        {"patent_id": "P2", "title": "OtherDrug use", "claims_summary": "", "status": "Expired"},
+    ]}))
+    return path
+
+
+class TestDeltaLog:
+
+    def test_beside_names_log_after_dataset(self, trials_path):
+        assert DeltaLog.beside(trials_path, "id").path == trials_path.with_name("clinical_trials.delta.ndjson")
+
+    def test_read_leaves_partial_line_for_next_read(self, tmp_path):
+        log = DeltaLog(tmp_path / "x.delta.ndjson", "id")
+        log.append(upserts=[{"id": "A"}], deletes=["B"])
+        with open(log.path, "a") as fh:
+            fh.write('{"op": "delete", "ke')
+        ops, offset = log.read()
+        assert ops == [("upsert", "A", {"id": "A"}), ("delete", "B", None)]
+
+        with open(log.path, "a") as fh:
+            fh.write('y": "C"}\n')
+        assert log.read(offset) == ([("delete", "C", None)], log.size())
+
+    def test_malformed_lines_are_skipped(self, tmp_path):
+        log = DeltaLog(tmp_path / "x.delta.ndjson", "id")
+        log.path.write_text('not json\n{"op": "rename", "key": "A"}\n{"op": "delete", "key": "A"}\n')
+        assert log.read()[0] == [("delete", "A", None)]
+
+    def test_missing_log_reads_nothing(self, tmp_path):
+        assert DeltaLog(tmp_path / "none.delta.ndjson", "id").read(5) == ([], 5)
+
+    def test_fold(self):
+        records = [{"id": "A", "v": 1}, {"id": "B", "v": 1}]
+        ops = [("upsert", "A", {"id": "A", "v": 2}), ("delete", "B", None), ("upsert", "C", {"id": "C", "v": 1}),
+               ("delete", "missing", None)]
+        assert fold(records, ops, "id") == [{"id": "A", "v": 2}, {"id": "C", "v": 1}]
+
+
+class TestCompact:
+
+    def test_folds_log_into_dataset_and_columns(self, trials_path):
+        convert(trials_path)
+        log = DeltaLog.beside(trials_path, "id")
+        log.append(upserts=[trial(3, "NewDrug")], deletes=["T0"])
+
+        assert compact(trials_path) == 2
+        assert log.read()[0] == [] and log.generation()  # only the new generation's header is left
+        ids = [t["id"] for t in json.loads(trials_path.read_text())["trials"]]
+        assert ids == ["T1", "T2", "T3"]
+        assert [t["id"] for t in ClinicalAgent(trials_path).trials] == ids
+
+    def test_append_during_compaction_waits_for_the_new_log(self, trials_path, monkeypatch):
+        log = DeltaLog.beside(trials_path, "id")
+        log.append(deletes=["T0"])
+        original_fold = deltas.fold
+        appender = threading.Thread(target=log.append, kwargs={"deletes": ["T1"]})
+
+        def fold_while_appending(*args):
+            appender.start()
+            time.sleep(0.2)  # the appender is now blocked on the log's lock
+            return original_fold(*args)
+
+        monkeypatch.setattr(deltas, "fold", fold_while_appending)
+        assert compact(trials_path) == 1
+        appender.join()
+
+        assert log.generation()
+        assert log.read()[0] == [("delete", "T1", None)]
+        assert [t["id"] for t in json.loads(trials_path.read_text())["trials"]] == ["T1", "T2"]
+
+    def test_no_log_leaves_dataset_untouched(self, trials_path):
+        before = trials_path.read_text()
+        assert compact(trials_path) == 0
+        assert trials_path.read_text() == before
+
+
+class TestClinicalDeltas:
+
+    def test_log_is_applied_on_load(self, trials_path):
+        DeltaLog.beside(trials_path, "id").append(upserts=[trial(3, "NewDrug", indication="Obesity")], deletes=["T2"])
+        agent = ClinicalAgent(trials_path)
+
+        assert agent.summarize_trials("NewDrug")["count"] == 1
+        assert agent.find_trials_for_drug("OtherDrug") == []
+        assert agent.indications["newdrug"] == {"Obesity": 1}
+        assert [t["id"] for t in agent.trials] == ["T0", "T1", "T3"]
+
+    def test_refresh_applies_only_new_lines(self, trials_path):
+        agent = ClinicalAgent(trials_path)
+        index = agent._index
+        log = DeltaLog.beside(trials_path, "id")
+        log.append(upserts=[trial(1, "TestDrug", "Phase 3", status="Completed"), trial(4, "TestDrug")])
+        assert agent.current_version() != agent.version
+
+        agent.refresh()
+        assert agent._index is index  # updated in place, not rebuilt
+        assert agent.version == agent.current_version()
+        summary = agent.summarize_trials("TestDrug")
+        assert summary["count"] == 3
+        assert summary["phases"] == {"Phase 2": 2, "Phase 3": 1}
+        assert summary["statuses"] == {"Recruiting": 2, "Completed": 1}
+        assert [t["id"] for t in agent.find_trials_by_status("Completed")] == ["T1"]
+        assert [t["id"] for t in agent.find_trials_by_phase("Phase 2")] == ["T0", "T2", "T4"]
+
+    def test_update_moves_trial_between_drugs(self, trials_path):
+        agent = ClinicalAgent(trials_path)
+        DeltaLog.beside(trials_path, "id").append(upserts=[trial(0, "OtherDrug")])
+        agent.refresh()
+
+        assert agent.summarize_trials("TestDrug")["count"] == 1
+        assert [t["id"] for t in agent.find_trials_for_drug("OtherDrug")] == ["T0", "T2"]
+
+    def test_compaction_is_detected_even_after_the_log_regrows(self, trials_path):
+        agent = ClinicalAgent(trials_path)
+        log = DeltaLog.beside(trials_path, "id")
+        log.append(deletes=["T0"])
+        agent.refresh()
+        old_offset = agent._applied[1]
+        compact(trials_path)
+        agent.reload()  # e.g. between the JSON and the log being replaced: sees the old offset
+        agent._applied = ("", old_offset)
+        log.append(upserts=[trial(5, "NewDrug"), trial(6, "NewDrug"), trial(7, "NewDrug")])
+        assert log.size() > old_offset
+
+        agent.refresh()
+        assert agent.summarize_trials("NewDrug")["count"] == 3
+        assert agent.version == agent.current_version()
+
+    def test_changed_base_file_falls_back_to_reload(self, trials_path):
+        agent = ClinicalAgent(trials_path)
+        index = agent._index
+        trials_path.write_text(json.dumps({"trials": [trial(0, "TestDrug")]}))
+        agent.refresh()
+
+        assert agent._index is not index
+        assert agent.summarize_trials("TestDrug")["count"] == 1
+
+    def test_readers_never_see_a_half_applied_batch(self, trials_path, monkeypatch):
+        agent = ClinicalAgent(trials_path)
+        seen = []
+
+        def merge_and_read(*args):
+            # a request reading while the batch is being applied
+            seen.append(agent.summarize_trials("TestDrug"))
+            return merge_positions(*args)
+
+        monkeypatch.setattr("agents.clinical_agent.merge_positions", merge_and_read)
+        DeltaLog.beside(trials_path, "id").append(
+            upserts=[trial(5, "TestDrug", "Phase 1"), trial(6, "TestDrug", "Phase 1")], deletes=["T0"])
+        agent.refresh()
+
+        assert seen
+        assert all(s["count"] == sum(s["phases"].values()) for s in seen)
+        assert agent.summarize_trials("TestDrug")["phases"] == {"Phase 3": 1, "Phase 1": 2}
+
+
+class TestPatentDeltas:
+
+    def test_upsert_update_and_delete(self, patents_path):
+        agent = PatentAgent(patents_path)
+        DeltaLog.beside(patents_path, "patent_id").append(
+            upserts=[{"patent_id": "P3", "title": "NewDrug salt", "claims_summary": "", "status": "Active"},
+                     {"patent_id": "P1", "title": "TestDrug tablet", "claims_summary": "", "status": "Expired"}],
+            deletes=["P2"])
+        agent.refresh()
+
+        assert [p["patent_id"] for p in agent.search_patents_for_drug("NewDrug")] == ["P3"]
+        assert agent.search_patents_for_drug("OtherDrug") == []
+        assert agent.search_patents_for_drug("formulation") == []
+        assert [p["status"] for p in agent.search_patents_for_drug("tablet")] == ["Expired"]
+        assert [p["patent_id"] for p in agent.patents] == ["P1", "P3"]
+
+    def test_new_record_is_in_place_before_its_text(self, patents_path):
+        agent = PatentAgent(patents_path)
+        index = agent._index
+
+        class Checked(list):
+            def append(self, text):
+                assert len(index.patents) > len(self)  # a short query scanning range(len(texts)) finds every record
+                super().append(text)
+
+        index.texts = Checked(index.texts)
+        DeltaLog.beside(patents_path, "patent_id").append(
+            upserts=[{"patent_id": "P3", "title": "NewDrug", "claims_summary": "", "status": "Active"}])
+        agent.refresh()
+        assert [p["patent_id"] for p in agent.search_patents_for_drug("ne")] == ["P3"]
+
+
+class TestWatcherRefresh:
+
+    def test_check_refreshes_from_log(self, trials_path):
+        agent = ClinicalAgent(trials_path)
+        watcher = DatasetWatcher({"clinical": agent})
+        assert watcher.check() == []
+
+        DeltaLog.beside(trials_path, "id").append(upserts=[trial(5, "NewDrug")])
+        assert watcher.stale() == ["clinical"]
+        assert watcher.check() == ["clinical"]
+        assert agent.find_trials_for_drug("NewDrug")
+        assert watcher.check() == []
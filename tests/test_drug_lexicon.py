@@ -0,0 +1,83 @@
+import json
+from agents.drug_lexicon import DrugLexicon, normalize
+
+
+class TestNormalize:
+
+    def test_case_whitespace_and_punctuation(self):
+        assert normalize("  MetFormin ") == "metformin"
+        assert normalize("Glucophage-XR") == "glucophage xr"
+        assert normalize(None) == ""
+
+    def test_drops_salt_forms(self):
+        assert normalize("Metformin HCl") == "metformin"
+        assert normalize("sildenafil citrate") == "sildenafil"
+        assert normalize("Sodium") == "sodium"  # nothing left but the salt
+
+    def test_keeps_ion_only_names_whole(self):
+        assert normalize("Calcium carbonate") == "calcium carbonate"
+        assert normalize("Sodium bicarbonate") == "sodium bicarbonate"
+        assert normalize("Potassium chloride") == "potassium chloride"
+        assert normalize("Calcium carbonate") != normalize("Sodium bicarbonate")
+
+
+class TestDrugLexicon:
+
+    def lexicon(self):
+        return DrugLexicon({"Metformin": ["Glucophage", "metformin hydrochloride"], "Aspirin": ["ASA"]},
+                           names=["TestDrug", "TestDrug-2"])
+
+    def test_synonyms_resolve_to_canonical_key(self):
+        lexicon = self.lexicon()
+        assert lexicon.resolve("Metformin") == "metformin"
+        assert lexicon.resolve("GLUCOPHAGE") == "metformin"
+        assert lexicon.resolve("Metformin hydrochloride") == "metformin"
+        assert lexicon.resolve("asa") == "aspirin"
+        assert lexicon.aliases("metformin") == ("metformin", "glucophage")
+
+    def test_fuzzy_resolution(self):
+        lexicon = self.lexicon()
+        assert lexicon.resolve("Metfromin") == "metformin"
+        assert lexicon.resolve("Glucofage") == "metformin"
+        assert lexicon.resolve("Aspirn") == "aspirin"
+        assert lexicon.resolve("Ibuprofen") is None
+
+    def test_equally_close_drugs_are_not_guessed(self):
+        lexicon = DrugLexicon(names=["Prednisone", "Prednisolone"])
+        assert lexicon.resolve("Prednisolonr") == "prednisolone"
+        assert lexicon.resolve("Prednisome") == "prednisone"
+        assert lexicon.resolve("Prednisolne") is None  # one edit from each
+
+    def test_near_miss_can_be_another_drug(self):
+        lexicon = DrugLexicon(names=["Prednisolone"])
+        assert "Prednisone" not in lexicon
+        assert lexicon.resolve("Prednisone") == "prednisolone"  # so callers show display(key)
+        assert lexicon.display("prednisolone") == "Prednisolone"
+
+    def test_short_and_numbered_names_are_not_guessed(self):
+        lexicon = self.lexicon()
+        assert lexicon.resolve("ASB") is None
+        assert lexicon.resolve("TestDrug-2") == "testdrug 2"
+        assert lexicon.resolve("TestDrug-3") is None
+
+    def test_key_never_guesses(self):
+        lexicon = self.lexicon()
+        assert lexicon.key("Glucophage") == "metformin"
+        assert lexicon.key("Metfromin") == "metfromin"
+
+    def test_added_names_invalidate_memo(self):
+        lexicon = self.lexicon()
+        assert lexicon.resolve("Rapamycin") is None
+        lexicon.add_names(["Rapamycine"])
+        assert lexicon.resolve("Rapamycin") == "rapamycine"
+
+    def test_load(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        path.write_text(json.dumps({"synonyms": {"Sildenafil": ["Viagra"]}}))
+        assert DrugLexicon.load(path).resolve("viagra") == "sildenafil"
+        assert len(DrugLexicon.load(tmp_path / "missing.json")) == 0
+
+    def test_bundled_synonyms(self):
+        lexicon = DrugLexicon.load()
+        assert lexicon.resolve("Plaquenil") == "hydroxychloroquine"
+        assert lexicon.resolve("Rogaine") == "minoxidil"
@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from agents.leaderboard import Leaderboard, _slug, drug_features
+from agents.master_agent import MasterAgent
+
+
+def board(rows: dict[str, list[float]], features=("trials", "patent_opportunity", "market_gap", "literature_hits")):
+    matrix = np.array(list(rows.values()), dtype=float).reshape(len(rows), len(features))
+    return Leaderboard(list(rows), list(features), matrix)
+
+
+class TestLeaderboard:
+
+    def test_ranks_by_weighted_scaled_features(self):
+        lb = board({"A": [1, 0.0, 8.0, 0], "B": [4, 1.0, 4.0, 2], "C": [2, 0.5, 0.0, 1]})
+        assert [r["drug"] for r in lb.top(3)] == ["B", "C", "A"]
+        only_market = {"trials": 0, "patent_opportunity": 0, "literature_hits": 0, "market_gap": 1}
+        top = lb.top(2, only_market)
+        assert [(r["drug"], r["score"]) for r in top] == [("A", 1.0), ("B", 0.5)]
+        assert top[0]["features"] == {"trials": 1.0, "patent_opportunity": 0.0, "market_gap": 8.0,
+                                      "literature_hits": 0.0}
+
+    def test_ties_break_by_name_order_at_the_cutoff(self):
+        lb = board({name: [1, 1, 1, 1] for name in "ABCDE"})
+        assert [r["drug"] for r in lb.top(2)] == ["A", "B"]
+        assert [r["rank"] for r in lb.top(10)] == [1, 2, 3, 4, 5]
+
+    def test_unknown_feature_and_bad_k_are_rejected(self):
+        lb = board({"A": [1, 0, 0, 0]})
+        with pytest.raises(ValueError, match="bogus"):
+            lb.top(1, {"bogus": 1})
+        with pytest.raises(ValueError):
+            lb.top(0)
+
+    @pytest.mark.parametrize("value", ["nan", "inf", "-inf"])
+    def test_non_finite_weights_are_rejected(self, value):
+        lb = board({"A": [1, 0, 0, 0]})
+        with pytest.raises(ValueError, match="trials"):
+            lb.top(1, {"trials": float(value)})
+        with pytest.raises(ValueError):
+            lb.weights({"market_gap": float(value)})
+
+    def test_empty_board(self):
+        assert board({}).top(5) == []
+
+    def test_slug(self):
+        assert _slug("phase", "Phase 2/3") == "phase_2_3"
+        assert _slug("status", "Active, recruiting") == "status_active_recruiting"
+
+
+class TestMasterLeaderboard:
+
+    @pytest.fixture
+    def master(self, tmp_path):
+        (tmp_path / "clinical_trials.json").write_text(json.dumps({"trials": [
+            {"id": "T1", "drug": "TestDrug", "phase": "Phase 3", "status": "Completed", "indication": "Diabetes"},
+            {"id": "T2", "drug": "TestDrug", "phase": "Phase 2", "status": "Terminated"},
+            {"id": "T3", "drug": "OtherDrug", "phase": "Phase 2", "status": "Recruiting"},
+        ]}))
+        (tmp_path / "patents.json").write_text(json.dumps({"patents": [
+            {"patent_id": "P1", "title": "OtherDrug formulation", "claims_summary": "", "status": "Active"},
+        ]}))
+        (tmp_path / "market_data.json").write_text(json.dumps({"market_insights": [
+            {"segment": "Metabolic disorders", "gap_score": 7.0},
+        ]}))
+        return MasterAgent(data_dir=tmp_path, report_dir=tmp_path / "reports")
+
+    def test_features_come_from_each_agent(self, master):
+        assert drug_features(master, "TestDrug") == {
+            "trials": 2, "patent_opportunity": 1.0, "market_gap": 7.0, "literature_hits": 0,
+            "phase_3": 1, "phase_2": 1, "status_completed": 1, "status_terminated": 1}
+        assert drug_features(master, "OtherDrug")["patent_opportunity"] == 0.0
+
+    def test_built_once_per_data_version(self, master, tmp_path):
+        lb = master.leaderboard()
+        assert lb.drugs == ["OtherDrug", "TestDrug"]
+        assert lb.features[:4] == ["trials", "patent_opportunity", "market_gap", "literature_hits"]
+        assert master.leaderboard() is lb
+        assert master.leaderboard().top(1)[0]["drug"] == "TestDrug"
+
+        path = tmp_path / "patents.json"
+        path.write_text(json.dumps({"patents": []}))
+        master.reload()
+        assert master.leaderboard() is not lb
+        assert master.leaderboard().top(2, {"patent_opportunity": 10})[0]["drug"] == "TestDrug"
+
+    def test_stale_board_is_served_while_rebuilding(self, master, tmp_path):
+        lb = master.leaderboard()
+        (tmp_path / "patents.json").write_text(json.dumps({"patents": []}))
+        master.patent.reload()  # outside the watcher, so the next request finds the board stale
+        started, release = threading.Event(), threading.Event()
+        build = Leaderboard.build
+
+        def slow_build(m):
+            started.set()
+            release.wait(5)
+            return build(m)
+
+        with patch.object(Leaderboard, "build", side_effect=slow_build):
+            assert master.leaderboard() is lb  # not blocked on the rebuild
+            assert started.wait(5)
+            assert master.leaderboard() is lb
+            release.set()
+            for _ in range(100):
+                if master.leaderboard() is not lb:
+                    break
+                time.sleep(0.01)
+        assert master.leaderboard().version == master.data_version()
@@ -2,6 +2,7 @@ import pytest
 import json
 import tempfile
 from pathlib import Path
+from agents.drug_lexicon import DrugLexicon
 from agents.market_agent import MarketAgent
 
 
@@ -20,6 +21,18 @@ def mock_market_data():
     }
 
 
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / "market_data.json"
+    path.write_text(json.dumps({"market_insights": [
+        {"segment": "Metabolic oncology", "gap_score": 8.2},
+        {"segment": "Cardiovascular prevention", "gap_score": 6.5},
+        {"segment": "Oncology supportive care", "gap_score": 8.9},
+        {"segment": "Dermatology/aesthetics", "gap_score": 6.8},
+    ]}))
+    return path
+
+
 @pytest.fixture
 def temp_market_file(mock_market_data):
     with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
@@ -67,4 +80,40 @@ class TestMarketAgent:
     def test_get_market_insight_empty_data(self):
         agent = MarketAgent(data_path="nonexistent.json")
         insight = agent.get_market_insight()
-        assert insight == {}
\ No newline at end of file
+        assert insight == {}
+
+    def test_get_market_insight_segment_is_case_insensitive(self, catalog_file):
+        agent = MarketAgent(data_path=catalog_file)
+        assert agent.get_market_insight(" cardiovascular PREVENTION")["gap_score"] == 6.5
+
+    def test_linked_drug_gets_highest_gap_segment(self, catalog_file):
+        agent = MarketAgent(data_path=catalog_file)
+        agent.link({"testdrug": {"Breast Cancer": 2, "Cardiovascular Disease Prevention": 1},
+                    "otherdrug": {"Alopecia Areata": 1}})
+
+        insight = agent.get_market_insight(drug="TestDrug")
+        assert insight["segment"] == "Oncology supportive care"
+        assert [r["segment"] for r in insight["related_segments"]] == ["Metabolic oncology", "Cardiovascular prevention"]
+        assert agent.get_market_insight(drug="otherdrug")["segment"] == "Dermatology/aesthetics"
+
+    def test_unlinked_drug_gets_default(self, catalog_file):
+        agent = MarketAgent(data_path=catalog_file)
+        agent.link({"testdrug": {"Unmapped Indication": 1}})
+        assert agent.get_market_insight(drug="TestDrug")["segment"] == "Metabolic oncology"
+        assert agent.get_market_insight(drug="Unknown")["segment"] == "Metabolic oncology"
+
+    def test_drug_lookup_uses_lexicon(self, catalog_file):
+        lexicon = DrugLexicon({"TestDrug": ["Testabrand"]})
+        agent = MarketAgent(data_path=catalog_file, lexicon=lexicon)
+        agent.link({"testdrug": {"Psoriasis": 1}})
+        assert agent.get_market_insight(drug="Testabrand")["segment"] == "Dermatology/aesthetics"
+
+    def test_reload_keeps_links(self, catalog_file):
+        agent = MarketAgent(data_path=catalog_file)
+        agent.link({"testdrug": {"Psoriasis": 1}})
+        catalog_file.write_text(json.dumps({"market_insights": [
+            {"segment": "Metabolic oncology", "gap_score": 8.2},
+            {"segment": "Dermatology/aesthetics", "gap_score": 9.5},
+        ]}))
+        agent.reload()
+        assert agent.get_market_insight(drug="TestDrug")["gap_score"] == 9.5
@@ -1,9 +1,12 @@
 import pytest
 import json
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 from agents.master_agent import MasterAgent
+from agents.metrics import METRICS
 
 
 class TestMasterAgent:
@@ -154,4 +157,342 @@ class TestMasterAgent:
         
         # Verify result structure
         assert result["drug"] == "TestDrug"
-        assert result["report_path"] == "/test/report.pdf"
\ No newline at end of file
+        assert result["report_path"] == "/test/report.pdf"
+
+
+class TestMasterAgentConcurrent:
+
+    @pytest.fixture
+    def agents(self):
+        with patch('agents.master_agent.ClinicalAgent') as clinical_class, \
+             patch('agents.master_agent.PatentAgent') as patent_class, \
+             patch('agents.master_agent.MarketAgent') as market_class, \
+             patch('agents.master_agent.WebIntelAgent') as web_class, \
+             patch('agents.master_agent.ReportAgent') as report_class:
+            clinical_class.return_value.summarize_trials.return_value = {"count": 1}
+            patent_class.return_value.assess_opportunity.return_value = {"opportunity": "High"}
+            market_class.return_value.get_market_insight.return_value = {"gap_score": 8.0}
+            web_class.return_value.summarize_for_drug.return_value = {"summary": "Signals"}
+            report_class.return_value.generate_pdf.return_value = Path("/test/report.pdf")
+            yield {
+                "clinical": clinical_class.return_value,
+                "patent": patent_class.return_value,
+                "market": market_class.return_value,
+                "web": web_class.return_value,
+            }
+
+    def test_concurrent_matches_sequential(self, agents):
+        sequential = MasterAgent().analyze("TestDrug")
+        concurrent = MasterAgent(concurrent=True).analyze("TestDrug")
+        assert concurrent == sequential
+        assert "errors" not in concurrent
+
+    def test_agents_run_in_parallel(self, agents):
+        def slow(*args):
+            time.sleep(0.2)
+            return {"count": 1}
+        for name, method in [("clinical", "summarize_trials"), ("patent", "assess_opportunity"),
+                             ("market", "get_market_insight"), ("web", "summarize_for_drug")]:
+            getattr(agents[name], method).side_effect = slow
+
+        started = time.monotonic()
+        MasterAgent(concurrent=True).analyze("TestDrug")
+        assert time.monotonic() - started < 0.6
+
+    def test_concurrent_requests_do_not_queue_agents(self, agents):
+        def slow(*args, **kwargs):
+            time.sleep(0.2)
+            return {"count": 1}
+        for name, method in [("clinical", "summarize_trials"), ("patent", "assess_opportunity"),
+                             ("market", "get_market_insight"), ("web", "summarize_for_drug")]:
+            getattr(agents[name], method).side_effect = slow
+
+        agent = MasterAgent(concurrent=True, agent_timeout=0.35, request_threads=2)
+        with ThreadPoolExecutor(max_workers=2) as requests:
+            results = list(requests.map(agent.analyze, ["DrugA", "DrugB"]))
+        assert [r.get("errors") for r in results] == [None, None]
+
+    def test_timeout_returns_partial_result(self, agents):
+        agents["patent"].assess_opportunity.side_effect = lambda drug: time.sleep(0.5) or {"opportunity": "Low"}
+        agent = MasterAgent(concurrent=True, agent_timeout={"patent": 0.05})
+        result = agent.analyze("TestDrug")
+
+        assert result["sections"]["Patent Landscape"] == {}
+        assert result["sections"]["Clinical Trials Summary"] == {"count": 1}
+        assert "patent" in result["errors"]
+        assert "timed out" in result["errors"]["patent"]
+
+    def test_agent_exception_returns_partial_result(self, agents):
+        agents["web"].summarize_for_drug.side_effect = RuntimeError("source down")
+        result = MasterAgent(concurrent=True).analyze("TestDrug")
+
+        assert result["sections"]["Literature Synthesis"] is None
+        assert result["errors"]["literature"] == "RuntimeError: source down"
+        assert result["sections"]["Market Insight"] == {"gap_score": 8.0}
+
+    def test_after_fork_drops_inherited_pools(self, agents):
+        agent = MasterAgent(concurrent=True)
+        agent.analyze("TestDrug")
+        inherited = agent._executor
+        agent.after_fork()
+
+        assert agent._executor is None
+        assert agent.report_jobs._executor is None
+        agent.analyze("OtherDrug")
+        assert agent._executor is not inherited
+        assert not agent.watcher.running
+        inherited.shutdown()
+
+
+class TestMasterAgentCache:
+
+    @pytest.fixture
+    def agent(self, tmp_path):
+        report = tmp_path / "report.pdf"
+        report.write_bytes(b"%PDF")
+        with patch('agents.master_agent.ClinicalAgent') as clinical_class, \
+             patch('agents.master_agent.PatentAgent') as patent_class, \
+             patch('agents.master_agent.MarketAgent') as market_class, \
+             patch('agents.master_agent.WebIntelAgent') as web_class, \
+             patch('agents.master_agent.ReportAgent') as report_class:
+            for cls in (clinical_class, patent_class, market_class, web_class):
+                cls.return_value.version = "v1"
+            clinical_class.return_value.summarize_trials.return_value = {"count": 1}
+            patent_class.return_value.assess_opportunity.return_value = {"opportunity": "High"}
+            market_class.return_value.get_market_insight.return_value = {"gap_score": 8.0}
+            web_class.return_value.summarize_for_drug.return_value = {"summary": "Signals"}
+            report_class.return_value.generate_pdf.return_value = report
+            yield MasterAgent()
+
+    def test_repeat_analysis_is_served_from_cache(self, agent):
+        first = agent.analyze("Metformin")
+        second = agent.analyze("  metformin ")
+
+        assert second["cached"] is True
+        assert second["sections"] == first["sections"]
+        assert second["report_path"] == first["report_path"]
+        agent.clinical.summarize_trials.assert_called_once()
+        agent.reporter.generate_pdf.assert_called_once()
+        assert agent.cache.stats()["hits"] == 1
+
+    def test_data_version_change_invalidates(self, agent):
+        agent.analyze("Metformin")
+        agent.patent.version = "v2"
+        result = agent.analyze("Metformin")
+
+        assert "cached" not in result
+        assert agent.reporter.generate_pdf.call_count == 2
+
+    def test_missing_report_file_is_recomputed(self, agent):
+        first = agent.analyze("Metformin")
+        Path(first["report_path"]).unlink()
+        agent.analyze("Metformin")
+        assert agent.reporter.generate_pdf.call_count == 2
+
+    def test_partial_results_are_not_cached(self, agent):
+        agent.concurrent = True
+        agent.web.summarize_for_drug.side_effect = RuntimeError("down")
+        agent.analyze("Metformin")
+        agent.analyze("Metformin")
+        assert agent.reporter.generate_pdf.call_count == 2
+
+    def test_async_report_returns_job(self, agent, tmp_path):
+        agent.report_jobs.submit = MagicMock(return_value="job-1")
+        result = agent.analyze("Metformin", async_report=True)
+
+        assert result["report_job"] == "job-1"
+        assert result["report_path"] is None
+        agent.reporter.generate_pdf.assert_not_called()
+
+    def test_cached_async_job_reused_until_done(self, agent, tmp_path):
+        agent.report_jobs.submit = MagicMock(return_value="job-1")
+        agent.report_jobs.status = MagicMock(return_value={"job_id": "job-1", "status": "running"})
+        agent.analyze("Metformin", async_report=True)
+        hit = agent.analyze("Metformin", async_report=True)
+        assert hit["report_job"] == "job-1"
+        assert hit["cached"] is True
+
+        report = tmp_path / "done.pdf"
+        report.write_bytes(b"%PDF")
+        agent.report_jobs.status.return_value = {"job_id": "job-1", "status": "done", "report_path": str(report)}
+        hit = agent.analyze("Metformin", async_report=True)
+        assert hit["report_path"] == str(report)
+        agent.report_jobs.submit.assert_called_once()
+        agent.clinical.summarize_trials.assert_called_once()
+
+
+class TestMasterAgentBatch:
+
+    @pytest.fixture
+    def agent(self):
+        with patch('agents.master_agent.ClinicalAgent') as clinical_class, \
+             patch('agents.master_agent.PatentAgent') as patent_class, \
+             patch('agents.master_agent.MarketAgent') as market_class, \
+             patch('agents.master_agent.WebIntelAgent') as web_class, \
+             patch('agents.master_agent.ReportAgent') as report_class:
+            clinical_class.return_value.summarize_trials.side_effect = lambda drug: {"drug": drug, "count": 1}
+            patent_class.return_value.assess_opportunity.return_value = {"opportunity": "High"}
+            market_class.return_value.get_market_insight.return_value = {"gap_score": 8.0}
+            web_class.return_value.summarize_for_drug.return_value = {"summary": "Signals"}
+            report_class.return_value.generate_pdf.return_value = Path("/test/report.pdf")
+            yield MasterAgent()
+
+    def test_analyze_many_yields_in_order(self, agent):
+        results = list(agent.analyze_many(["DrugA", "DrugB"]))
+
+        assert [r["drug"] for r in results] == ["DrugA", "DrugB"]
+        assert results[0]["sections"]["Clinical Trials Summary"]["drug"] == "DrugA"
+        assert "report_path" not in results[0]
+        agent.reporter.generate_pdf.assert_not_called()
+
+    def test_analyze_many_groups_duplicates(self, agent):
+        results = list(agent.analyze_many(["DrugA", "druga ", "DrugB"]))
+
+        assert len(results) == 3
+        assert agent.clinical.summarize_trials.call_count == 2
+        assert agent.market.get_market_insight.call_count == 2
+
+    def test_analyze_many_with_reports(self, agent):
+        agent.report_jobs.submit = MagicMock(side_effect=["job-1", "job-2"])
+        results = list(agent.analyze_many(["DrugA", "DrugB"], reports=True))
+        assert [r["report_job"] for r in results] == ["job-1", "job-2"]
+
+        results = list(agent.analyze_many(["DrugA"], reports=True, async_report=False))
+        assert results[0]["report_path"] == "/test/report.pdf"
+
+    def test_analyze_many_isolates_failures(self, agent):
+        agent.patent.assess_opportunity.side_effect = [RuntimeError("bad record"), {"opportunity": "Low"}]
+        results = list(agent.analyze_many(["DrugA", "DrugB"]))
+
+        assert results[0] == {"drug": "DrugA", "error": "RuntimeError: bad record"}
+        assert results[1]["sections"]["Patent Landscape"] == {"opportunity": "Low"}
+
+    def test_analyze_many_serves_and_fills_the_cache(self, agent):
+        agent.analyze("DrugA")
+        results = list(agent.analyze_many(["DrugA", "DrugB"]))
+        assert agent.clinical.summarize_trials.call_count == 2
+        assert "report_path" not in results[0]
+
+        hit = agent.analyze("DrugB")
+        assert hit["cached"] is True
+        assert hit["sections"] == results[1]["sections"]
+        assert agent.clinical.summarize_trials.call_count == 2
+        result = next(agent.analyze_many(["DrugA"], reports=True, async_report=False))
+        assert result["report_path"] == "/test/report.pdf"
+
+    def test_analyze_many_concurrent_reports_agent_errors(self, agent):
+        agent.concurrent = True
+        agent.patent.assess_opportunity.side_effect = RuntimeError("bad record")
+        result = next(agent.analyze_many(["DrugA"]))
+
+        assert result["errors"] == {"patent": "RuntimeError: bad record"}
+        assert result["sections"]["Clinical Trials Summary"]["drug"] == "DrugA"
+        assert agent.cache.get(agent._cache_key("DrugA")) is None
+
+
+class TestMasterAgentTimings:
+
+    @pytest.fixture
+    def agent(self):
+        with patch('agents.master_agent.ClinicalAgent') as clinical_class, \
+             patch('agents.master_agent.PatentAgent') as patent_class, \
+             patch('agents.master_agent.MarketAgent') as market_class, \
+             patch('agents.master_agent.WebIntelAgent') as web_class, \
+             patch('agents.master_agent.ReportAgent') as report_class:
+            clinical_class.return_value.summarize_trials.return_value = {"count": 1}
+            patent_class.return_value.assess_opportunity.return_value = {"opportunity": "High"}
+            market_class.return_value.get_market_insight.return_value = {"gap_score": 8.0}
+            web_class.return_value.summarize_for_drug.return_value = {"summary": "Signals"}
+
+            def generate_pdf(title, sections, timings=None):
+                timings.update({"charts": 1.0, "build": 2.0, "total": 3.5})
+                return Path("/test/report.pdf")
+            report_class.return_value.generate_pdf.side_effect = generate_pdf
+            yield MasterAgent()
+
+    @pytest.mark.parametrize("concurrent", [False, True])
+    def test_timings_breakdown(self, agent, concurrent):
+        agent.concurrent = concurrent
+        result = agent.analyze("TestDrug", timings=True)
+        timings = result["timings"]
+
+        assert set(timings) == {"clinical", "patent", "market", "literature", "report", "total"}
+        assert timings["report"] == {"charts": 1.0, "build": 2.0, "total": 3.5}
+        assert timings["total"] >= timings["clinical"]
+
+    def test_timings_not_returned_by_default_or_cached(self, agent):
+        assert "timings" not in agent.analyze("TestDrug")
+        agent.analyze("Other", timings=True)
+        assert all("timings" not in entry[1] for entry in agent.cache._entries.values())
+
+    def test_agent_calls_feed_metrics(self, agent):
+        before = (METRICS.summary("pharma_agent_call_seconds", agent="patent") or {"count": 0})["count"]
+        agent.analyze("TestDrug")
+        assert METRICS.summary("pharma_agent_call_seconds", agent="patent")["count"] == before + 1
+        assert METRICS.summary("pharma_report_stage_seconds", stage="build")["count"] >= 1
+
+
+class TestMasterAgentStream:
+
+    @pytest.fixture
+    def agent(self, tmp_path):
+        report = tmp_path / "report.pdf"
+        report.write_bytes(b"%PDF")
+        with patch('agents.master_agent.ClinicalAgent') as clinical_class, \
+             patch('agents.master_agent.PatentAgent') as patent_class, \
+             patch('agents.master_agent.MarketAgent') as market_class, \
+             patch('agents.master_agent.WebIntelAgent') as web_class, \
+             patch('agents.master_agent.ReportAgent') as report_class:
+            for cls in (clinical_class, patent_class, market_class, web_class):
+                cls.return_value.version = "v1"
+            clinical_class.return_value.summarize_trials.return_value = {"count": 1}
+            patent_class.return_value.assess_opportunity.return_value = {"opportunity": "High"}
+            market_class.return_value.get_market_insight.return_value = {"gap_score": 8.0}
+            web_class.return_value.summarize_for_drug.return_value = {"summary": "Signals"}
+            report_class.return_value.generate_pdf.return_value = report
+            agent = MasterAgent(concurrent=True)
+            agent.report_jobs.submit = MagicMock(return_value="job-1")
+            yield agent
+
+    def test_stream_matches_analyze(self, agent):
+        events = list(agent.analyze_stream("Metformin"))
+        kinds = [e["event"] for e in events]
+        assert kinds == ["section"] * 4 + ["conclusion", "report", "done"]
+
+        expected = MasterAgent(concurrent=True).analyze("Metformin")["sections"]
+        streamed = {e["title"]: e["data"] for e in events if e["event"] in ("section", "conclusion")}
+        assert streamed == expected
+        assert events[-2]["report_job"] == "job-1"
+
+    def test_fastest_agent_streams_first(self, agent):
+        agent.clinical.summarize_trials.side_effect = lambda drug: time.sleep(0.3) or {"count": 1}
+        stream = agent.analyze_stream("Metformin")
+        started = time.monotonic()
+        first = next(stream)
+        assert time.monotonic() - started < 0.2
+        assert first["agent"] != "clinical"
+        assert [e["agent"] for e in stream if e["event"] == "section"][-1] == "clinical"
+
+    def test_agent_failure_streams_error(self, agent):
+        agent.web.summarize_for_drug.side_effect = RuntimeError("down")
+        events = list(agent.analyze_stream("Metformin"))
+
+        assert {"event": "error", "agent": "literature", "error": "RuntimeError: down"} in events
+        assert events[-1]["errors"] == {"literature": "RuntimeError: down"}
+        assert len(agent.cache) == 0
+
+    def test_stream_timeout(self, agent):
+        agent.agent_timeout = {"patent": 0.05}
+        agent.patent.assess_opportunity.side_effect = lambda drug: time.sleep(0.5) or {}
+        started = time.monotonic()
+        events = list(agent.analyze_stream("Metformin"))
+        assert time.monotonic() - started < 0.4
+        assert "timed out" in events[-1]["errors"]["patent"]
+
+    def test_cached_stream_replays_sections(self, agent):
+        agent.analyze("Metformin", async_report=True)
+        events = list(agent.analyze_stream("metformin"))
+
+        assert events[-1] == {"event": "done", "drug": "Metformin", "cached": True}
+        assert sum(e["event"] == "section" for e in events) == 4
+        agent.clinical.summarize_trials.assert_called_once()
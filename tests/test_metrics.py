@@ -0,0 +1,57 @@
+import pytest
+from agents.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+
+    def test_timer_observes_and_fills_sink(self):
+        registry = MetricsRegistry()
+        sink = {}
+        with registry.timer("op_seconds", sink=sink, sink_key="op", stage="a"):
+            pass
+
+        assert registry.summary("op_seconds", stage="a")["count"] == 1
+        assert sink["op"] >= 0
+        assert registry.summary("op_seconds", stage="b") is None
+
+    def test_timer_records_on_exception(self):
+        registry = MetricsRegistry()
+        with pytest.raises(RuntimeError):
+            with registry.timer("op_seconds"):
+                raise RuntimeError("boom")
+        assert registry.summary("op_seconds")["count"] == 1
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 5.0):
+            registry.observe("op_seconds", seconds, agent="clinical")
+        text = registry.render()
+
+        assert '# TYPE op_seconds histogram' in text
+        assert 'op_seconds_bucket{agent="clinical",le="0.1"} 1' in text
+        assert 'op_seconds_bucket{agent="clinical",le="1.0"} 2' in text
+        assert 'op_seconds_bucket{agent="clinical",le="+Inf"} 3' in text
+        assert 'op_seconds_count{agent="clinical"} 3' in text
+        assert 'op_seconds_sum{agent="clinical"} 5.55' in text
+
+    def test_counters_gauges_and_help(self):
+        registry = MetricsRegistry()
+        registry.describe("requests_total", "Requests served.")
+        registry.inc("requests_total", route="/analyze")
+        registry.inc("requests_total", 2, route="/analyze")
+        registry.set_gauge("records", 10, dataset="trials")
+        text = registry.render()
+
+        assert "# HELP requests_total Requests served." in text
+        assert 'requests_total{route="/analyze"} 3' in text
+        assert 'records{dataset="trials"} 10' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.set_gauge("g", 1, drug='say "hi"\\now')
+        assert 'g{drug="say \\"hi\\"\\\\now"} 1' in registry.render()
+
+    def test_observe_ms_breakdown(self):
+        registry = MetricsRegistry()
+        registry.observe_ms("stage_seconds", {"charts": 120.0, "build": 30.0}, "stage")
+        assert registry.summary("stage_seconds", stage="charts") == {"count": 1, "sum": 0.12}
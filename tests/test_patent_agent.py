@@ -2,6 +2,7 @@ import pytest
 import json
 import tempfile
 from pathlib import Path
+from agents.drug_lexicon import DrugLexicon
 from agents.patent_agent import PatentAgent
 
 
@@ -100,4 +101,35 @@ class TestPatentAgent:
             assessment = agent.assess_opportunity("TestDrug")
             assert assessment["opportunity"] == "Medium"  # No active patents
         finally:
-            temp_path.unlink()
\ No newline at end of file
+            temp_path.unlink()
+
+    def test_search_matches_naive_substring_scan(self, temp_patent_file):
+        agent = PatentAgent(data_path=temp_patent_file)
+        for query in ["TestDrug", "formulations", "drug", "cancer", "ions and", "zzz", "Methods for"]:
+            expected = [p for p in agent.patents
+                        if query.lower() in (p.get("title", "") + " " + p.get("claims_summary", "")).lower()]
+            assert agent.search_patents_for_drug(query) == expected
+
+    def test_search_short_query_falls_back_to_scan(self, temp_patent_file):
+        agent = PatentAgent(data_path=temp_patent_file)
+        assert len(agent.search_patents_for_drug("s ")) == 3
+        assert len(agent.search_patents_for_drug("")) == 3
+
+    def test_search_missing_fields(self, tmp_path):
+        path = tmp_path / "patents.json"
+        path.write_text(json.dumps({"patents": [{"patent_id": "X1", "title": "TestDrug salts"}, {"patent_id": "X2"}]}))
+        agent = PatentAgent(data_path=path)
+        assert [p["patent_id"] for p in agent.search_patents_for_drug("testdrug")] == ["X1"]
+
+    def test_known_drug_matches_aliases_as_whole_words(self, tmp_path):
+        path = tmp_path / "patents.json"
+        path.write_text(json.dumps({"patents": [
+            {"patent_id": "X1", "title": "Acetylsalicylic-acid tablets"},
+            {"patent_id": "X2", "title": "Low dose ASA regimen"},
+            {"patent_id": "X3", "title": "Vasa deferens imaging"},
+            {"patent_id": "X4", "title": "Ibuprofen gel"},
+        ]}))
+        lexicon = DrugLexicon({"Aspirin": ["acetylsalicylic acid", "ASA"]})
+        agent = PatentAgent(data_path=path, lexicon=lexicon)
+        assert [p["patent_id"] for p in agent.search_patents_for_drug("Aspirn")] == ["X1", "X2"]
+        assert [p["patent_id"] for p in agent.search_patents_for_drug("ibuprofen")] == ["X4"]
@@ -0,0 +1,130 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from agents.drug_lexicon import DrugLexicon
+from agents.master_agent import MasterAgent
+from agents.precompute import AnalysisStore, known_drugs, precompute, write_store
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "clinical_trials.json").write_text(json.dumps({"trials": [
+        {"id": "T1", "drug": "TestDrug", "phase": "Phase 2", "status": "Recruiting", "indication": "Diabetes"},
+        {"id": "T2", "drug": "OtherDrug", "phase": "Phase 3", "status": "Completed"},
+    ]}))
+    (data / "patents.json").write_text(json.dumps({"patents": [
+        {"patent_id": "P1", "title": "TestDrug formulation", "claims_summary": "", "status": "Active"},
+    ]}))
+    (data / "literature_samples.json").write_text(json.dumps({"articles": [
+        {"pmid": "1", "title": "LitDrug in breast cancer", "abstract": "LitDrug inhibits growth.", "year": 2020},
+    ]}))
+    (data / "market_data.json").write_text(json.dumps({"market_insights": [
+        {"segment": "Metabolic disorders", "gap_score": 7.0},
+    ]}))
+    (data / "drug_synonyms.json").write_text(json.dumps({"synonyms": {
+        "LitDrug": ["Litomax"], "UnusedDrug": ["Nowhere"],
+    }}))
+    return data
+
+
+@pytest.fixture
+def master(data_dir, tmp_path):
+    return MasterAgent(data_dir=data_dir, report_dir=tmp_path / "reports")
+
+
+class TestKnownDrugs:
+
+    def test_trial_drugs_and_lexicon_drugs_found_in_the_data(self, master):
+        assert known_drugs(master) == ["LitDrug", "OtherDrug", "TestDrug"]
+
+
+class TestPrecompute:
+
+    def test_writes_every_known_drug(self, data_dir, tmp_path):
+        path, count = precompute(tmp_path / "analyses.db", data_dir=data_dir, workers=1)
+        assert count == 3
+        assert len(AnalysisStore(path)) == 3
+
+    def test_pool_matches_in_process_run(self, data_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr("agents.precompute.CHUNK", 1)
+        serial, _ = precompute(tmp_path / "serial.db", data_dir=data_dir, workers=1)
+        pooled, _ = precompute(tmp_path / "pooled.db", data_dir=data_dir, workers=2)
+        version = MasterAgent(data_dir=data_dir, report_dir=tmp_path / "reports").data_version()
+        for key in ("testdrug", "otherdrug", "litdrug"):
+            assert AnalysisStore(pooled).get(key, version) == AnalysisStore(serial).get(key, version)
+
+    def test_analyze_serves_precomputed_sections(self, data_dir, master):
+        precompute(data_dir / "index" / "analyses.db", data_dir=data_dir, workers=1)
+        expected = master.compute_sections("TestDrug")
+        with patch.object(master.clinical, "summarize_trials", side_effect=AssertionError("computed live")), \
+                patch.object(master.reporter, "generate_pdf", return_value=data_dir / "report.pdf"):
+            result = master.analyze("TestDrug")
+            assert next(master.analyze_many(["TestDrug"]))["sections"] == expected
+        assert result["sections"] == expected
+        assert "errors" not in result
+
+    def test_synonyms_share_the_entry_but_echo_the_query(self, data_dir, master):
+        precompute(data_dir / "index" / "analyses.db", data_dir=data_dir, workers=1)
+        expected = {name: master.compute_sections(name) for name in ("Litomax", "testdrug")}
+        with patch.object(master.clinical, "summarize_trials", side_effect=AssertionError("computed live")):
+            for name, sections in expected.items():
+                assert master._precomputed(name) == sections
+
+    def test_typos_are_analyzed_live(self, data_dir, master):
+        precompute(data_dir / "index" / "analyses.db", data_dir=data_dir, workers=1)
+        assert master.lexicon.resolve("LitDrog") == "litdrug"
+        assert master._precomputed("LitDrog") is None
+
+    def test_misspelled_name_reports_what_it_resolved_to(self, data_dir, master):
+        with patch.object(master.reporter, "generate_pdf", return_value=data_dir / "report.pdf"):
+            assert master.analyze("LitDrog")["resolved_as"] == "LitDrug"
+            assert "resolved_as" not in master.analyze("Litomax")
+            assert next(master.analyze_many(["LitDrog"]))["resolved_as"] == "LitDrug"
+            assert list(master.analyze_stream("LitDrog", async_report=False))[-1]["resolved_as"] == "LitDrug"
+
+    def test_names_outside_the_lexicon_skip_the_store(self, data_dir, master):
+        precompute(data_dir / "index" / "analyses.db", data_dir=data_dir, workers=1)
+        with patch.object(master.analyses, "get", side_effect=AssertionError("looked up")):
+            assert master._precomputed("NoSuchDrug") is None
+
+    def test_stream_replays_precomputed_sections(self, data_dir, master):
+        precompute(data_dir / "index" / "analyses.db", data_dir=data_dir, workers=1)
+        with patch.object(master.clinical, "summarize_trials", side_effect=AssertionError("computed live")), \
+                patch.object(master.reporter, "generate_pdf", return_value=data_dir / "report.pdf"):
+            events = list(master.analyze_stream("TestDrug", async_report=False))
+        assert [e["event"] for e in events][-3:] == ["conclusion", "report", "done"]
+        assert events[-1]["cached"] is False
+
+    def test_unknown_drug_and_stale_data_are_computed_live(self, data_dir, master):
+        write_store(data_dir / "index" / "analyses.db", ("old", "data", "", ""),
+                    [("TestDrug", {"Conclusion": "stale"})], master.lexicon)
+        assert master._precomputed("TestDrug") is None
+        assert master._precomputed("NoSuchDrug") is None
+        assert next(master.analyze_many(["TestDrug"]))["sections"]["Conclusion"] != "stale"
+
+
+class TestAnalysisStore:
+
+    def test_missing_file_has_no_entries(self, tmp_path):
+        store = AnalysisStore(tmp_path / "none.db")
+        assert store.get("testdrug", ("v",)) is None
+        assert len(store) == 0
+
+    def test_replaced_file_is_reopened(self, tmp_path):
+        path = tmp_path / "analyses.db"
+        lexicon = DrugLexicon()
+        write_store(path, ("v1",), [("TestDrug", {"n": 1})], lexicon)
+        store = AnalysisStore(path)
+        assert store.get("testdrug", ("v1",)) == ("TestDrug", {"n": 1})
+        write_store(path, ("v2",), [("TestDrug", {"n": 2}), ("OtherDrug", {"n": 3})], lexicon)
+        assert store.get("testdrug", ("v2",)) == ("TestDrug", {"n": 2})
+        assert store.get("testdrug", ("v1",)) is None
+
+    def test_entries_are_keyed_by_canonical_name(self, tmp_path):
+        path = tmp_path / "analyses.db"
+        write_store(path, ("v",), [("Metformin", {"n": 1})], DrugLexicon({"Metformin": ["Glucophage"]}))
+        assert AnalysisStore(path).get("metformin", ("v",)) == ("Metformin", {"n": 1})
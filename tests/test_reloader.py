@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+import pytest
+from agents.clinical_agent import ClinicalAgent
+from agents.market_agent import MarketAgent
+from agents.reloader import DatasetWatcher
+
+
+def write_trials(path, drugs):
+    path.write_text(json.dumps({"trials": [{"id": f"T{i}", "drug": d, "phase": "Phase 2"} for i, d in enumerate(drugs)]}))
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def trials_path(tmp_path):
+    path = tmp_path / "clinical_trials.json"
+    write_trials(path, ["TestDrug"])
+    return path
+
+
+class TestAgentReload:
+
+    def test_reload_swaps_new_data_and_version(self, trials_path):
+        agent = ClinicalAgent(data_path=trials_path)
+        old_version = agent.version
+        write_trials(trials_path, ["TestDrug", "TestDrug", "NewDrug"])
+        bump_mtime(trials_path)
+        agent.reload()
+
+        assert agent.summarize_trials("TestDrug")["count"] == 2
+        assert agent.find_trials_for_drug("NewDrug")
+        assert agent.version != old_version
+
+    def test_failed_reload_keeps_current_data(self, trials_path):
+        agent = ClinicalAgent(data_path=trials_path)
+        version = agent.version
+        trials_path.write_text('{"trials": [')
+        with pytest.raises(ValueError):
+            agent.reload()
+
+        assert agent.summarize_trials("TestDrug")["count"] == 1
+        assert agent.version == version
+
+    def test_market_reload(self, tmp_path):
+        path = tmp_path / "market.json"
+        path.write_text(json.dumps({"market_insights": [{"segment": "A", "gap_score": 1}]}))
+        agent = MarketAgent(data_path=path)
+        path.write_text(json.dumps({"market_insights": [{"segment": "B", "gap_score": 2}]}))
+        bump_mtime(path)
+        agent.reload()
+        assert agent.get_market_insight()["segment"] == "B"
+
+    def test_new_trials_relink_market_segments(self, tmp_path):
+        from agents.master_agent import MasterAgent
+        (tmp_path / "market_data.json").write_text(json.dumps({"market_insights": [
+            {"segment": "Cardiovascular prevention", "gap_score": 6.5},
+            {"segment": "Dermatology/aesthetics", "gap_score": 6.8},
+        ]}))
+        trials_path = tmp_path / "clinical_trials.json"
+        write_trials(trials_path, ["TestDrug"])
+        master = MasterAgent(data_dir=tmp_path, report_dir=tmp_path / "reports")
+        assert master.market.get_market_insight(drug="TestDrug")["segment"] == "Cardiovascular prevention"
+
+        trials_path.write_text(json.dumps({"trials": [{"id": "T1", "drug": "TestDrug", "indication": "Psoriasis"}]}))
+        bump_mtime(trials_path)
+        assert master.reload() == ["clinical"]
+        assert master.market.get_market_insight(drug="TestDrug")["segment"] == "Dermatology/aesthetics"
+
+
+class TestDatasetWatcher:
+
+    def test_check_reloads_only_changed(self, trials_path, tmp_path):
+        other = tmp_path / "other.json"
+        write_trials(other, ["OtherDrug"])
+        agents = {"a": ClinicalAgent(data_path=trials_path), "b": ClinicalAgent(data_path=other)}
+        notified = []
+        watcher = DatasetWatcher(agents, on_reload=notified.append)
+        assert watcher.check() == []
+
+        write_trials(trials_path, ["NewDrug"])
+        bump_mtime(trials_path)
+        assert watcher.stale() == ["a"]
+        assert watcher.check() == ["a"]
+        assert notified == [["a"]]
+        assert agents["a"].find_trials_for_drug("NewDrug")
+        assert watcher.check() == []
+
+    def test_check_retries_failed_reload(self, trials_path):
+        agent = ClinicalAgent(data_path=trials_path)
+        watcher = DatasetWatcher({"clinical": agent})
+        trials_path.write_text('{"trials": [')
+        bump_mtime(trials_path)
+        assert watcher.check() == []
+        assert agent.summarize_trials("TestDrug")["count"] == 1
+
+        write_trials(trials_path, ["NewDrug"])
+        bump_mtime(trials_path)
+        assert watcher.check() == ["clinical"]
+
+    def test_background_thread_picks_up_changes(self, trials_path):
+        agent = ClinicalAgent(data_path=trials_path)
+        watcher = DatasetWatcher({"clinical": agent}, interval=0.01)
+        watcher.start()
+        try:
+            write_trials(trials_path, ["NewDrug"])
+            bump_mtime(trials_path)
+            deadline = time.monotonic() + 5
+            while not agent.find_trials_for_drug("NewDrug") and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+        assert agent.find_trials_for_drug("NewDrug")
+        assert not watcher.running
+
+    def test_readers_never_see_partial_state(self, tmp_path):
+        path = tmp_path / "trials.json"
+        write_trials(path, ["TestDrug"] * 200)
+        agent = ClinicalAgent(data_path=path)
+        stop = threading.Event()
+        seen = set()
+
+        def read():
+            while not stop.is_set():
+                summary = agent.summarize_trials("TestDrug")
+                seen.add((summary["count"], summary["phases"].get("Phase 2")))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for n in (300, 400, 500):
+                write_trials(path, ["TestDrug"] * n)
+                bump_mtime(path)
+                agent.reload()
+        finally:
+            stop.set()
+            reader.join()
+        assert all(count == phase2 for count, phase2 in seen)
@@ -0,0 +1,66 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from agents import render_pool
+from agents.render_pool import RenderPool, render_report
+
+SECTIONS = {
+    "Clinical Trials Summary": {"count": 2, "phases": {"Phase 2": 2}, "statuses": {"Completed": 2}, "examples": []},
+    "Conclusion": "Promising.",
+}
+
+
+class TestRenderReport:
+
+    def test_outside_pool_builds_agent(self, tmp_path):
+        path, timings = render_report(str(tmp_path), "Report", SECTIONS, "a.pdf")
+        assert Path(path) == tmp_path / "a.pdf"
+        assert timings["total"] > 0
+
+    def test_as_bytes_writes_nothing(self, tmp_path):
+        pdf, _ = render_report(str(tmp_path), "Report", SECTIONS, as_bytes=True)
+        assert pdf.startswith(b"%PDF")
+        assert list(tmp_path.iterdir()) == []
+
+    def test_warm_agent_is_reused(self, tmp_path):
+        render_pool._init_worker(str(tmp_path))
+        try:
+            with patch("agents.render_pool.ReportAgent") as report_class:
+                render_report(str(tmp_path), "Report", SECTIONS, "b.pdf")
+                render_report(str(tmp_path), "Report", SECTIONS, "c.pdf")
+            report_class.assert_not_called()
+        finally:
+            render_pool._worker_agent = None
+        assert (tmp_path / "c.pdf").exists()
+
+
+class TestRenderPool:
+
+    @pytest.fixture
+    def pool(self, tmp_path):
+        pool = RenderPool(tmp_path, workers=2)
+        yield pool
+        pool.shutdown()
+
+    def test_warm_starts_workers(self, pool):
+        pids = pool.warm(timeout=60)
+        assert 1 <= len(pids) <= 2
+
+    def test_render_path_and_bytes(self, pool, tmp_path):
+        path, timings = pool.render("Report", SECTIONS, "pooled.pdf").result(timeout=60)
+        pdf, _ = pool.render("Report", SECTIONS, as_bytes=True).result(timeout=60)
+
+        assert Path(path) == tmp_path / "pooled.pdf"
+        assert set(timings) >= {"charts", "build", "total"}
+        assert pdf.startswith(b"%PDF")
+
+    def test_recovers_from_broken_pool(self, pool):
+        pool.warm(timeout=60)
+        broken = pool._executor
+        broken._broken = "worker died"
+        pid = pool.submit(render_pool._worker_pid).result(timeout=60)
+        assert pool._executor is not broken
+        assert isinstance(pid, int)
+        broken.shutdown()
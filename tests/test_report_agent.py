@@ -1,6 +1,8 @@
 import pytest
 import tempfile
+from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 from agents.report_agent import ReportAgent
 
 
@@ -64,4 +66,105 @@ class TestReportAgent:
             pdf_path = agent.generate_pdf(title, sections, "complex_report.pdf")
             
             assert pdf_path.exists()
-            assert pdf_path.stat().st_size > 1000  # Should be substantial size
\ No newline at end of file
+            assert pdf_path.stat().st_size > 1000  # Should be substantial size
+
+    def test_charts_render_to_memory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            agent = ReportAgent(out_dir=temp_dir)
+            phase_chart = agent._create_phase_distribution_chart({"Phase 2": 2, "Phase 3": 1})
+            status_chart = agent._create_patent_status_chart([{"status": "Active"}, {"status": "Expired"}])
+
+            assert phase_chart.getvalue().startswith(b"\x89PNG")
+            assert status_chart.getvalue().startswith(b"\x89PNG")
+            assert agent._create_phase_distribution_chart({}) is None
+            assert agent._create_patent_status_chart([]) is None
+
+    def test_generate_pdf_with_charts_writes_no_temp_files(self):
+        sections = {
+            "Clinical Trials Summary": {
+                "count": 2,
+                "phases": {"Phase 2": 1, "Phase 3": 1},
+                "statuses": {"Completed": 2},
+                "examples": [{"id": "T1", "indication": "Test", "phase": "Phase 2", "status": "Completed"}],
+            },
+            "Patent Landscape": {"opportunity": "Low", "patent_coverage": {"Active": 1},
+                                 "matches": [{"status": "Active"}]},
+        }
+        temp_pngs = lambda: set(Path(tempfile.gettempdir()).glob("*.png"))
+        before = temp_pngs()
+        # the "Generated:" timestamp would otherwise change the compressed page size
+        with tempfile.TemporaryDirectory() as temp_dir, patch('agents.report_agent.datetime') as clock:
+            clock.utcnow.return_value = datetime(2024, 1, 1)
+            agent = ReportAgent(out_dir=temp_dir)
+            first = agent.generate_pdf("Charts", sections, "first.pdf")
+            second = agent.generate_pdf("Charts", sections, "second.pdf")
+
+            assert first.stat().st_size > 10000
+            assert second.stat().st_size == first.stat().st_size
+        assert temp_pngs() <= before
+
+    def test_generate_pdf_stage_timings(self):
+        sections = {
+            "Clinical Trials Summary": {"count": 1, "phases": {"Phase 2": 1},
+                                        "examples": [{"id": "T1", "indication": "Test", "phase": "Phase 2", "status": "Done"}]},
+        }
+        with tempfile.TemporaryDirectory() as temp_dir:
+            timings = {}
+            ReportAgent(out_dir=temp_dir).generate_pdf("Timed", sections, "timed.pdf", timings=timings)
+
+        assert set(timings) == {"charts", "table", "build", "total"}
+        assert timings["total"] >= timings["charts"] + timings["build"]
+
+    def test_styles_built_once(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first, second = ReportAgent(out_dir=temp_dir), ReportAgent(out_dir=temp_dir)
+        assert first.styles is second.styles
+        assert "CustomTitle" in first.styles and "SectionHeader" in first.styles
+
+    def test_section_headers_are_cached_copies(self):
+        a, b = ReportAgent._header("Conclusion"), ReportAgent._header("Conclusion")
+        assert a is not b
+        assert a.frags is b.frags  # parsed once, shared
+
+    def test_trials_tables_share_style(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            agent = ReportAgent(out_dir=temp_dir)
+            trials = [{"id": "T1", "indication": "Test", "phase": "Phase 2", "status": "Done"}]
+            first, second = agent._create_trials_table(trials), agent._create_trials_table(trials * 2)
+        assert first._cellvalues[0] == second._cellvalues[0] == ["Trial ID", "Indication", "Phase", "Status"]
+        assert len(second._cellvalues) == 3
+
+    def test_render_pdf_matches_generate_pdf(self):
+        sections = {"Conclusion": "Same"}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            agent = ReportAgent(out_dir=temp_dir)
+            pdf = agent.render_pdf("Bytes", sections)
+            path = agent.generate_pdf("Bytes", sections, "bytes.pdf")
+            assert pdf.startswith(b"%PDF")
+            assert abs(len(pdf) - path.stat().st_size) < 64  # only timestamps/ids differ
+
+    def test_identical_reports_are_deduplicated(self):
+        sections = {"Conclusion": "Same"}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            agent = ReportAgent(out_dir=temp_dir)
+            first = agent.generate_pdf("Dedup", sections)
+            timings = {}
+            second = agent.generate_pdf("Dedup", sections, timings=timings)
+            other = agent.generate_pdf("Dedup", {"Conclusion": "Different"})
+
+            assert first == second != other
+            assert timings == {"total": 0.0}
+            assert sorted(p.name for p in Path(temp_dir).iterdir()) == sorted([first.name, other.name])
+
+    def test_report_pruned_by_another_store_is_rendered_again(self):
+        from agents.report_store import ReportStore
+        sections = {"Conclusion": "Same"}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            agent = ReportAgent(out_dir=temp_dir)
+            first = agent.generate_pdf("Pruned", sections)
+            ReportStore(temp_dir, max_age=0, prune_interval=0).add(first)  # deletes it
+            assert not first.exists()
+
+            second = agent.generate_pdf("Pruned", sections)
+            assert second == first
+            assert second.exists()
@@ -0,0 +1,96 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+from agents.report_jobs import ReportJobQueue
+
+
+class TestReportJobQueue:
+
+    def test_render_in_process_pool(self, tmp_path):
+        queue = ReportJobQueue(tmp_path, max_workers=1)
+        try:
+            job_id = queue.submit("Test Report", {"Conclusion": "Done"}, "job_report.pdf")
+            job = queue.wait(job_id, timeout=60)
+        finally:
+            queue.shutdown()
+
+        assert job["status"] == "done"
+        assert Path(job["report_path"]) == tmp_path / "job_report.pdf"
+        assert Path(job["report_path"]).stat().st_size > 0
+        assert job["finished_at"] >= job["submitted_at"]
+
+    def test_failed_render_reports_error(self, tmp_path):
+        queue = ReportJobQueue(tmp_path, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+        with patch("agents.render_pool.ReportAgent") as report_class:
+            report_class.return_value.generate_pdf.side_effect = RuntimeError("disk full")
+            job = queue.wait(queue.submit("Broken", {}))
+
+        assert job["status"] == "failed"
+        assert job["error"] == "RuntimeError: disk full"
+        assert job["report_path"] is None
+
+    def test_unknown_job(self, tmp_path):
+        queue = ReportJobQueue(tmp_path)
+        assert queue.status("missing") is None
+        assert queue.wait("missing") is None
+
+    def test_old_jobs_are_forgotten(self, tmp_path):
+        queue = ReportJobQueue(tmp_path, max_jobs=2, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+        with patch("agents.render_pool.ReportAgent") as report_class:
+            report_class.return_value.generate_pdf.return_value = tmp_path / "r.pdf"
+            (tmp_path / "r.pdf").write_bytes(b"%PDF")
+            ids = [queue.submit("Report", {}) for _ in range(3)]
+            for job_id in ids[1:]:
+                queue.wait(job_id)
+
+        assert queue.status(ids[0]) is None
+        assert queue.status(ids[2])["status"] == "done"
+
+    def test_status_visible_to_other_queues(self, tmp_path):
+        # e.g. another gunicorn worker sharing the reports directory
+        queue = ReportJobQueue(tmp_path, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+        other = ReportJobQueue(tmp_path)
+        with patch("agents.render_pool.ReportAgent") as report_class:
+            report_class.return_value.generate_pdf.return_value = tmp_path / "r.pdf"
+            (tmp_path / "r.pdf").write_bytes(b"%PDF")
+            job_id = queue.submit("Report", {})
+            queue.wait(job_id)
+
+        job = other.status(job_id)
+        assert job["status"] == "done"
+        assert job["report_path"] == str(tmp_path / "r.pdf")
+        assert other.status("../../etc/passwd") is None
+
+    def test_stored_report_is_not_rendered_again(self, tmp_path):
+        queue = ReportJobQueue(tmp_path, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+        first = queue.wait(queue.submit("Report", {"Conclusion": "Same"}), timeout=60)
+        with patch("agents.render_pool.ReportAgent") as report_class:
+            second_id = queue.submit("Report", {"Conclusion": "Same"})
+        report_class.assert_not_called()
+
+        second = queue.status(second_id)
+        assert second["status"] == "done"
+        assert second["report_path"] == first["report_path"]
+        assert Path(first["report_path"]).name.startswith("report_")
+        queue.shutdown()
+
+    def test_pruned_report_is_rendered_again(self, tmp_path):
+        queue = ReportJobQueue(tmp_path, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+        first = queue.wait(queue.submit("Report", {"Conclusion": "Same"}), timeout=60)
+        Path(first["report_path"]).unlink()  # another worker's retention pass
+        second = queue.wait(queue.submit("Report", {"Conclusion": "Same"}), timeout=60)
+        queue.shutdown()
+
+        assert second["status"] == "done"
+        assert second["report_path"] == first["report_path"]
+        assert Path(second["report_path"]).exists()
+
+    def test_report_removed_before_finish_fails_the_job(self, tmp_path):
+        queue = ReportJobQueue(tmp_path, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+        with patch("agents.report_jobs.render_report", return_value=(str(tmp_path / "gone.pdf"), {})):
+            job = queue.wait(queue.submit("Report", {}), timeout=60)
+        queue.shutdown()
+
+        assert job["status"] == "failed"
+        assert "removed" in job["error"]
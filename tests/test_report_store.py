@@ -0,0 +1,99 @@
+import os
+import time
+
+from agents.report_store import ReportStore, report_key
+
+
+def _write(store, name, size=10, age=0.0, now=1_000_000.0):
+    path = store.root / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (now - age, now - age))
+    store.add(path)
+    return path
+
+
+class TestReportKey:
+
+    def test_stable_and_content_sensitive(self):
+        assert report_key("T", {"a": 1, "b": 2}) == report_key("T", {"b": 2, "a": 1})
+        assert report_key("T", {"a": 1}) != report_key("T", {"a": 2})
+        assert report_key("T", {"a": 1}) != report_key("U", {"a": 1})
+
+
+class TestReportStore:
+
+    def test_lookup_uses_index(self, tmp_path):
+        store = ReportStore(tmp_path)
+        path = _write(store, "report_a.pdf")
+        path.unlink()  # e.g. pruned by another worker's store
+        assert store.lookup("report_a.pdf") == path  # the index answers without a stat
+        store.discard("report_a.pdf")
+        assert store.lookup("report_a.pdf") is None
+
+    def test_get_confirms_and_touches_the_file(self, tmp_path):
+        store = ReportStore(tmp_path)
+        path = _write(store, "report_a.pdf", age=500, now=time.time())
+        before = path.stat().st_mtime
+        assert store.get("a") == path
+        assert path.stat().st_mtime > before
+        path.unlink()
+        assert store.get("a") is None
+        assert store.stats()["reports"] == 0
+
+    def test_lookup_finds_files_written_elsewhere(self, tmp_path):
+        store = ReportStore(tmp_path)
+        assert store.lookup("report_b.pdf") is None
+        (tmp_path / "report_b.pdf").write_bytes(b"%PDF")  # another worker
+        assert store.lookup("report_b.pdf") == tmp_path / "report_b.pdf"
+
+    def test_lookup_rejects_unsafe_names(self, tmp_path):
+        (tmp_path / "notes.txt").write_text("x")
+        store = ReportStore(tmp_path / "reports")
+        assert store.lookup("../notes.txt") is None
+        assert store.lookup("sub/report.pdf") is None
+        assert store.lookup(".jobs") is None
+
+    def test_index_built_from_existing_files(self, tmp_path):
+        (tmp_path / "report_old.pdf").write_bytes(b"1234")
+        store = ReportStore(tmp_path)
+        assert store.stats()["reports"] == 1
+        assert store.stats()["bytes"] == 4
+
+    def test_prune_by_age(self, tmp_path):
+        now = 1_000_000.0
+        store = ReportStore(tmp_path, max_age=100, clock=lambda: now)
+        _write(store, "report_old.pdf", age=200, now=now)
+        _write(store, "report_new.pdf", age=10, now=now)
+
+        assert store.prune() == ["report_old.pdf"]
+        assert not (tmp_path / "report_old.pdf").exists()
+        assert store.lookup("report_new.pdf") is not None
+
+    def test_prune_keeps_reports_reused_since_indexed(self, tmp_path):
+        now = 1_000_000.0
+        store = ReportStore(tmp_path, max_age=100, clock=lambda: now)
+        path = _write(store, "report_a.pdf", age=200, now=now)
+        os.utime(path, (now, now))  # handed out again, e.g. by another worker's store
+
+        assert store.prune() == []
+        assert path.exists()
+
+    def test_prune_by_size_removes_oldest(self, tmp_path):
+        now = 1_000_000.0
+        store = ReportStore(tmp_path, max_bytes=25, max_age=None, clock=lambda: now)
+        for i, age in enumerate((30, 20, 10)):
+            _write(store, f"report_{i}.pdf", size=10, age=age, now=now)
+
+        assert store.prune() == ["report_0.pdf"]
+        assert store.stats()["bytes"] == 20
+
+    def test_add_prunes_periodically(self, tmp_path):
+        clock = [1_000_000.0]
+        store = ReportStore(tmp_path, max_bytes=15, max_age=None, prune_interval=60, clock=lambda: clock[0])
+        _write(store, "report_0.pdf", age=20, now=clock[0])
+        _write(store, "report_1.pdf", age=10, now=clock[0])
+        assert store.stats()["reports"] == 2  # not due yet
+
+        clock[0] += 61
+        _write(store, "report_2.pdf", now=clock[0])
+        assert store.stats()["reports"] == 1
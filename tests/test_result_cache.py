@@ -0,0 +1,64 @@
+import pytest
+from agents.result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache:
+
+    def test_get_miss_then_hit(self):
+        cache = ResultCache()
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        cache = ResultCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 10
+        assert cache.get("a") == 1
+        clock.now = 10.1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_no_ttl(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=None, clock=clock)
+        cache.put("a", 1)
+        clock.now = 10**9
+        assert cache.get("a") == 1
+
+    def test_zero_size_disables_cache(self):
+        cache = ResultCache(maxsize=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+    def test_discard_and_clear(self):
+        cache = ResultCache()
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.discard("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,131 @@
+import json
+import pytest
+from agents.clinical_agent import ClinicalAgent
+from agents.datastore import load_records
+from agents.market_agent import MarketAgent
+from agents.master_agent import MasterAgent
+from agents.patent_agent import PatentAgent
+from agents.sqlite_store import SqliteStore, import_json, is_sqlite
+from agents.webintel_agent import WebIntelAgent
+
+DATASETS = {
+    "clinical_trials.json": {"trials": [
+        {"id": "T1", "drug": "TestDrug", "indication": "Breast Cancer", "phase": "Phase 2", "status": "Completed"},
+        {"id": "T2", "drug": "testdrug hydrochloride", "indication": "Psoriasis", "phase": "Phase 3"},
+        {"id": "T3", "drug": "OtherDrug", "phase": "Phase 2", "status": "Active"},
+        {"id": "T4", "drug": "TestDrug", "phase": "Phase 2", "status": "Completed", "tags": ["ü"]},
+    ]},
+    "patents.json": {"patents": [
+        {"patent_id": "P1", "title": "TestDrug compositions", "status": "Active", "claims_summary": "Salts and forms"},
+        {"patent_id": "P2", "title": "Novel formulations", "status": "Expired", "claims_summary": "Including TestDrug-2"},
+        {"patent_id": "P3", "title": "Cancer methods", "status": "Abandoned"},
+    ]},
+    "literature_samples.json": {"articles": [
+        {"pmid": "1", "title": "TestDrug in cancer", "abstract": "TestDrug modulates AMPK.", "year": 2020},
+        {"pmid": "2", "title": "Outcomes", "abstract": "Patients treated with TestDrug.", "year": 2021},
+        {"pmid": "3", "title": "Novel approaches", "abstract": "Other compounds.", "year": 2019},
+    ]},
+    "market_data.json": {"market_insights": [
+        {"segment": "Metabolic oncology", "gap_score": 8.2},
+        {"segment": "Dermatology/aesthetics", "gap_score": 9.1},
+    ]},
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name, payload in DATASETS.items():
+        (tmp_path / name).write_text(json.dumps(payload), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def db(data_dir):
+    return import_json(data_dir / "pharma.db", sorted(data_dir.glob("*.json")))
+
+
+class TestImport:
+
+    def test_is_sqlite(self):
+        assert is_sqlite("data/pharma.db")
+        assert is_sqlite("x.SQLITE")
+        assert not is_sqlite("data/patents.json")
+
+    def test_roundtrip_preserves_records(self, db, data_dir):
+        store = SqliteStore(db)
+        assert list(store.rows("trials")) == DATASETS["clinical_trials.json"]["trials"]
+        assert store.rows("patents")[-1] == DATASETS["patents.json"]["patents"][-1]
+        assert store.rows("articles").many([2, 0]) == [DATASETS["literature_samples.json"]["articles"][i] for i in (2, 0)]
+        with pytest.raises(IndexError):
+            store.rows("patents")[3]
+
+    def test_load_records(self, db):
+        assert list(load_records(db, "market_insights")) == DATASETS["market_data.json"]["market_insights"]
+        assert load_records(db, "unknown", []) == []
+
+    def test_reimport_keeps_other_datasets(self, db, data_dir):
+        (data_dir / "patents.json").write_text(json.dumps({"patents": [{"patent_id": "P9", "title": "New"}]}))
+        import_json(db, [data_dir / "patents.json"])
+        store = SqliteStore(db)
+        assert [p["patent_id"] for p in store.rows("patents")] == ["P9"]
+        assert len(store.rows("trials")) == 4
+        assert store.query("SELECT count(*) FROM articles_fts WHERE articles_fts MATCH 'testdrug'") == [(2,)]
+
+    def test_unknown_dataset_leaves_database_alone(self, db, tmp_path):
+        bad = tmp_path / "other.json"
+        bad.write_text(json.dumps({"widgets": []}))
+        with pytest.raises(ValueError):
+            import_json(db, [bad])
+        assert len(SqliteStore(db).rows("trials")) == 4
+        assert not list(tmp_path.glob(".*.tmp"))
+
+
+class TestAgentsOnSqlite:
+
+    def test_clinical_matches_json(self, db, data_dir):
+        json_agent, db_agent = ClinicalAgent(data_dir / "clinical_trials.json"), ClinicalAgent(db)
+        for drug in ["TestDrug", "testdrug HCl", "OtherDrug", "Missing"]:
+            assert db_agent.summarize_trials(drug) == json_agent.summarize_trials(drug)
+            assert db_agent.find_trials_for_drug(drug) == json_agent.find_trials_for_drug(drug)
+        assert db_agent.find_trials_by_phase(" phase 2") == json_agent.find_trials_by_phase(" phase 2")
+        assert db_agent.find_trials_by_status("unknown") == json_agent.find_trials_by_status("unknown")
+        assert db_agent.indications == json_agent.indications
+
+    def test_patent_matches_json(self, db, data_dir):
+        json_agent, db_agent = PatentAgent(data_dir / "patents.json"), PatentAgent(db)
+        for query in ["TestDrug", "drug", "s ", "", "ions", "zzz", "testdrug 2"]:
+            assert db_agent.search_patents_for_drug(query) == json_agent.search_patents_for_drug(query)
+        assert db_agent.assess_opportunity("TestDrug") == json_agent.assess_opportunity("TestDrug")
+
+    def test_literature_search(self, db, data_dir):
+        json_agent, db_agent = WebIntelAgent(data_dir / "literature_samples.json"), WebIntelAgent(db)
+        for query in ["TestDrug", "testdrug cancer", "nothing"]:
+            expected, actual = json_agent.summarize_for_drug(query), db_agent.summarize_for_drug(query)
+            assert actual["count"] == expected["count"]
+            assert actual["matches"] == expected["matches"]
+        assert db_agent.summarize_for_drug("TestDrug", limit=1, offset=1)["matches"][0]["pmid"] == "2"
+
+    def test_market_reads_rows(self, db):
+        agent = MarketAgent(db)
+        agent.link({"testdrug": {"Psoriasis": 1}})
+        assert agent.get_market_insight()["segment"] == "Metabolic oncology"
+        assert agent.get_market_insight(drug="TestDrug")["segment"] == "Dermatology/aesthetics"
+
+    def test_missing_dataset_loads_empty(self, tmp_path, data_dir):
+        db = import_json(tmp_path / "only_trials.db", [data_dir / "clinical_trials.json"])
+        assert PatentAgent(db).patents == []
+        assert WebIntelAgent(db).summarize_for_drug("TestDrug")["count"] == 0
+        assert ClinicalAgent(db).summarize_trials("TestDrug")["count"] == 3
+
+    def test_master_agent_on_database(self, db, tmp_path):
+        master = MasterAgent(db_path=db, report_dir=tmp_path / "reports")
+        sections = master.analyze("TestDrug")["sections"]
+        assert sections["Clinical Trials Summary"]["count"] == 3
+        assert sections["Market Insight"]["segment"] == "Dermatology/aesthetics"
+
+    def test_reimport_is_hot_reloaded(self, db, data_dir, tmp_path):
+        master = MasterAgent(db_path=db, report_dir=tmp_path / "reports")
+        (data_dir / "patents.json").write_text(json.dumps({"patents": [{"patent_id": "P9", "title": "TestDrug gel"}]}))
+        import_json(db, [data_dir / "patents.json"])
+        assert set(master.reload()) == {"clinical", "patent", "market", "literature"}
+        assert [p["patent_id"] for p in master.patent.search_patents_for_drug("TestDrug")] == ["P9"]
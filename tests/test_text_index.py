@@ -0,0 +1,66 @@
+import pytest
+from agents.text_index import BM25Index, tokenize
+
+
+@pytest.fixture
+def docs():
+    return [
+        "TestDrug mechanisms in cellular pathways",
+        "Clinical outcomes with TestDrug therapy. TestDrug TestDrug.",
+        "Novel approaches in cancer treatment",
+        "TestDrug and cancer: a long review of many other topics and many other words",
+    ]
+
+
+class TestBM25Index:
+
+    def test_tokenize(self):
+        assert tokenize("Aspirin's dual-role (2016)") == ["aspirin", "s", "dual", "role", "2016"]
+        assert tokenize(None) == []
+
+    def test_search_counts_all_matches(self, docs):
+        index = BM25Index.build(docs)
+        total, hits = index.search("testdrug")
+        assert total == 3
+        assert {doc for doc, _ in hits} == {0, 1, 3}
+
+    def test_search_ranks_by_term_frequency(self, docs):
+        index = BM25Index.build(docs)
+        _, hits = index.search("TestDrug")
+        assert hits[0][0] == 1
+        assert hits[0][1] > hits[-1][1]
+
+    def test_search_requires_all_terms(self, docs):
+        index = BM25Index.build(docs)
+        total, hits = index.search("testdrug cancer")
+        assert total == 1
+        assert hits[0][0] == 3
+
+    def test_search_pagination(self, docs):
+        index = BM25Index.build(docs)
+        _, all_hits = index.search("testdrug", limit=10)
+        total, page = index.search("testdrug", limit=1, offset=1)
+        assert total == 3
+        assert page == all_hits[1:2]
+
+    def test_search_no_match(self, docs):
+        index = BM25Index.build(docs)
+        assert index.search("unknown") == (0, [])
+        assert index.search("") == (0, [])
+
+    def test_save_and_load_roundtrip(self, docs, tmp_path):
+        index = BM25Index.build(docs, source="v1")
+        path = tmp_path / "idx" / "bm25.json"
+        index.save(path)
+
+        loaded = BM25Index.load(path)
+        assert loaded.source == "v1"
+        assert loaded.search("testdrug cancer") == index.search("testdrug cancer")
+
+    def test_search_any_merges_queries(self, docs):
+        index = BM25Index.build(docs)
+        total, hits = index.search_any(["novel", "therapy"])
+        assert total == 2
+        assert {doc for doc, _ in hits} == {1, 2}
+        assert index.search_any(["testdrug"]) == index.search("testdrug")
+        assert index.search_any([]) == (0, [])
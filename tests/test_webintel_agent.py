@@ -2,6 +2,7 @@ import pytest
 import json
 import tempfile
 from pathlib import Path
+from agents.drug_lexicon import DrugLexicon
 from agents.webintel_agent import WebIntelAgent
 
 
@@ -85,4 +86,51 @@ class TestWebIntelAgent:
         
         assert summary["count"] == 0
         assert summary["matches"] == []
-        assert "No literature matches found" in summary["summary"]
\ No newline at end of file
+        assert "No literature matches found" in summary["summary"]
+
+    def test_summarize_for_drug_limit_and_offset(self, temp_literature_file):
+        agent = WebIntelAgent(data_path=temp_literature_file)
+        first = agent.summarize_for_drug("TestDrug", limit=1)
+        second = agent.summarize_for_drug("TestDrug", limit=1, offset=1)
+
+        assert first["count"] == 2
+        assert len(first["matches"]) == 1
+        assert first["matches"] != second["matches"]
+
+    def test_summarize_for_drug_combined_is_bounded(self, tmp_path):
+        articles = [{"pmid": str(i), "title": f"TestDrug study {i}", "abstract": "TestDrug " + "x" * 2000, "year": 2020}
+                    for i in range(50)]
+        path = tmp_path / "lit.json"
+        path.write_text(json.dumps({"articles": articles}))
+        summary = WebIntelAgent(data_path=path).summarize_for_drug("TestDrug")
+
+        assert summary["count"] == 50
+        assert len(summary["matches"]) == 5
+        assert len(summary["combined"]) <= 4000
+
+    def test_index_persisted_and_reused(self, temp_literature_file, tmp_path):
+        index_path = tmp_path / "bm25.json"
+        WebIntelAgent(data_path=temp_literature_file, index_path=index_path)
+        assert index_path.exists()
+
+        written = index_path.stat().st_mtime_ns
+
+        agent = WebIntelAgent(data_path=temp_literature_file, index_path=index_path)
+        assert index_path.stat().st_mtime_ns == written
+        assert agent.summarize_for_drug("TestDrug")["count"] == 2
+
+    def test_stale_index_is_rebuilt(self, temp_literature_file, tmp_path, mock_literature_data):
+        index_path = tmp_path / "bm25.json"
+        WebIntelAgent(data_path=temp_literature_file, index_path=index_path)
+        mock_literature_data["articles"].append({"pmid": "2", "title": "TestDrug again", "abstract": "", "year": 2022})
+        temp_literature_file.write_text(json.dumps(mock_literature_data))
+
+        agent = WebIntelAgent(data_path=temp_literature_file, index_path=index_path)
+        assert agent.summarize_for_drug("TestDrug")["count"] == 3
+
+    def test_summarize_searches_all_names_of_a_drug(self, temp_literature_file):
+        lexicon = DrugLexicon({"Novelumab": ["innovative compounds", "TestDrug"]})
+        agent = WebIntelAgent(data_path=temp_literature_file, lexicon=lexicon)
+        summary = agent.summarize_for_drug("Novelumab")
+        assert summary["count"] == 3
+        assert summary["drug"] == "Novelumab"